@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Prometheus metrics of the Approval Service.
+
+The metrics registry and the request latency middleware are shared by all services, see
+cr8tor_publisher_common.metrics.
+"""
+
+from cr8tor_publisher_common.metrics import CONTENT_TYPE, REGISTRY, measure_request
+
+__all__ = ["CONTENT_TYPE", "REGISTRY", "measure_request"]
@@ -2,19 +2,29 @@
 """Contains the FastAPI application and its endpoints."""
 
 import json
-from contextlib import suppress
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 from typing import Any
 
 import httpx
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Response, status
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from . import auth, config, exception, schema
+from . import auth, config, exception, metrics, schema
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Manage resources shared by the application for its whole lifetime."""
+    metrics.REGISTRY.start_flushing()
+    yield
+    metrics.REGISTRY.stop_flushing()
+
 
 app_config: dict[str, Any] = {"title": config.get_settings().app_name}
 
-app = FastAPI(**app_config)
+app = FastAPI(**app_config, lifespan=lifespan)
 
 # Register exception handlers
 app.add_exception_handler(
@@ -27,6 +37,13 @@ app.add_exception_handler(
     StarletteHTTPException,
     exception.starlette_http_exception_handler,
 )
+app.middleware("http")(metrics.measure_request)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(_: auth.AuthDependency) -> Response:
+    """Expose the metrics of the service in the Prometheus text format."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/project/validate")
@@ -0,0 +1 @@
+"""Python modules shared by the services of the CR8TOR project."""
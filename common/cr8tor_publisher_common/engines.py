@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Process-wide registry of SQLAlchemy engines.
+
+Engines are keyed by a fingerprint of their connection string, so that all requests to the
+same database share a warm, bounded connection pool. Connections are checked with a ping
+before use. Engines which were not used for SQLALCHEMY_ENGINE_IDLE_TIMEOUT seconds, i.e.
+neither requested nor checked out a connection, and which have no connection checked out
+are disposed. The remaining engines are disposed when the application shuts down.
+
+Requires the "engines" extra of the package, i.e. SQLAlchemy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Protocol
+
+from sqlalchemy import create_engine, event, make_url
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+class EngineSettings(Protocol):
+    """Settings of the service configuring the engines, read on every use."""
+
+    sqlalchemy_pool_size: int
+    sqlalchemy_max_overflow: int
+    sqlalchemy_pool_recycle: int
+    sqlalchemy_engine_idle_timeout: int
+
+
+def _get_fingerprint(connection_string: str, engine_kwargs: dict[str, Any]) -> str:
+    """Return the fingerprint of the engine, without keeping the credentials in memory as a key."""
+    return hashlib.sha256(
+        f"{connection_string}|{sorted(engine_kwargs.items())!r}".encode(),
+    ).hexdigest()
+
+
+def _has_checked_out_connections(engine: Engine) -> bool:
+    """Check whether connections of the engine are in use. Only the pools with a size track them, e.g. QueuePool."""
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout is not None and checkedout() > 0
+
+
+class EngineRegistry:
+    """Engines of a process, shared per connection string."""
+
+    def __init__(self, settings: EngineSettings) -> None:
+        """Initialize an empty registry.
+
+        :param settings: Settings of the service, with the pool bounds and the idle timeout of the engines.
+        """
+        self.settings = settings
+        # Registered engines as {fingerprint: (engine, last_used)}
+        self._engines: dict[str, tuple[Engine, float]] = {}
+        self._lock = threading.Lock()
+
+    def _touch(self, fingerprint: str) -> None:
+        """Record that the engine was used now, e.g. that one of its connections was checked out."""
+        with self._lock:
+            if fingerprint in self._engines:
+                self._engines[fingerprint] = (self._engines[fingerprint][0], time.monotonic())
+
+    def _evict_idle_engines(self, now: float) -> None:
+        """Dispose the engines which were not used for SQLALCHEMY_ENGINE_IDLE_TIMEOUT seconds and have no connection in use."""
+        for fingerprint, (engine, last_used) in list(self._engines.items()):
+            if now - last_used > self.settings.sqlalchemy_engine_idle_timeout and not _has_checked_out_connections(engine):
+                del self._engines[fingerprint]
+                engine.dispose()
+
+    def get_engine(self, connection_string: str, **engine_kwargs: Any) -> Engine:  # noqa: ANN401
+        """Return the engine of the connection string, creating it on first use.
+
+        :param connection_string: SQLAlchemy URL of the database.
+        :param engine_kwargs: Additional arguments of sqlalchemy.create_engine.
+        """
+        fingerprint = _get_fingerprint(connection_string, engine_kwargs)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_engines(now)
+            engine = self._engines[fingerprint][0] if fingerprint in self._engines else None
+            if engine is None:
+                pool_kwargs = {}
+                # SQLAlchemy picks the pool class of SQLite engines: a QueuePool for database files, but a
+                # SingletonThreadPool for in-memory databases, which does not accept the overflow and recycle bounds
+                if make_url(connection_string).get_backend_name() != "sqlite":
+                    pool_kwargs = {
+                        "pool_size": self.settings.sqlalchemy_pool_size,
+                        "max_overflow": self.settings.sqlalchemy_max_overflow,
+                        "pool_recycle": self.settings.sqlalchemy_pool_recycle,
+                    }
+                engine = create_engine(
+                    connection_string,
+                    pool_pre_ping=True,
+                    **{**pool_kwargs, **engine_kwargs},
+                )
+                event.listen(engine, "checkout", lambda *_: self._touch(fingerprint))
+            self._engines[fingerprint] = (engine, now)
+        return engine
+
+    def dispose_all(self) -> None:
+        """Dispose all registered engines, e.g. when the application shuts down."""
+        with self._lock:
+            for engine, _ in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Prometheus metrics of the services.
+
+The metrics are kept in the memory of the process and exposed in the Prometheus text
+exposition format on the /metrics endpoint.
+
+The uvicorn workers of a service are separate processes, and a scrape is served by any
+one of them. When the PROMETHEUS_MULTIPROC_DIR environment variable is set, every worker
+regularly writes its metrics to its own file in that directory, and the /metrics endpoint
+reports the sum of the metrics of all files, i.e. of all workers of the container. The
+directory must be local to the container and empty when the container starts.
+"""
+
+from __future__ import annotations
+
+import abc
+import contextlib
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterator
+
+    from fastapi import Request, Response
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (in seconds) of the buckets of latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+# Interval (in seconds) between the writes of the metrics of a worker to its file
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+def _escape(value: object) -> str:
+    """Escape the label value as required by the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: list[tuple[str, Any]]) -> str:
+    """Format the labels of a sample."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Metric(abc.ABC):
+    """Metric with a value per combination of its label values."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> None:
+        """Initialize the metric.
+
+        :param name: Name of the metric.
+        :param documentation: Help text of the metric.
+        :param label_names: Names of the labels of the metric.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        """Return the label values of the sample in the order of the label names."""
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abc.abstractmethod
+    def _add(self, key: tuple[str, ...], value: Any) -> None:  # noqa: ANN401
+        """Add the value to the current value of the label values."""
+
+    def _get_samples(self, key: tuple[str, ...], value: Any) -> Iterator[tuple[str, list, float]]:  # noqa: ANN401
+        """Yield the name suffix, labels and value of the samples of the label values."""
+        yield "", list(zip(self.label_names, key, strict=True)), value
+
+    def render(self) -> list[str]:
+        """Return the lines of the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            for suffix, labels, sample_value in self._get_samples(key, value):
+                lines.append(f"{self.name}{suffix}{_format_labels(labels)} {sample_value}")
+        return lines
+
+    def snapshot(self) -> list:
+        """Return the values as [[label values, value]]."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def drain(self) -> list:
+        """Return the values as [[label values, value]] and reset them."""
+        with self._lock:
+            values, self._values = self._values, {}
+        return [[list(key), value] for key, value in values.items()]
+
+    def merge(self, values: list) -> None:
+        """Add the values returned by drain, e.g. in another process."""
+        for key, value in values:
+            self._add(tuple(key), value)
+
+    def empty_copy(self) -> Metric:
+        """Return a metric with the same definition and no values."""
+        metric = copy.copy(self)
+        metric._values = {}  # noqa: SLF001
+        metric._lock = threading.Lock()  # noqa: SLF001
+        return metric
+
+
+class Counter(Metric):
+    """Monotonically increasing metric, e.g. the number of processed rows."""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:  # noqa: ANN401
+        """Increase the counter of the label values by the amount."""
+        self._add(self._get_key(labels), amount)
+
+    def _add(self, key: tuple[str, ...], value: float) -> None:
+        """Add the value to the counter of the label values."""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. request latency, in cumulative buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the histogram.
+
+        :param buckets: Upper bounds of the buckets.
+        """
+        super().__init__(name, documentation, label_names)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels: Any) -> None:  # noqa: ANN401
+        """Observe the value for the label values."""
+        # Bucket counts, followed by the count and the sum of the observed values
+        observation = [int(value <= bound) for bound in self.buckets] + [1, value]
+        self._add(self._get_key(labels), observation)
+
+    def _add(self, key: tuple[str, ...], value: list) -> None:
+        """Add the bucket counts, count and sum to the ones of the label values."""
+        with self._lock:
+            current = self._values.get(key, [0] * (len(self.buckets) + 2))
+            self._values[key] = [a + b for a, b in zip(current, value, strict=True)]
+
+    def _get_samples(self, key: tuple[str, ...], value: list) -> Iterator[tuple[str, list, float]]:
+        """Yield the bucket, count and sum samples of the label values."""
+        labels = list(zip(self.label_names, key, strict=True))
+        for bound, count in zip(self.buckets, value, strict=False):
+            yield "_bucket", [*labels, ("le", bound)], count
+        yield "_bucket", [*labels, ("le", "+Inf")], value[-2]
+        yield "_count", labels, value[-2]
+        yield "_sum", labels, value[-1]
+
+
+class Registry:
+    """Collection of the metrics exposed by the service."""
+
+    def __init__(self, multiprocess_dir: str | Path | None = None) -> None:
+        """Initialize an empty registry.
+
+        :param multiprocess_dir: Directory where the processes of the service share their metrics,
+            or None to expose only the metrics of the current process.
+        """
+        self.metrics: dict[str, Metric] = {}
+        self.multiprocess_dir = Path(multiprocess_dir) if multiprocess_dir else None
+        # Every process writes to its own file, named uniquely so that a restarted worker does not reuse
+        # the file, and the counters, of a stopped worker with the same pid
+        self._file_name = f"{os.getpid()}-{uuid.uuid4().hex}.json"
+        self._flushed_content: str | None = None
+        self._flush_lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+        self._stop_flushing = threading.Event()
+
+    def counter(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Counter:
+        """Register a new counter."""
+        self.metrics[name] = Counter(name, documentation, label_names)
+        return self.metrics[name]
+
+    def histogram(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Histogram:
+        """Register a new histogram."""
+        self.metrics[name] = Histogram(name, documentation, label_names)
+        return self.metrics[name]
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text format, summed over all processes in the multiprocess mode."""
+        metrics = self._collect().values() if self.multiprocess_dir else self.metrics.values()
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def drain(self) -> dict[str, list]:
+        """Return the values of all metrics and reset them, e.g. to send them to another process."""
+        return {name: metric.drain() for name, metric in self.metrics.items()}
+
+    def merge(self, snapshot: dict[str, list]) -> None:
+        """Add the values of the metrics returned by drain."""
+        for name, values in snapshot.items():
+            if name in self.metrics:
+                self.metrics[name].merge(values)
+
+    def flush(self) -> None:
+        """Write the metrics of the process to its file in the multiprocess directory, if they changed."""
+        if not self.multiprocess_dir:
+            return
+        with self._flush_lock:
+            content = json.dumps({name: metric.snapshot() for name, metric in self.metrics.items()})
+            if content == self._flushed_content:
+                return
+            self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+            path = self.multiprocess_dir / self._file_name
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(content)
+            tmp_path.replace(path)
+            self._flushed_content = content
+
+    def start_flushing(self, interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        """Start writing the metrics of the process to the multiprocess directory every interval seconds.
+
+        Called by the processes serving the /metrics endpoint, i.e. the uvicorn workers. Other processes,
+        e.g. the job pool workers, send their metrics to the uvicorn worker with drain and merge instead.
+        """
+        if not self.multiprocess_dir or self._flusher is not None:
+            return
+
+        def flush_periodically() -> None:
+            while not self._stop_flushing.wait(interval):
+                self.flush()
+
+        self._stop_flushing.clear()
+        self._flusher = threading.Thread(target=flush_periodically, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop_flushing(self) -> None:
+        """Stop writing the metrics periodically and write them one last time."""
+        if self._flusher is not None:
+            self._stop_flushing.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _collect(self) -> dict[str, Metric]:
+        """Return the metrics summed over the files of all processes in the multiprocess directory."""
+        self.flush()
+        collected = {name: metric.empty_copy() for name, metric in self.metrics.items()}
+        for path in sorted(self.multiprocess_dir.glob("*.json")):
+            # The file of a process is replaced atomically, but may be removed with its directory
+            with contextlib.suppress(FileNotFoundError):
+                for name, values in json.loads(path.read_text()).items():
+                    if name in collected:
+                        collected[name].merge(values)
+        return collected
+
+
+REGISTRY = Registry(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Latency of the HTTP requests served by the application.",
+    ("method", "route", "status"),
+)
+
+
+async def measure_request(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    """Record the latency of the request per method, route and status code."""
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status_code,
+        )
+    return response
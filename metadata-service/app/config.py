@@ -20,6 +20,24 @@ class Settings(BaseSettings):
     app_name: str = Field(default="My App")
     environment: str = Field(default="local")
     cookie_domain: str = Field(default="localhost")
+    # Seconds before expiry at which cached Databricks access tokens are refreshed
+    databricks_token_refresh_margin: int = Field(default=300)
+    # Directory where Databricks access tokens are shared by worker processes, disabled if empty
+    databricks_token_cache_dir: str = Field(default="")
+    # Maximum number of keep-alive connections to the Databricks server per process
+    databricks_http_pool_size: int = Field(default=10)
+    # Maximum number of retries of Databricks REST API requests failing with a connection error, 429 or 5xx status
+    databricks_http_max_retries: int = Field(default=5)
+    # Base delay (in seconds) of the exponential backoff between retries, unless the server sends Retry-After
+    databricks_http_backoff_factor: float = Field(default=0.5)
+    # Number of connections kept open in the pool of each SQLAlchemy engine
+    sqlalchemy_pool_size: int = Field(default=5)
+    # Number of connections opened above the pool size of each SQLAlchemy engine under load
+    sqlalchemy_max_overflow: int = Field(default=5)
+    # Age (in seconds) after which pooled connections are replaced
+    sqlalchemy_pool_recycle: int = Field(default=1800)
+    # Seconds after which SQLAlchemy engines which were not requested are disposed
+    sqlalchemy_engine_idle_timeout: int = Field(default=900)
     model_config = SettingsConfigDict(
         env_file=".env",
         secrets_dir=os.getenv("SECRETS_MNT_PATH", "secrets"),
@@ -1,21 +1,131 @@
 #!/usr/bin/env python3
 """Functions related to Databricks API."""
 
+from __future__ import annotations
+
 import base64
+import contextlib
+import fcntl
+import hashlib
 import json
-from typing import Any
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
 
 import requests
 from cr8tor.core import schema as cr8_schema
 from fastapi import HTTPException, status
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import config, metrics
 
-from . import config
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 settings = config.get_settings()
 
+# Cached access tokens as {(hostname, spn_clientid): (access_token, expires_at)}
+_token_cache: dict[tuple[str, str], tuple[str, float]] = {}
+# Locks serializing the refresh of each cached access token within the process
+_token_locks: dict[tuple[str, str], threading.Lock] = {}
+_token_locks_guard = threading.Lock()
+
+# Statuses of Databricks REST API responses which are retried with exponential backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Session shared by all Databricks REST API calls of the process
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _get_cached_token(key: tuple[str, str]) -> str | None:
+    """Return the cached access token, unless it expires within the refresh margin."""
+    access_token, expires_at = _token_cache.get(key, ("", 0.0))
+    if access_token and expires_at - settings.databricks_token_refresh_margin > time.time():
+        return access_token
+    return None
+
+
+@contextlib.contextmanager
+def _locked_token_file(key: tuple[str, str]) -> Iterator[Path | None]:
+    """Lock the file sharing the access token with other worker processes.
+
+    Yields None if DATABRICKS_TOKEN_CACHE_DIR is not set.
+    """
+    if not settings.databricks_token_cache_dir:
+        yield None
+        return
+    cache_dir = Path(settings.databricks_token_cache_dir)
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    token_path = cache_dir / f"{hashlib.sha256('|'.join(key).encode()).hexdigest()}.json"
+    with token_path.with_suffix(".lock").open("w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield token_path
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_token_file(token_path: Path) -> tuple[str, float] | None:
+    """Read the access token and its expiry time shared by another worker process."""
+    try:
+        token = json.loads(token_path.read_text())
+        return token["access_token"], float(token["expires_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_token_file(token_path: Path, access_token: str, expires_at: float) -> None:
+    """Atomically write the access token, readable by the service user only."""
+    tmp_path = token_path.with_suffix(f".{os.getpid()}.tmp")
+    with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as tmp_file:
+        json.dump({"access_token": access_token, "expires_at": expires_at}, tmp_file)
+    tmp_path.replace(token_path)
+
 
 def get_access_token(hostname: str, spn_clientid: str, spn_secret: str) -> str:
-    """Retrieve an access token from the Databricks server."""
+    """Retrieve an access token from the Databricks server.
+
+    Tokens are cached per host and service principal and refreshed DATABRICKS_TOKEN_REFRESH_MARGIN
+    seconds before they expire. Concurrent refreshes in the process wait for a single token request.
+    If DATABRICKS_TOKEN_CACHE_DIR is set, the tokens are also shared by all worker processes.
+    """
+    key = (str(hostname).rstrip("/"), spn_clientid)
+    access_token = _get_cached_token(key)
+    if access_token:
+        return access_token
+
+    with _token_locks_guard:
+        token_lock = _token_locks.setdefault(key, threading.Lock())
+    with token_lock:
+        # Another thread may have refreshed the token while waiting for the lock
+        access_token = _get_cached_token(key)
+        if access_token:
+            return access_token
+        with _locked_token_file(key) as token_path:
+            shared_token = _read_token_file(token_path) if token_path else None
+            if shared_token:
+                _token_cache[key] = shared_token
+                access_token = _get_cached_token(key)
+            if not access_token:
+                access_token, expires_in = _request_access_token(hostname, spn_clientid, spn_secret)
+                _token_cache[key] = (access_token, time.time() + expires_in)
+                if token_path:
+                    _write_token_file(token_path, *_token_cache[key])
+    return access_token
+
+
+def _request_access_token(hostname: str, spn_clientid: str, spn_secret: str) -> tuple[str, int]:
+    """Request a new access token from the Databricks server.
+
+    Returns:
+        tuple: The access token and its lifetime in seconds.
+
+    """
     url = f"{hostname}/oidc/v1/token"
     data = {
         "grant_type": "client_credentials",
@@ -28,7 +138,9 @@ def get_access_token(hostname: str, spn_clientid: str, spn_secret: str) -> str:
     ).decode()
 
     # Send the POST request
-    response = requests.post(
+    response = _send_request(
+        get_session(),
+        "POST",
         url,
         headers={
             "Authorization": f"Basic {auth_header}",
@@ -39,17 +151,79 @@ def get_access_token(hostname: str, spn_clientid: str, spn_secret: str) -> str:
     )
 
     # Output the response
-    return response.json()["access_token"]
+    token = response.json()
+    return token["access_token"], int(token.get("expires_in", 0))
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """Create a session keeping up to pool_size connections to the Databricks server alive.
+
+    Requests from more threads than pool_size wait for a free connection, which bounds the
+    number of requests in flight. Idempotent requests failing with a connection error or one of
+    RETRY_STATUSES are retried with exponential backoff, honouring the Retry-After header.
+    """
+    retry = Retry(
+        total=settings.databricks_http_max_retries,
+        backoff_factor=settings.databricks_http_backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
-def handle_restapi_request(
+def get_session() -> requests.Session:
+    """Return the session shared by all Databricks REST API calls of the process."""
+    global _session  # noqa: PLW0603
+    with _session_lock:
+        if _session is None:
+            _session = create_session(settings.databricks_http_pool_size)
+        return _session
+
+
+def _send_request(
+    session: requests.Session,
+    method: str,
+    url: str,
+    **kwargs: Any,  # noqa: ANN401
+) -> requests.Response:
+    """Send the request and record its latency, including the retries."""
+    # The API path without object names, e.g. /api/2.1/unity-catalog/tables
+    endpoint = "/" + "/".join([part for part in urlparse(url).path.split("/") if part][:4])
+    status_code = "error"
+    started = time.perf_counter()
+    try:
+        response = session.request(method, url, **kwargs)
+        status_code = response.status_code
+    finally:
+        metrics.DATABRICKS_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=method,
+            endpoint=endpoint,
+            status=status_code,
+        )
+    return response
+
+
+def handle_restapi_request(  # noqa: PLR0913
     url: str,
     headers: dict,
     params: dict,
     listkey: str = "",
     paginate: bool = False,  # noqa: FBT001, FBT002
+    *,
+    session: requests.Session | None = None,
 ) -> Any:  # noqa: ANN401
-    """Handle the request to the Databricks REST API."""
+    """Handle the request to the Databricks REST API.
+
+    All pages are requested over the given session, e.g. created with create_session, or the
+    session shared by the process.
+    """
+    http = session or get_session()
     all_data = []
     next_page_token = None
 
@@ -57,7 +231,7 @@ def handle_restapi_request(
         if next_page_token and paginate:
             params["page_token"] = next_page_token
 
-        response = requests.get(url, headers=headers, params=params, timeout=120)
+        response = _send_request(http, "GET", url, headers=headers, params=params, timeout=120)
 
         if response.status_code == status.HTTP_200_OK:
             data = response.json()
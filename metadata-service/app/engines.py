@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""Process-wide registry of the SQLAlchemy engines of the service, see cr8tor_publisher_common.engines."""
+
+from cr8tor_publisher_common.engines import EngineRegistry
+
+from . import config
+
+settings = config.get_settings()
+
+_registry = EngineRegistry(settings)
+
+get_engine = _registry.get_engine
+dispose_all = _registry.dispose_all
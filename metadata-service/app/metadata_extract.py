@@ -5,9 +5,9 @@ from typing import Any
 
 from cr8tor.core import schema as cr8_schema
 from fastapi import HTTPException, status
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import inspect
 
-from . import config, databricks
+from . import config, databricks, engines
 
 settings = config.get_settings()
 
@@ -47,11 +47,8 @@ def get_metadata_sqlalchemy(
     log.info("Extracting metadata using SQLAlchemy...")
 
     try:
-        # Create connection string from access.source
-        engine = create_engine(
-            get_source_connection_string(access.source),
-            echo=False,
-        )
+        # Get the shared engine of the source, created from access.source on first use
+        engine = engines.get_engine(get_source_connection_string(access.source))
 
         # Get inspector for database metadata
         inspector = inspect(engine)
@@ -140,10 +137,6 @@ def get_metadata_sqlalchemy(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to extract metadata: {e!s}",
         ) from e
-    finally:
-        # Ensure the engine is disposed of to release resources
-        if "engine" in locals():
-            engine.dispose()
 
 
 def get_source_connection_string(
@@ -1,18 +1,30 @@
 #!/usr/bin/env python3
 """Contains the FastAPI application and its endpoints."""
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 from cr8tor.core import schema as cr8_schema
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from . import auth, config, exception, metadata_extract, schema
+from . import auth, config, engines, exception, metadata_extract, metrics, schema
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Manage resources shared by the application for its whole lifetime."""
+    metrics.REGISTRY.start_flushing()
+    yield
+    engines.dispose_all()
+    metrics.REGISTRY.stop_flushing()
+
 
 app_config: dict[str, Any] = {"title": config.get_settings().app_name}
 
-app = FastAPI(**app_config)
+app = FastAPI(**app_config, lifespan=lifespan)
 
 # Register exception handlers
 app.add_exception_handler(
@@ -25,6 +37,13 @@ app.add_exception_handler(
     StarletteHTTPException,
     exception.starlette_http_exception_handler,
 )
+app.middleware("http")(metrics.measure_request)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(_: auth.AuthDependency) -> Response:
+    """Expose the metrics of the service in the Prometheus text format."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/metadata/project")
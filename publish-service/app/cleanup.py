@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Background removal of staging folders and expiry of abandoned packages.
+
+Removing a package with thousands of rotated files from a network mount takes minutes.
+Folders are therefore discarded by renaming them into a trash folder on the same mount,
+which is immediate, and removed by a background thread.
+
+Packages which are never published stay in staging, and the dlt pipeline folders of jobs
+which died are never dropped. A periodic janitor removes the staging packages and pipeline
+folders which were not modified for PUBLISH_CLEANUP_TTL seconds, and the trash left by
+processes which stopped before emptying it, and the records of the package jobs which
+finished PUBLISH_JOB_TTL seconds ago. The janitor runs in one worker process of one replica
+of the service per PUBLISH_JANITOR_INTERVAL: its lock and the time of its last run are kept
+on the persistent storage shared by all replicas.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import errno
+import fcntl
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import config, metrics
+
+settings = config.get_settings()
+log = config.setup_logger("PublishService Cleanup")
+
+# Name of the trash folder in the staging container and the dlt pipelines folder
+TRASH_FOLDER_NAME = ".trash"
+
+# Trash entries older than this (in seconds) were left by a process which stopped before removing them
+TRASH_ORPHAN_AGE = 3600
+
+CLEANUP_AREA_STAGING = "staging"
+CLEANUP_AREA_PIPELINES = "pipelines"
+
+# Name of the file on the persistent storage locked by the running janitor, holding the time of its last run
+JANITOR_LOCK_NAME = "janitor.lock"
+
+# Environment variables holding the mount paths of the filestore destinations, see utils.get_target_paths
+STORAGE_MOUNT_PATH_ENV_PATTERN = re.compile(r"^TARGET_STORAGE_ACCOUNT_\w+_SDE_MNT_PATH$")
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the thread removing the discarded folders, creating it on first use."""
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cleanup")
+    return _executor
+
+
+def remove_tree(path: Path, area: str) -> int:
+    """Remove the folder and all its content, ignoring the files which cannot be removed.
+
+    Returns:
+        int: The number of bytes reclaimed.
+
+    """
+    reclaimed_bytes = 0
+    for root, folders, files in os.walk(path, topdown=False):
+        for name in files:
+            file_path = Path(root) / name
+            try:
+                size = file_path.lstat().st_size
+                file_path.unlink()
+            except OSError:
+                log.warning("Failed to remove %s", str(file_path))
+                continue
+            reclaimed_bytes += size
+        for name in folders:
+            with contextlib.suppress(OSError):
+                (Path(root) / name).rmdir()
+    with contextlib.suppress(OSError):
+        path.rmdir()
+    metrics.CLEANUP_RECLAIMED_BYTES.inc(reclaimed_bytes, area=area)
+    return reclaimed_bytes
+
+
+def discard(path: Path, trash_path: Path, area: str) -> None:
+    """Remove the folder in the background.
+
+    The folder is renamed into the trash folder first, hence it is gone when the function returns.
+    It is removed at once when the trash folder is on a different filesystem.
+
+    Args:
+        path (Path): The folder to remove.
+        trash_path (Path): The trash folder, on the same filesystem as the folder.
+        area (str): The area of the folder, CLEANUP_AREA_STAGING or CLEANUP_AREA_PIPELINES.
+
+    """
+    if not path.exists():
+        return
+    trash_path.mkdir(parents=True, exist_ok=True)
+    discarded_path = trash_path / f"{int(time.time())}-{uuid.uuid4().hex}-{path.name}"
+    try:
+        path.rename(discarded_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        remove_tree(path, area)
+        return
+    _get_executor().submit(remove_tree, discarded_path, area)
+
+
+def remove_empty_folders(path: Path, stop_path: Path) -> None:
+    """Remove the folder and its parents below stop_path, up to the first folder which is not empty.
+
+    E.g. the package folder left empty in staging after its files were promoted or discarded.
+    """
+    while stop_path in path.parents:
+        try:
+            path.rmdir()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        path = path.parent
+
+
+def _last_modified(path: Path, depth: int) -> float:
+    """Return the latest modification time of the folder and its entries down to the given depth."""
+    last_modified = path.stat().st_mtime
+    if depth > 0 and path.is_dir():
+        for entry in path.iterdir():
+            # Entries may be removed by a running package while they are listed
+            with contextlib.suppress(FileNotFoundError):
+                last_modified = max(last_modified, _last_modified(entry, depth - 1))
+    return last_modified
+
+
+def _purge_trash(trash_path: Path, area: str, now: float) -> None:
+    """Remove the trash entries left by processes which stopped before removing them."""
+    if not trash_path.is_dir():
+        return
+    for entry in trash_path.iterdir():
+        discarded_at, _, _ = entry.name.partition("-")
+        if discarded_at.isdigit() and int(discarded_at) < now - TRASH_ORPHAN_AGE:
+            remove_tree(entry, area)
+
+
+def expire_staging(staging_container: Path, now: float) -> int:
+    """Discard the staging packages which were not modified for PUBLISH_CLEANUP_TTL seconds.
+
+    Returns:
+        int: The number of discarded packages.
+
+    """
+    trash_path = staging_container / TRASH_FOLDER_NAME
+    _purge_trash(trash_path, CLEANUP_AREA_STAGING, now)
+    expired_packages = 0
+    # Staging holds {project_name}/{project_start_time}/data/outputs/ folders, see utils.get_target_paths
+    for project_path in staging_container.iterdir():
+        if project_path.name.startswith(".") or not project_path.is_dir():
+            continue
+        for package_path in project_path.iterdir():
+            # The package files and the checkpoints of running packages are in data/outputs
+            if _last_modified(package_path, depth=3) < now - settings.publish_cleanup_ttl:
+                log.info("Remove staging package %s, not modified for %s seconds", str(package_path), settings.publish_cleanup_ttl)
+                discard(package_path, trash_path, CLEANUP_AREA_STAGING)
+                expired_packages += 1
+        # Project folders left empty by published packages, unless a new package of the project was just created
+        if project_path.stat().st_mtime < now - settings.publish_cleanup_ttl:
+            with contextlib.suppress(OSError):
+                project_path.rmdir()
+    metrics.CLEANUP_EXPIRED_FOLDERS.inc(expired_packages, area=CLEANUP_AREA_STAGING)
+    return expired_packages
+
+
+def expire_pipelines(pipelines_path: Path, now: float) -> int:
+    """Discard the dlt pipeline folders which were not modified for PUBLISH_CLEANUP_TTL seconds.
+
+    Returns:
+        int: The number of discarded pipeline folders.
+
+    """
+    trash_path = pipelines_path / TRASH_FOLDER_NAME
+    _purge_trash(trash_path, CLEANUP_AREA_PIPELINES, now)
+    expired_pipelines = 0
+    for pipeline_path in pipelines_path.iterdir():
+        if pipeline_path.name.startswith(".") or not pipeline_path.is_dir():
+            continue
+        # The load packages of running pipelines are in the folders of the pipeline
+        if _last_modified(pipeline_path, depth=2) < now - settings.publish_cleanup_ttl:
+            log.info("Remove pipeline folder %s, not modified for %s seconds", str(pipeline_path), settings.publish_cleanup_ttl)
+            discard(pipeline_path, trash_path, CLEANUP_AREA_PIPELINES)
+            expired_pipelines += 1
+    metrics.CLEANUP_EXPIRED_FOLDERS.inc(expired_pipelines, area=CLEANUP_AREA_PIPELINES)
+    return expired_pipelines
+
+
+def run_janitor_once() -> None:
+    """Expire the staging packages of all filestore destinations and the dlt pipeline folders.
+
+    Only one worker process of all replicas runs the janitor at a time, and the run is skipped
+    when another process ran it less than PUBLISH_JANITOR_INTERVAL seconds ago.
+    """
+    lock_path = Path(settings.publish_storage_mnt_path) / JANITOR_LOCK_NAME
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a+") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        now = time.time()
+        lock_file.seek(0)
+        try:
+            last_run = float(lock_file.read())
+        except ValueError:
+            last_run = 0
+        if now - last_run < settings.publish_janitor_interval:
+            return
+        lock_file.truncate(0)
+        lock_file.write(str(now))
+        lock_file.flush()
+        for name, value in os.environ.items():
+            if not STORAGE_MOUNT_PATH_ENV_PATTERN.match(name) or not value:
+                continue
+            staging_container = Path(value).resolve() / "staging"
+            if staging_container.is_dir():
+                expire_staging(staging_container, now)
+        pipelines_path = os.getenv("DLTHUB_PIPELINE_WORKING_DIR")
+        if pipelines_path and Path(pipelines_path).is_dir():
+            expire_pipelines(Path(pipelines_path), now)
+        # Imported here as the jobs module imports core, which imports this module
+        from . import jobs  # noqa: PLC0415
+
+        expired_jobs = jobs.JobStore().expire(now)
+        if expired_jobs:
+            log.info("Removed %s package job records, finished more than %s seconds ago", expired_jobs, settings.publish_job_ttl)
+
+
+async def run_janitor() -> None:
+    """Run the janitor every PUBLISH_JANITOR_INTERVAL seconds, until cancelled."""
+    while True:
+        try:
+            await asyncio.to_thread(run_janitor_once)
+        except Exception:
+            log.exception("Janitor run failed")
+        await asyncio.sleep(settings.publish_janitor_interval)
+
+
+def shutdown() -> None:
+    """Stop removing the discarded folders. The folders left in the trash are removed by the janitor."""
+    global _executor  # noqa: PLW0603
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
@@ -10,7 +10,7 @@ from typing import Annotated
 
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
-from pydantic import Field, SecretStr
+from pydantic import Field, SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 load_dotenv()
@@ -23,12 +23,98 @@ class Settings(BaseSettings):
     app_name: str = Field(default="My App")
     environment: str = Field(default="local")
     cookie_domain: str = Field(default="localhost")
+    # Mount path of the persistent storage shared by all replicas of the service, holding the state of the service
+    publish_storage_mnt_path: str = Field(default="/home/appuser/storage")
+    # Maximum number of package jobs running concurrently in the pod
+    publish_job_max_workers: int = Field(default=2)
+    # Directory where package job records are persisted, defaults to the jobs folder of the persistent storage
+    publish_jobs_dir: str = Field(default="")
+    # Seconds after which the records of finished package jobs are removed by the janitor
+    publish_job_ttl: int = Field(default=60 * 60 * 24 * 7)
+    # Maximum number of tables extracted in parallel from a single source connection
+    publish_table_workers_per_source: int = Field(default=4)
+    # Maximum number of tables extracted in parallel in the pod, shared by all package jobs
+    publish_table_workers_per_pod: int = Field(default=8)
+    # Maximum number of table metadata requests in flight to the Databricks REST API
+    publish_metadata_fetch_workers: int = Field(default=16)
+    # Seconds before expiry at which cached Databricks access tokens are refreshed
+    databricks_token_refresh_margin: int = Field(default=300)
+    # Directory where Databricks access tokens are shared by worker processes, disabled if empty
+    databricks_token_cache_dir: str = Field(default="")
+    # Maximum number of keep-alive connections to the Databricks server per process
+    databricks_http_pool_size: int = Field(default=10)
+    # Maximum number of retries of Databricks REST API requests failing with a connection error, 429 or 5xx status
+    databricks_http_max_retries: int = Field(default=5)
+    # Base delay (in seconds) of the exponential backoff between retries, unless the server sends Retry-After
+    databricks_http_backoff_factor: float = Field(default=0.5)
+    # Number of connections kept open in the pool of each SQLAlchemy engine
+    sqlalchemy_pool_size: int = Field(default=5)
+    # Number of connections opened above the pool size of each SQLAlchemy engine under load
+    sqlalchemy_max_overflow: int = Field(default=5)
+    # Age (in seconds) after which pooled connections are replaced
+    sqlalchemy_pool_recycle: int = Field(default=1800)
+    # Seconds after which SQLAlchemy engines which were not requested are disposed
+    sqlalchemy_engine_idle_timeout: int = Field(default=900)
+    # Tables with more estimated rows are split into key ranges read in parallel
+    publish_partition_rows_per_range: int = Field(default=10_000_000)
+    # Maximum number of key ranges a single table is split into
+    publish_partition_max_ranges: int = Field(default=8)
+    # Directory where the high-water marks of incremental package requests are persisted, defaults to the
+    # state folder of the persistent storage
+    publish_state_dir: str = Field(default="")
+    # Target size (in bytes) of the chunks of rows read from the source
+    publish_plan_chunk_bytes: int = Field(default=1024 * 1024 * 64)
+    # Tables with more estimated rows are read with the pyarrow backend, when the backend engine is "auto"
+    publish_plan_pyarrow_min_rows: int = Field(default=100_000)
+    # Compression codec of parquet files (zstd, snappy, gzip, lz4 or none)
+    publish_parquet_compression: str = Field(default="zstd")
+    # Target size (in bytes) of the row groups of parquet files
+    publish_parquet_row_group_bytes: int = Field(default=1024 * 1024 * 128)
+    # Maximum number of files hashed in parallel when publishing to a filestore destination
+    publish_checksum_workers: int = Field(default=4)
+    # Size (in bytes) of the blocks read from the published files when calculating their checksums
+    publish_checksum_block_bytes: int = Field(default=1024 * 1024 * 8)
+    # Maximum number of files moved in parallel from staging to production, when the staging folder cannot be renamed
+    publish_move_workers: int = Field(default=8)
+    # Maximum total size (in bytes) of the files copied in parallel when staging and production are different filesystems
+    publish_copy_max_bytes_in_flight: int = Field(default=1024 * 1024 * 1024 * 4)
+    # Size (in bytes) of the chunks copied at once, the granularity of resuming the copy of a file
+    publish_copy_chunk_bytes: int = Field(default=1024 * 1024 * 64)
+    # Seconds after which staging packages and dlt pipeline folders which were not modified are removed
+    publish_cleanup_ttl: int = Field(default=60 * 60 * 24 * 7)
+    # Interval (in seconds) between the runs of the janitor removing expired staging packages and pipeline folders
+    publish_janitor_interval: int = Field(default=60 * 60)
+    # Read all published files to verify their checksums, rather than trusting the package manifest
+    publish_checksum_verify: bool = Field(default=False)
+    # Maximum number of Opal project resources created or updated in parallel on publish to PostgreSQL
+    publish_opal_workers: int = Field(default=8)
+    # Seconds for which the Opal DataSHIELD group permissions are cached
+    opal_lookup_cache_ttl: int = Field(default=60)
+    # Create the primary keys and indexes of the tables loaded into PostgreSQL and collect their statistics
+    publish_postgresql_optimize: bool = Field(default=False)
+    # Cluster the tables loaded into PostgreSQL on their primary key, when they are optimised
+    publish_postgresql_cluster: bool = Field(default=False)
+    # Fillfactor of the tables loaded into PostgreSQL and their indexes, 100 for read-only data
+    publish_postgresql_fillfactor: int = Field(default=100)
+    # Maximum number of tables optimised in parallel, i.e. of destination connections
+    publish_postgresql_optimize_workers: int = Field(default=4)
+    # Loader of the PostgreSQL destination: insert (INSERT statements) or copy (COPY FROM STDIN into UNLOGGED tables)
+    publish_postgresql_loader: str = Field(default="insert")
+    # Maximum number of files loaded in parallel into PostgreSQL, i.e. of destination connections of a package job
+    publish_postgresql_load_workers: int = Field(default=8)
     model_config = SettingsConfigDict(
         env_file=".env",
         secrets_dir=os.getenv("SECRETS_MNT_PATH", "secrets"),
         extra="ignore",
     )
 
+    @model_validator(mode="after")
+    def set_storage_dirs(self) -> "Settings":
+        """Place the directories which are not set on the persistent storage."""
+        self.publish_state_dir = self.publish_state_dir or str(Path(self.publish_storage_mnt_path) / "state")
+        self.publish_jobs_dir = self.publish_jobs_dir or str(Path(self.publish_storage_mnt_path) / "jobs")
+        return self
+
     @classmethod
     def get_secret(cls, secret_name: str) -> SecretStr:
         """Dynamically retrieve the content of a secret."""
@@ -3,22 +3,89 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
+import math
 import os
 import re
 import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import dlt
+import pyarrow.parquet as pq
 import sqlalchemy.types as sqltypes
 from cr8tor.core import schema as cr8_schema  # noqa: TC002
-from dlt.sources.sql_database import sql_database
-from sqlalchemy import Column, MetaData, Table, create_engine, text
-
-from . import config, databricks, utils
+from dlt.common.data_writers.writers import ParquetDataWriter
+from dlt.sources.sql_database import sql_table
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Table,
+    and_,
+    bindparam,
+    func,
+    or_,
+    select,
+    text,
+)
+
+from . import (
+    cleanup,
+    config,
+    databricks,
+    engines,
+    incremental,
+    manifest,
+    metrics,
+    postgres,
+    utils,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import pyarrow as pa
+    import requests
+    from dlt.common.pipeline import LoadInfo, StepInfo
+    from dlt.extract import DltResource
+    from dlt.sources import incremental as dlt_incremental
+    from sqlalchemy.sql.elements import ColumnElement
 
 settings = config.get_settings()
 
+# dlt version whose ParquetDataWriter._create_writer is mirrored by _create_parquet_writer
+PARQUET_WRITER_DLT_VERSION = "1.5."
+
+
+def _create_parquet_writer(self: ParquetDataWriter, schema: pa.Schema) -> pq.ParquetWriter:
+    """Create the pyarrow parquet writer of dlt with the compression codec set in PUBLISH_PARQUET_COMPRESSION.
+
+    dlt (1.5) does not expose the compression codec of parquet files in its configuration and always
+    writes them with the pyarrow default (snappy). Otherwise, it mirrors ParquetDataWriter._create_writer.
+    """
+    return pq.ParquetWriter(
+        self._f,
+        schema,
+        flavor=self.parquet_flavor,
+        version=self.parquet_version,
+        data_page_size=self.parquet_data_page_size,
+        coerce_timestamps=self.coerce_timestamps,
+        allow_truncated_timestamps=self.allow_truncated_timestamps,
+        compression=settings.publish_parquet_compression,
+    )
+
+
+# The writer is replaced once for the whole process, and only for the dlt version it mirrors: the
+# arguments of the writer may change in other versions, which write parquet files with their default codec.
+PARQUET_COMPRESSION_SUPPORTED = dlt.__version__.startswith(PARQUET_WRITER_DLT_VERSION)
+if PARQUET_COMPRESSION_SUPPORTED:
+    ParquetDataWriter._create_writer = _create_parquet_writer  # noqa: SLF001
+
 
 class DLTDataRetriever:
     """Class for retrieving data using DLT."""
@@ -27,14 +94,17 @@ class DLTDataRetriever:
         self,
         access_payload: cr8_schema.DataContractTransferRequest,
         log: config.logging.Logger,
+        progress_callback: Callable[..., None] | None = None,
     ) -> None:
         """Initialize the DLTDataRetriever instance.
 
         :param access_payload: Data access contract containing source and destination details.
         :param log: Logger instance for logging.
+        :param progress_callback: Optional callable notified with the current stage and its details.
         """
         self.log = log
         self.access_payload = access_payload
+        self.progress_callback = progress_callback
 
         self.dataset = getattr(self.access_payload, "dataset", None)
 
@@ -42,6 +112,16 @@ class DLTDataRetriever:
         self.project_start_time = access_payload.project_start_time
         self.extract_config = getattr(access_payload, "extract_config", None)
 
+        # In the incremental mode, tables with a cursor column are read from their high-water mark
+        self.extract_mode = str(
+            getattr(self.extract_config, "mode", None) or utils.EXTRACT_MODE_FULL,
+        ).lower()
+        if self.extract_mode not in utils.EXPECTED_EXTRACT_MODES:
+            msg = f"Invalid extract mode: {self.extract_mode}. Expected one of {utils.EXPECTED_EXTRACT_MODES}"
+            raise ValueError(msg)
+        # Full rebuild on request, ignoring the high-water marks
+        self.full_refresh = bool(getattr(self.extract_config, "full_refresh", False))
+
         self.destination = access_payload.destination
         self.destination.type = access_payload.destination.type.lower()
         self.destination.format = access_payload.destination.format.lower()
@@ -56,8 +136,37 @@ class DLTDataRetriever:
                 self.source.type = "mssql"
 
         self.staging_target_path = None
+        self.pipeline = None
+        # Table size estimates: {"table_name": {"row_count": int | None, "total_bytes": int | None}}
+        self.table_statistics = {}
+        # Write disposition of each table: {"table_name": "replace" | "append" | "merge"}
+        self.write_dispositions = {}
+        # Cursor column of each incremental resource: {"resource_name": ("table_name", "cursor_column")}
+        self.incremental_resources = {}
+        # High-water marks loaded for the incremental mode, see incremental.HighWaterMarkStore
+        self.high_water_marks = {}
+        # Tables finished by a previous attempt of the same request: {"table_name": {<checkpoint>}}
+        self.checkpoints = {}
+        # Trash folder of the staging container of filestore destinations, see cleanup.py
+        self.staging_trash_path = None
+        # Extraction plan of each table, see _plan_table_extract
+        self.extract_plan = {}
+        # Keys of each table created in the PostgreSQL destination: {"table_name": {"primary_key": [...], "indexes": [[...]]}}
+        self.table_keys = {}
+        # Values of the environment variables set for the job before it changed them, see _set_job_env_var
+        self.original_env_vars = {}
         self._set_env_vars()  # Ensure environment variables are set
 
+    def _report_progress(self, stage: str, **details: object) -> None:
+        """Notify the progress callback, if any, about the current stage."""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, **details)
+        except Exception:
+            # Progress reporting must never fail the package itself
+            self.log.exception("Failed to report progress for stage %s", stage)
+
     def _set_env_vars(self) -> None:
         """Set environment variables for the pipeline configuration."""
         # Optimisations
@@ -79,14 +188,38 @@ class DLTDataRetriever:
         # Disable default gzip compression for data writing (applicable to csv files)
         os.environ["DATA_WRITER__DISABLE_COMPRESSION"] = "True"
 
+        # High-water marks of incremental tables are kept by the service (see incremental.py),
+        # do not restore the pipeline state from the destination.
+        os.environ["RESTORE_FROM_DESTINATION"] = "False"
+
+        # See https://dlthub.com/docs/reference/performance#extract
+        # Each table resource keeps its source connection open until it is exhausted.
+        # With "fifo" mode and max parallel items equal to workers, a new table is started only when
+        # the previously started (larger) tables are busy, so at most 'workers' connections are open.
+        # The number of workers is set per job, see _configure_extract_concurrency.
+        os.environ["EXTRACT__NEXT_ITEM_MODE"] = "fifo"
+
+    def _set_job_env_var(self, name: str, value: str) -> None:
+        """Set the environment variable configuring dlt for this job only, see restore_env_vars."""
+        self.original_env_vars.setdefault(name, os.environ.get(name))
+        os.environ[name] = value
+
+    def restore_env_vars(self) -> None:
+        """Restore the environment variables set for the job, which would apply to the next job of the process."""
+        for name, value in self.original_env_vars.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self.original_env_vars = {}
+
     def _clear_staging_directory(self) -> None:
         """Clear the staging directory before proceeding."""
         if self.destination.type != "filestore":
             return
         self.log.info("Clear staging directory...")
         try:
-            if Path.exists(self.staging_target_path):
-                shutil.rmtree(self.staging_target_path)
+            cleanup.discard(self.staging_target_path, self.staging_trash_path, cleanup.CLEANUP_AREA_STAGING)
         except OSError as e:
             msg = f"Failure clearing staging directory: {e}"
             self.log.exception(msg)
@@ -143,13 +276,21 @@ class DLTDataRetriever:
         """Create SQLAlchemy engine."""
         self.log.info("Creating SQLAlchemy engine...")
         try:
-            self.engine = create_engine(self.connection_string)
+            self.engine = engines.get_engine(self.connection_string)
         except Exception as e:
             msg = f"Failed to create SQLAlchemy engine: {e}"
             raise RuntimeError(msg) from e
 
-    def _get_table_metadata(self, table_name: str) -> tuple:
-        """Fetch table metadata."""
+    def _get_table_metadata(
+        self,
+        table_name: str,
+        session: requests.Session | None = None,
+    ) -> tuple:
+        """Fetch table metadata.
+
+        :param table_name: Name of the table.
+        :param session: Pooled session used for the Databricks REST API requests.
+        """
         if self.source.type == "databrickssql":
             url = (
                 f"{self.source.host_url}/api/2.1/unity-catalog/tables/"
@@ -161,6 +302,7 @@ class DLTDataRetriever:
                 url,
                 headers,
                 params={"include_browse": True},
+                session=session,
             )
             columns_dict = {
                 col["name"]: {
@@ -188,6 +330,13 @@ class DLTDataRetriever:
                 if primary_key_constraint
                 else []
             )
+
+            # Keep the table statistics, if they were computed in Databricks (ANALYZE TABLE)
+            properties = table_data.get("properties") or {}
+            self.table_statistics[table_name] = {
+                "row_count": utils.parse_int(properties.get("spark.sql.statistics.numRows")),
+                "total_bytes": utils.parse_int(properties.get("spark.sql.statistics.totalSize")),
+            }
             return columns_dict, primary_key_list
         if self.source.type in ["mssql", "mysql", "postgresql"]:
             schema_name = self.dataset.schema_name
@@ -223,6 +372,7 @@ class DLTDataRetriever:
                     JOIN information_schema.key_column_usage kcu
                     ON tc.constraint_name = kcu.constraint_name
                     AND tc.table_schema = kcu.table_schema
+                    AND tc.table_name = kcu.table_name
                     WHERE tc.constraint_type = 'PRIMARY KEY'
                     AND tc.table_schema = :schema
                     AND tc.table_name = :table
@@ -235,6 +385,96 @@ class DLTDataRetriever:
 
         return columns_dict, primary_key_list
 
+    def _get_tables_metadata(self, table_names: list[str]) -> dict[str, tuple]:
+        """Fetch the metadata of all requested tables.
+
+        For SQL sources, columns and primary keys of all tables are read with one query each.
+        If the bulk lookup fails, the metadata is fetched table by table with _get_table_metadata.
+
+        Returns:
+            dict: {"table_name": (columns_dict, primary_key_list)}
+
+        """
+        if not table_names:
+            return {}
+        if self.source.type == "databrickssql":
+            return self._get_databricks_tables_metadata(table_names)
+        if self.source.type not in ["mssql", "mysql", "postgresql"]:
+            return {table_name: self._get_table_metadata(table_name) for table_name in table_names}
+
+        tables_metadata = {table_name: ({}, []) for table_name in table_names}
+        data_type_column = "udt_name" if self.source.type == "postgresql" else "data_type"
+        column_query = text(f"""
+            SELECT table_name AS table_name, column_name AS column_name,
+                {data_type_column} AS data_type, is_nullable AS is_nullable
+            FROM information_schema.columns
+            WHERE table_schema = :schema AND table_name IN :tables
+            ORDER BY table_name, ordinal_position
+        """).bindparams(bindparam("tables", expanding=True))  # noqa: S608
+        pk_query = text("""
+            SELECT tc.table_name AS table_name, kcu.column_name AS column_name
+            FROM information_schema.table_constraints tc
+            JOIN information_schema.key_column_usage kcu
+            ON tc.constraint_name = kcu.constraint_name
+            AND tc.table_schema = kcu.table_schema
+            AND tc.table_name = kcu.table_name
+            WHERE tc.constraint_type = 'PRIMARY KEY'
+            AND tc.table_schema = :schema
+            AND tc.table_name IN :tables
+            ORDER BY tc.table_name, kcu.ordinal_position
+        """).bindparams(bindparam("tables", expanding=True))
+        params = {"schema": self.dataset.schema_name, "tables": list(table_names)}
+        try:
+            with self.engine.connect() as conn:
+                for row in conn.execute(column_query, params):
+                    tables_metadata[row.table_name][0][row.column_name] = {
+                        "data_type": row.data_type,
+                        "is_nullable": row.is_nullable == "YES",
+                    }
+                for row in conn.execute(pk_query, params):
+                    tables_metadata[row.table_name][1].append(row.column_name)
+        except Exception as e:  # noqa: BLE001
+            self.log.warning("Bulk table metadata lookup failed, falling back to per table queries: %s", e)
+            return {table_name: self._get_table_metadata(table_name) for table_name in table_names}
+        return tables_metadata
+
+    def _get_databricks_tables_metadata(self, table_names: list[str]) -> dict[str, tuple]:
+        """Fetch the Unity Catalog metadata of all requested tables concurrently.
+
+        The requests share a pooled session with at most PUBLISH_METADATA_FETCH_WORKERS connections.
+        Tables which failed are reported together, each with its own error.
+
+        Returns:
+            dict: {"table_name": (columns_dict, primary_key_list)}
+
+        """
+        workers = max(1, min(settings.publish_metadata_fetch_workers, len(table_names)))
+        self.log.info("Fetching metadata of %d tables with %d workers...", len(table_names), workers)
+        tables_metadata = {}
+        errors = {}
+        with (
+            databricks.create_session(workers) as session,
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="table-metadata") as executor,
+        ):
+            futures = {
+                executor.submit(self._get_table_metadata, table_name, session): table_name
+                for table_name in table_names
+            }
+            for future in as_completed(futures):
+                table_name = futures[future]
+                try:
+                    tables_metadata[table_name] = future.result()
+                except Exception as e:  # noqa: BLE001
+                    errors[table_name] = getattr(e, "detail", None) or str(e)
+                    self.log.error("Failed to fetch metadata of table %s: %s", table_name, errors[table_name])  # noqa: TRY400
+
+        if errors:
+            msg = "Failed to fetch metadata of tables: " + "; ".join(
+                f"{table_name}: {errors[table_name]}" for table_name in table_names if table_name in errors
+            )
+            raise RuntimeError(msg)
+        return {table_name: tables_metadata[table_name] for table_name in table_names}
+
     def _generate_sqlalchemy_metadata(self) -> MetaData:
         """Generate SQLAlchemy Metadata."""
         self.log.info("Generating SQLAlchemy Metadata...")
@@ -243,12 +483,14 @@ class DLTDataRetriever:
         )
         metadata_obj = MetaData(schema=self.dataset.schema_name)
 
-        for table_metadata in self.dataset.tables:
+        pending_tables = [table for table in self.dataset.tables if table.name not in self.checkpoints]
+        tables_metadata = self._get_tables_metadata(
+            list(dict.fromkeys(table.name for table in pending_tables)),
+        )
+        for table_metadata in pending_tables:
             # Expected columns_dict structure: {"column_name": {<column details struct, including 'data_type', 'is_nullable'>}}
             # Expected primary_key_list structure: ["column_name1", "column_name2"]
-            columns_dict, primary_key_list = self._get_table_metadata(
-                table_metadata.name,
-            )
+            columns_dict, primary_key_list = tables_metadata[table_metadata.name]
 
             self._generate_sqlalchemy_columns(
                 table_metadata,
@@ -327,6 +569,580 @@ class DLTDataRetriever:
             sqltypes.String,
         )
 
+    def _get_table_statistics(self) -> dict:
+        """Fetch table size estimates from the source catalog statistics.
+
+        Statistics are cheap to read but may be stale or missing, hence they are used only for scheduling.
+        """
+        if self.source.type == "databrickssql":
+            # Collected from the Unity Catalog table properties in _get_table_metadata
+            return self.table_statistics
+
+        requested_tables = {table.name for table in self.dataset.tables}
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(
+                    text(utils.SOURCE_TABLE_STATISTICS_QUERIES[self.source.type]),
+                    {"schema": self.dataset.schema_name},
+                )
+                for row in result:
+                    if row.table_name in requested_tables:
+                        self.table_statistics[row.table_name] = {
+                            "row_count": utils.parse_int(row.row_count),
+                            "total_bytes": utils.parse_int(row.total_bytes),
+                        }
+        except Exception as e:  # noqa: BLE001
+            self.log.warning("Failed to fetch table statistics from source: %s", e)
+        return self.table_statistics
+
+    def _order_tables_by_size(self) -> list[str]:
+        """Order requested tables from the largest to the smallest one.
+
+        Tables without statistics keep their requested order, after the tables with known size.
+        """
+        statistics = self._get_table_statistics()
+        requested_order = list(
+            dict.fromkeys(
+                table.name for table in self.dataset.tables if table.name not in self.checkpoints
+            ),
+        )
+        return sorted(
+            requested_order,
+            key=lambda table_name: (
+                statistics.get(table_name, {}).get("total_bytes") or 0,
+                statistics.get(table_name, {}).get("row_count") or 0,
+            ),
+            reverse=True,
+        )
+
+    def _configure_extract_concurrency(self, tables_count: int) -> int:
+        """Configure the number of tables (or key ranges of tables) extracted in parallel.
+
+        The concurrency is bounded per source connection and per pod. The pod budget is shared by
+        all package jobs which may run concurrently. The workers are passed to the extract of the
+        pipeline, rather than set in the environment of the process running the following jobs.
+        """
+        return max(
+            1,
+            min(
+                settings.publish_table_workers_per_source,
+                settings.publish_table_workers_per_pod // settings.publish_job_max_workers,
+                tables_count,
+            ),
+        )
+
+    def _get_partition_predicates(
+        self,
+        table_metadata: cr8_schema.TableMetadata,
+        table_obj: Table,
+    ) -> list[ColumnElement] | None:
+        """Plan key ranges splitting a large table between parallel readers.
+
+        The table is partitioned on the column chosen in the request ('partition_column') or on the
+        first primary key column. Range boundaries are computed from MIN/MAX of the column and
+        the number of ranges from the catalog row estimate.
+
+        Returns:
+            list | None: One keyset predicate per range, or None if the table is read by a single reader.
+
+        """
+        partition_column = getattr(table_metadata, "partition_column", None)
+        partition_count = getattr(table_metadata, "partition_count", None)
+        row_count = self.table_statistics.get(table_obj.name, {}).get("row_count")
+
+        if not partition_count:
+            if partition_column and not row_count:
+                partition_count = settings.publish_table_workers_per_source
+            elif row_count and row_count > settings.publish_partition_rows_per_range:
+                partition_count = math.ceil(row_count / settings.publish_partition_rows_per_range)
+            else:
+                return None
+            partition_count = min(partition_count, settings.publish_partition_max_ranges)
+        if partition_count < 2:  # noqa: PLR2004
+            return None
+
+        if partition_column:
+            column = table_obj.c.get(partition_column)
+        else:
+            column = next(iter(table_obj.primary_key.columns), None)
+        if column is None or not isinstance(column.type, utils.PARTITION_COLUMN_TYPES):
+            self.log.info(
+                "Table %s has no numeric or date key column to partition on. It will be read by a single reader.",
+                table_obj.name,
+            )
+            return None
+
+        with self.engine.connect() as conn:
+            lower, upper = conn.execute(select(func.min(column), func.max(column))).one()
+        boundaries = utils.split_key_range(lower, upper, partition_count)
+        if not boundaries:
+            return None
+
+        self.log.info(
+            "Table %s split into %s key ranges on column %s",
+            table_obj.name,
+            len(boundaries) + 1,
+            column.name,
+        )
+        # The first range also holds NULL keys and the last one is open ended,
+        # so rows are never lost when the table changes after MIN/MAX were read.
+        predicates = [or_(column < boundaries[0], column.is_(None))]
+        predicates.extend(
+            and_(column >= low, column < high)
+            for low, high in itertools.pairwise(boundaries)
+        )
+        predicates.append(column >= boundaries[-1])
+        return predicates
+
+    def _get_high_water_mark_store(self) -> incremental.HighWaterMarkStore:
+        """Return the store of the high-water marks of the project."""
+        return incremental.HighWaterMarkStore(
+            self.project_name,
+            self.project_start_time,
+            self.destination,
+            self.dataset.schema_name,
+        )
+
+    def _has_previous_output(self, table_name: str) -> bool:
+        """Check whether the previously published output of the table exists."""
+        if self.destination.type != "filestore":
+            # Data is loaded straight into the destination database
+            return True
+        _, production_target_path, _, _, _ = utils.get_target_paths(self.access_payload)
+        if self.destination.format == "duckdb":
+            return (production_target_path / "database.duckdb").exists()
+        return (production_target_path / self._get_table_folder(table_name)).is_dir()
+
+    def _get_incremental(
+        self,
+        table_metadata: cr8_schema.TableMetadata,
+        table_obj: Table,
+    ) -> tuple[Callable[[], dlt_incremental] | None, str]:
+        """Plan the incremental read of the table.
+
+        Tables with a cursor column ('cursor_column' in the request) are read from their high-water mark
+        in the incremental mode and appended, or merged on the primary key, into the previous output.
+        Tables without a high-water mark are read in full and replace the previous output, which also
+        records their first high-water mark.
+
+        Returns:
+            tuple: Factory of the dlt incremental (None if the table has no cursor column) and the write disposition.
+
+        """
+        cursor_column = getattr(table_metadata, "cursor_column", None)
+        if not cursor_column:
+            return None, "replace"
+        if cursor_column not in table_obj.c:
+            msg = f"Cursor column '{cursor_column}' is not requested for the table '{table_metadata.name}'."
+            raise ValueError(msg)
+
+        last_value = None
+        if self.extract_mode == utils.EXTRACT_MODE_INCREMENTAL and not self.full_refresh:
+            mark = self.high_water_marks.get(table_metadata.name)
+            if (
+                mark
+                and mark.get("cursor_column") == cursor_column
+                and self._has_previous_output(table_metadata.name)
+            ):
+                last_value = incremental.decode_cursor_value(mark.get("last_value"))
+            else:
+                self.log.info(
+                    "Table %s has no high-water mark on column %s. It will be read in full.",
+                    table_metadata.name,
+                    cursor_column,
+                )
+
+        if last_value is None:
+            return (
+                lambda: dlt.sources.incremental(cursor_column, on_cursor_value_missing="include"),
+                "replace",
+            )
+
+        self.log.info(
+            "Table %s will be read from %s > %s",
+            table_metadata.name,
+            cursor_column,
+            last_value,
+        )
+        # Merge needs the primary key and is supported only by the SQL destinations
+        supports_merge = self.destination.type == "postgresql" or self.destination.format == "duckdb"
+        write_disposition = "merge" if supports_merge and table_obj.primary_key else "append"
+        return (
+            lambda: dlt.sources.incremental(
+                cursor_column,
+                initial_value=last_value,
+                range_start="open",
+                on_cursor_value_missing="exclude",
+            ),
+            write_disposition,
+        )
+
+    def _get_high_water_marks(self) -> dict:
+        """Return the high-water marks reached by the incremental tables in the current load.
+
+        Tables without a cursor column get a None mark, which removes their previous mark.
+        """
+        sources_state = self.pipeline.state.get("sources", {})
+        last_values = {}
+        for resource_name, (table_name, cursor_column) in self.incremental_resources.items():
+            for source_state in sources_state.values():
+                resource_state = source_state.get("resources", {}).get(resource_name, {})
+                last_value = resource_state.get("incremental", {}).get(cursor_column, {}).get("last_value")
+                # Key ranges of the table are separate resources, keep the highest value
+                if last_value is not None and (
+                    last_values.get(table_name) is None or last_value > last_values[table_name]
+                ):
+                    last_values[table_name] = last_value
+
+        marks = dict.fromkeys(self.write_dispositions)
+        for table_name, cursor_column in dict(self.incremental_resources.values()).items():
+            last_value = last_values.get(table_name)
+            if last_value is None:
+                # Nothing was loaded, keep the previous mark
+                last_value = incremental.decode_cursor_value(
+                    self.high_water_marks.get(table_name, {}).get("last_value"),
+                )
+            marks[table_name] = (
+                {
+                    "cursor_column": cursor_column,
+                    "last_value": incremental.encode_cursor_value(last_value),
+                }
+                if last_value is not None
+                else None
+            )
+        return marks
+
+    def _save_high_water_marks(self) -> None:
+        """Persist the high-water marks reached in the current load.
+
+        For filestore destinations, the marks are kept in the staging folder and committed
+        when the data is published, see publish.py.
+        """
+        marks = self._get_high_water_marks() if self.incremental_resources else dict.fromkeys(self.write_dispositions)
+        if self.destination.type == "filestore":
+            # Tables finished by a previous attempt keep their checkpointed state
+            write_dispositions = {
+                **{name: checkpoint["write_disposition"] for name, checkpoint in self.checkpoints.items()},
+                **self.write_dispositions,
+            }
+            marks = {
+                **{name: checkpoint["high_water_mark"] for name, checkpoint in self.checkpoints.items()},
+                **marks,
+            }
+            incremental.write_package_state(
+                self.staging_target_path,
+                {
+                    "schema_name": self.dataset.schema_name,
+                    # Folders of the tables, under their names normalized by dlt
+                    "table_folders": {name: self._get_table_folder(name).as_posix() for name in write_dispositions},
+                    "write_dispositions": write_dispositions,
+                    "high_water_marks": marks,
+                },
+            )
+        else:
+            self._get_high_water_mark_store().save(marks)
+
+    def _get_request_fingerprint(self) -> str:
+        """Return the fingerprint of the package request, identifying retries of the same request."""
+        request = json.dumps(self.access_payload.model_dump(mode="json"), sort_keys=True)
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def _load_checkpoints(self) -> dict:
+        """Load the checkpoints of the tables finished by a previous, failed attempt of the same request.
+
+        Checkpoints are kept only for filestore destinations, in the staging folder next to the data files.
+        A checkpoint is valid only if all its files are still in staging.
+        """
+        checkpoints_path = self.staging_target_path / utils.CHECKPOINTS_FOLDER
+        if self.destination.type != "filestore" or not checkpoints_path.is_dir():
+            return {}
+        try:
+            request = json.loads((checkpoints_path / utils.CHECKPOINTS_REQUEST_FILE_NAME).read_text())
+        except (OSError, ValueError):
+            return {}
+        if request.get("fingerprint") != self._get_request_fingerprint():
+            self.log.info("Staging holds checkpoints of a different request. They are discarded.")
+            return {}
+
+        checkpoints = {}
+        for checkpoint_file in checkpoints_path.glob("*.json"):
+            if checkpoint_file.name == utils.CHECKPOINTS_REQUEST_FILE_NAME:
+                continue
+            checkpoint = json.loads(checkpoint_file.read_text())
+            if all((self.staging_target_path / file).exists() for file in checkpoint["files"]):
+                checkpoints[checkpoint["table_name"]] = checkpoint
+        return checkpoints
+
+    def _prepare_staging_directory(self) -> None:
+        """Prepare the staging directory, resuming the tables finished by a previous attempt."""
+        self.checkpoints = self._load_checkpoints()
+        if not self.checkpoints:
+            self._clear_staging_directory()
+            if self.destination.type == "filestore":
+                checkpoints_path = self.staging_target_path / utils.CHECKPOINTS_FOLDER
+                checkpoints_path.mkdir(parents=True, exist_ok=True)
+                (checkpoints_path / utils.CHECKPOINTS_REQUEST_FILE_NAME).write_text(
+                    json.dumps({"fingerprint": self._get_request_fingerprint()}),
+                )
+            return
+
+        self.log.info(
+            "Resuming package. Skipping %s tables finished by a previous attempt: %s",
+            len(self.checkpoints),
+            ", ".join(self.checkpoints),
+        )
+        if self.destination.format in utils.FILESTORE_FILE_FORMATS:
+            # Remove partial files of the unfinished tables
+            for table in self.dataset.tables:
+                table_path = self.staging_target_path / self._get_table_folder(table.name)
+                if table.name not in self.checkpoints and table_path.is_dir():
+                    cleanup.discard(table_path, self.staging_trash_path, cleanup.CLEANUP_AREA_STAGING)
+
+    def _get_table_folder(self, table_name: str) -> Path:
+        """Return the folder of the table files, relative to the staging or production folder of the package.
+
+        dlt writes the files under the dataset and table names normalized by the naming convention
+        of its schema, e.g. the table PatientData of the schema Main is written to main/patient_data.
+        """
+        naming = (
+            self.pipeline.default_schema.naming
+            if self.pipeline is not None
+            else dlt.Schema(self.dataset.schema_name).naming
+        )
+        return Path(
+            naming.normalize_table_identifier(self.dataset.schema_name),
+            naming.normalize_table_identifier(table_name),
+        )
+
+    def _save_checkpoints(self, table_names: list[str], row_counts: dict) -> None:
+        """Record the completion of the loaded tables in the staging folder.
+
+        The checksums of the table files are calculated right after they are written, see manifest.py.
+        """
+        if self.destination.type != "filestore":
+            return
+        marks = self._get_high_water_marks() if self.incremental_resources else {}
+        for table_name in table_names:
+            if self.destination.format == "duckdb":
+                # The database file is written by every batch, it is hashed once the package is complete
+                files = [self.staging_target_path / "database.duckdb"]
+                total_bytes = None
+                files_entries = {}
+            else:
+                files = sorted((self.staging_target_path / self._get_table_folder(table_name)).glob("*"))
+                total_bytes = sum(file.stat().st_size for file in files)
+                files_entries = {
+                    relative_path: {"table_name": table_name, "part": part, **entry}
+                    for part, (relative_path, entry) in enumerate(
+                        manifest.describe_files(files, self.staging_target_path).items(),
+                    )
+                }
+            checkpoint = {
+                "table_name": table_name,
+                "rows": row_counts.get(table_name),
+                "bytes": total_bytes,
+                "files": [str(file.relative_to(self.staging_target_path)) for file in files],
+                "checksums": files_entries,
+                "write_disposition": self.write_dispositions[table_name],
+                "high_water_mark": marks.get(table_name),
+            }
+            (self.staging_target_path / utils.CHECKPOINTS_FOLDER / f"{table_name}.json").write_text(
+                json.dumps(checkpoint, indent=2),
+            )
+
+    def _write_manifest(self) -> dict[str, dict]:
+        """Write the manifest of the package files to the staging folder, from the checkpoints of the tables.
+
+        Returns:
+            dict: The file entries of the manifest, in the order of the tables in the dataset.
+
+        """
+        files_entries = {}
+        checkpoints = {
+            checkpoint_file.stem: json.loads(checkpoint_file.read_text())
+            for checkpoint_file in (self.staging_target_path / utils.CHECKPOINTS_FOLDER).glob("*.json")
+            if checkpoint_file.name != utils.CHECKPOINTS_REQUEST_FILE_NAME
+        }
+        for table in self.dataset.tables:
+            files_entries.update(checkpoints.get(table.name, {}).get("checksums", {}))
+        if self.destination.format == "duckdb":
+            files_entries.update(
+                {
+                    relative_path: {"table_name": None, "part": 0, **entry}
+                    for relative_path, entry in manifest.describe_files(
+                        [self.staging_target_path / "database.duckdb"],
+                        self.staging_target_path,
+                    ).items()
+                },
+            )
+        manifest.write_manifest(self.staging_target_path, files_entries)
+        return files_entries
+
+    def _plan_load_batches(self, resources_by_table: dict[str, list[DltResource]]) -> list[tuple[list, list]]:
+        """Group the tables into batches, each extracted, normalized and loaded as a whole.
+
+        Tables of a batch are checkpointed once the batch is loaded. A batch holds at least twice as many
+        resources as the extract workers (unless it is the last one), so the workers are kept busy while
+        the tables of the batch of different sizes are extracted.
+
+        Returns:
+            list: (table names, resources) of each batch, in the extract order.
+
+        """
+        batches = []
+        table_names, resources = [], []
+        for table_name, table_resources in resources_by_table.items():
+            table_names.append(table_name)
+            resources.extend(table_resources)
+            if len(resources) >= 2 * self.extract_workers:
+                batches.append((table_names, resources))
+                table_names, resources = [], []
+        if table_names:
+            batches.append((table_names, resources))
+        return batches
+
+    def _plan_table_extract(self, table_obj: Table) -> dict:
+        """Plan the extraction of the table based on its estimated size.
+
+        The average row width is estimated from the column types. The chunk size targets
+        PUBLISH_PLAN_CHUNK_BYTES per chunk and the rotated files are sized so that a large table is
+        written to about PLAN_FILES_PER_TABLE files. With the "auto" backend engine, large tables are
+        read with the pyarrow backend and small ones with the sqlalchemy backend. Parquet row groups
+        target PUBLISH_PARQUET_ROW_GROUP_BYTES.
+
+        Returns:
+            dict: The plan of the table.
+
+        """
+        row_count = self.table_statistics.get(table_obj.name, {}).get("row_count")
+        row_width = utils.estimate_row_width(table_obj.columns)
+        estimated_bytes = row_count * row_width if row_count is not None else None
+
+        backend = self.extract_config.backend_engine.lower()
+        if backend == utils.BACKEND_ENGINE_AUTO:
+            backend = (
+                "pyarrow"
+                if row_count is None or row_count >= settings.publish_plan_pyarrow_min_rows
+                else "sqlalchemy"
+            )
+
+        chunk_size = min(
+            max(settings.publish_plan_chunk_bytes // row_width, utils.PLAN_CHUNK_SIZE_MIN),
+            utils.PLAN_CHUNK_SIZE_MAX,
+        )
+        file_max_bytes = min(
+            max((estimated_bytes or 0) // utils.PLAN_FILES_PER_TABLE, utils.PLAN_FILE_MAX_BYTES_MIN),
+            utils.PLAN_FILE_MAX_BYTES_MAX,
+        )
+        plan = {
+            "row_count": row_count,
+            "row_width": row_width,
+            "estimated_bytes": estimated_bytes,
+            "backend": backend,
+            "chunk_size": chunk_size,
+            "file_max_bytes": file_max_bytes,
+            "partitions": 1,
+        }
+        if self.destination.format == "parquet":
+            plan["row_group_size"] = min(
+                max(settings.publish_parquet_row_group_bytes // row_width, utils.PLAN_CHUNK_SIZE_MIN),
+                utils.PLAN_CHUNK_SIZE_MAX,
+            )
+        return plan
+
+    def _get_table_indexes(self, table_metadata: cr8_schema.TableMetadata, table_obj: Table) -> list[list[str]]:
+        """Return the columns of the indexes declared for the table ('indexes' in the request).
+
+        Each index is a column name or a list of column names.
+        """
+        indexes = [
+            [index] if isinstance(index, str) else list(index)
+            for index in getattr(table_metadata, "indexes", None) or []
+        ]
+        for columns in indexes:
+            missing_columns = [column for column in columns if column not in table_obj.c]
+            if not columns or missing_columns:
+                msg = f"Index columns {missing_columns or columns} are not requested for the table '{table_metadata.name}'."
+                raise ValueError(msg)
+        return indexes
+
+    def _get_table_file_format(self, table_obj: Table) -> str | None:
+        """Return the loader file format of the table, or None for the file format of the pipeline.
+
+        The copy loader of the PostgreSQL destination writes the tables to csv files, which cannot hold
+        binary values that are not valid UTF-8. Tables with binary columns are loaded with INSERT statements.
+        """
+        if (
+            self.destination.type == "postgresql"
+            and settings.publish_postgresql_loader.lower() == postgres.LOADER_COPY
+            and postgres.has_binary_columns(table_obj)
+        ):
+            self.log.info("Table %s has binary columns, it is loaded with INSERT statements", table_obj.name)
+            return postgres.BINARY_TABLE_FILE_FORMAT
+        return None
+
+    def _create_table_resources(
+        self,
+        table_metadata: cr8_schema.TableMetadata,
+        metadata_obj: MetaData,
+    ) -> list[DltResource]:
+        """Create the DLT resources reading the table, one per key range."""
+        table_obj = metadata_obj.tables[f"{self.dataset.schema_name}.{table_metadata.name}"]
+
+        incremental_factory, write_disposition = self._get_incremental(table_metadata, table_obj)
+        self.write_dispositions[table_metadata.name] = write_disposition
+        plan = self._plan_table_extract(table_obj)
+        self.extract_plan[table_metadata.name] = plan
+        self.table_keys[table_metadata.name] = {
+            "primary_key": [column.name for column in table_obj.primary_key.columns],
+            "indexes": self._get_table_indexes(table_metadata, table_obj),
+        }
+
+        hints = {"write_disposition": write_disposition, "file_format": self._get_table_file_format(table_obj)}
+
+        def create_resource(query_adapter_callback: Callable | None = None) -> DltResource:
+            return sql_table(
+                self.engine,
+                table=table_metadata.name,
+                schema=self.dataset.schema_name,
+                metadata=metadata_obj,
+                chunk_size=plan["chunk_size"],
+                reflection_level="full_with_precision",
+                # DLT docs https://dlthub.com/docs/dlt-ecosystem/verified-sources/sql_database/configuration#configuring-the-backend :
+                #  - sqlalchemy, default backend, but it is the slowest and recommended for smaller tables
+                #       *) With SQLAlchemy, we have extra columns _dlt_load_id and _dlt_id.
+                #  - pyarrow is faster and recommended for larger tables
+                #       *) With PYARROW, if a column has only nulls, it is dropped unless we provide sqlAlchemy custom MetaData object
+                #  - pandas is not recommended if tables contain date, time or decimal columns. What is more, all types are nullable with Pandas backend
+                #  - "auto" lets the planner choose the backend for each table, see _plan_table_extract
+                backend=plan["backend"],
+                backend_kwargs={"tz": "UTC"},
+                query_adapter_callback=query_adapter_callback,
+                # Each resource needs its own incremental instance
+                incremental=incremental_factory() if incremental_factory else None,
+            )
+
+        predicates = self._get_partition_predicates(table_metadata, table_obj)
+        plan["partitions"] = len(predicates) if predicates else 1
+        if not predicates:
+            resources = [create_resource().apply_hints(**hints)]
+        else:
+            # Each key range is a separate resource, loaded into the same destination table
+            resources = [
+                create_resource(
+                    lambda query, _table, predicate=predicate: query.where(predicate),
+                )
+                .with_name(f"{table_metadata.name}__part{index}")
+                .apply_hints(table_name=table_metadata.name, **hints)
+                for index, predicate in enumerate(predicates)
+            ]
+        if incremental_factory:
+            cursor_column = getattr(table_metadata, "cursor_column", None)
+            self.incremental_resources.update(
+                {resource.name: (table_metadata.name, cursor_column) for resource in resources},
+            )
+        return resources
+
     def _initialize_dlt_source(self) -> None:
         """Initialize the DLT source."""
         self._get_source_connection_string()
@@ -335,23 +1151,41 @@ class DLTDataRetriever:
         # Generate SQLAlchemy Metadata
         metadata_obj = self._generate_sqlalchemy_metadata()
 
-        # Create SQLAlchemy source object
-        self.source = sql_database(
-            self.engine,
-            chunk_size=200000,
-            schema=self.dataset.schema_name,
-            table_names=self.requested_tables,
-            metadata=metadata_obj,
-            reflection_level="full_with_precision",
-            # DLT docs https://dlthub.com/docs/dlt-ecosystem/verified-sources/sql_database/configuration#configuring-the-backend :
-            #  - sqlalchemy, default backend, but it is the slowest and recommended for smaller tables
-            #       *) With SQLAlchemy, we have extra columns _dlt_load_id and _dlt_id.
-            #  - pyarrow is faster and recommended for larger tables
-            #       *) With PYARROW, if a column has only nulls, it is dropped unless we provide sqlAlchemy custom MetaData object
-            #  - pandas is not recommended if tables contain date, time or decimal columns. What is more, all types are nullable with Pandas backend
-            backend=self.extract_config.backend_engine.lower(),
-            backend_kwargs={"tz": "UTC"},
+        # High-water marks of the incremental tables
+        self.high_water_marks = (
+            self._get_high_water_mark_store().load()
+            if self.extract_mode == utils.EXTRACT_MODE_INCREMENTAL
+            else {}
+        )
+
+        # Schedule the largest tables first, so that the small tables fill in the long tail
+        tables_metadata = {table.name: table for table in self.dataset.tables}
+        resources_by_table = {
+            table_name: self._create_table_resources(tables_metadata[table_name], metadata_obj)
+            for table_name in self._order_tables_by_size()
+        }
+        resources = list(itertools.chain.from_iterable(resources_by_table.values()))
+        self.extract_order = [resource.name for resource in resources]
+        self.extract_workers = self._configure_extract_concurrency(len(resources))
+        self.log.info(
+            "Extracting %s tables with %s parallel workers in order: %s",
+            len(resources_by_table),
+            self.extract_workers,
+            ", ".join(self.extract_order),
+        )
+        self.log.info(
+            "Extract mode: %s. Write dispositions: %s",
+            self.extract_mode,
+            self.write_dispositions,
         )
+        for table_name, plan in self.extract_plan.items():
+            self.log.info("Extract plan of table %s: %s", table_name, plan)
+
+        # Table resources (and key ranges of large tables) are extracted in parallel, batch by batch
+        self.load_batches = [
+            (table_names, [resource.parallelize() for resource in batch_resources])
+            for table_names, batch_resources in self._plan_load_batches(resources_by_table)
+        ]
 
     def _initialize_dlt_pipeline(self) -> None:
         """Initialize the DLT pipeline."""
@@ -364,24 +1198,44 @@ class DLTDataRetriever:
 
         # Set destination based on type
         if self.destination.type == "filestore" and self.destination.format == "duckdb":
+            if any(disposition != "replace" for disposition in self.write_dispositions.values()) and not (
+                staging_target_path / "database.duckdb"
+            ).exists():
+                # Incremental tables are appended or merged into a copy of the published database
+                self.log.info("Copy published database to staging...")
+                shutil.copy2(
+                    production_target_path / "database.duckdb",
+                    staging_target_path / "database.duckdb",
+                )
             self.dlt_destination = dlt.destinations.duckdb(
                 str(staging_target_path / "database.duckdb"),
             )
             self.loader_file_format = None
             dataset_name = self.dataset.schema_name
-        elif self.destination.type == "filestore" and self.destination.format == "csv":
+        elif self.destination.type == "filestore" and self.destination.format in utils.FILESTORE_FILE_FORMATS:
             # Filesystem dlt.destination creates pipeline state tables/files (_dlt_pipeline_state, _dlt_loads, _dlt_version)
             # alongside the data files in the target path.
             # When executing 'publish' endpoint, the PublishService will move from 'staging' to 'production' folder only the data files.
+            # Tables may be written as several files (rotated files and key ranges), see FILESTORE_LAYOUT.
             self.dlt_destination = dlt.destinations.filesystem(
-                layout="{table_name}.csv",
+                layout=utils.FILESTORE_LAYOUT,
                 bucket_url=str(staging_target_path),
             )
-            self.loader_file_format = "csv"
+            self.loader_file_format = self.destination.format
+            if self.destination.format == "parquet" and not PARQUET_COMPRESSION_SUPPORTED:
+                self.log.warning(
+                    "PUBLISH_PARQUET_COMPRESSION is not supported with dlt %s, parquet files use the dlt default codec",
+                    dlt.__version__,
+                )
             dataset_name = self.dataset.schema_name
         elif self.destination.type == "postgresql":
             # List of supported destinations by DLTHub: ~/.venv/lib/python3.12/site-packages/dlt/destinations/__init__.py
-            self.loader_file_format = None
+            loader = settings.publish_postgresql_loader.lower()
+            if loader not in postgres.LOADER_FILE_FORMATS:
+                msg = f"Invalid PostgreSQL loader: {loader}. Expected one of {tuple(postgres.LOADER_FILE_FORMATS)}"
+                raise ValueError(msg)
+            # The copy loader streams csv files into UNLOGGED tables, see postgres.py
+            self.loader_file_format = postgres.LOADER_FILE_FORMATS[loader]
             # Dataset name is a combination of project name, start time, and schema name
             # example: "myproject_20231001_123456_patient_data"  # noqa: ERA001
             dataset_name = str(
@@ -391,9 +1245,12 @@ class DLTDataRetriever:
                 + "_"
                 + self.dataset.schema_name,
             ).lower()
-            self.dlt_destination = dlt.destinations.postgres(
+            destination_factory = postgres.UnloggedPostgres if loader == postgres.LOADER_COPY else dlt.destinations.postgres
+            self.dlt_destination = destination_factory(
                 self._get_destination_connection_string(),
             )
+            # Each file is loaded by a load worker on its own connection to the destination
+            os.environ["LOAD__WORKERS"] = str(settings.publish_postgresql_load_workers)
         else:
             self.loader_file_format = None
             self.dlt_destination = self.destination.type
@@ -412,26 +1269,39 @@ class DLTDataRetriever:
             ),
         )
 
-    def get_destination_tables_list(self) -> dict:
-        """Fetch table metadata from SQL destination."""
+    def get_destination_tables_list(self, schema_prefix: str | None = None) -> list[dict]:
+        """Fetch the tables of the SQL destination, except the dlt internal tables.
+
+        The tables are listed from pg_catalog and filtered by the database, which keeps the query
+        and its result small as the destination accumulates the schemas of many projects.
+
+        :param schema_prefix: Only list the tables of the schemas starting with this prefix (case insensitive).
+        """
         if self.destination.type != "postgresql":
             msg = "This method only supports PostgreSQL destinations"
             raise ValueError(msg)
 
         connection_string = self._get_destination_connection_string()
 
-        # Create engine
-        engine = create_engine(connection_string)
+        # Get the shared engine of the destination
+        engine = engines.get_engine(connection_string)
 
+        # Underscores of the project names are LIKE wildcards
+        schema_pattern = re.sub(r"([\\%_])", r"\\\1", (schema_prefix or "").lower()) + "%"
         with engine.connect() as conn:
-            # Get tables for each schema
-            table_query = """
-                    SELECT table_schema, table_name
-                    FROM information_schema.tables
-                    WHERE table_schema NOT IN ('information_schema', 'pg_catalog', 'pg_toast', 'cron')
-                        AND table_type = 'BASE TABLE'
+            # Ordinary and partitioned tables, i.e. the base tables of information_schema.tables
+            table_query = r"""
+                    SELECT n.nspname AS table_schema, c.relname AS table_name
+                    FROM pg_catalog.pg_class c
+                    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                    WHERE c.relkind IN ('r', 'p')
+                        AND n.nspname NOT IN ('information_schema', 'cron')
+                        AND n.nspname NOT LIKE 'pg\_%'
+                        AND lower(n.nspname) LIKE :schema_pattern
+                        AND lower(c.relname) NOT LIKE '\_dlt\_%'
+                    ORDER BY n.nspname, c.relname
                 """
-            table_result = conn.execute(text(table_query))
+            table_result = conn.execute(text(table_query), {"schema_pattern": schema_pattern})
             tables_list = [
                 {"schema": row.table_schema, "name": row.table_name}
                 for row in table_result
@@ -439,21 +1309,174 @@ class DLTDataRetriever:
 
         return tables_list  # noqa: RET504
 
+    def _optimize_destination_tables(self) -> dict[str, dict]:
+        """Create the keys of the tables loaded into PostgreSQL and collect their statistics, see postgres.py.
+
+        Returns:
+            dict: The duration of the optimisation steps of each table, keyed by the destination table name.
+
+        """
+        # Table and column names are normalized by dlt, e.g. to snake case
+        naming = self.pipeline.default_schema.naming
+        tables = {
+            naming.normalize_table_identifier(table_name): {
+                "primary_key": [naming.normalize_identifier(column) for column in keys["primary_key"]],
+                "indexes": [[naming.normalize_identifier(column) for column in columns] for columns in keys["indexes"]],
+            }
+            for table_name, keys in self.table_keys.items()
+        }
+        engine = engines.get_engine(self._get_destination_connection_string())
+        return postgres.optimize_tables(engine, self.pipeline.dataset_name, tables, self.log)
+
+    def _get_extract_plan_summary(self) -> dict:
+        """Return the extraction plan, for tuning the planner settings."""
+        return {
+            "extract_workers": self.extract_workers,
+            "batches": [table_names for table_names, _ in self.load_batches],
+            "tables": self.extract_plan,
+        }
+
+    def _record_stage_metrics(self, stage: str, step_info: StepInfo, duration: float) -> None:
+        """Record the duration of the pipeline stage and the rows, bytes and time spent on the tables.
+
+        The table metrics are not labelled by table name, which would add series for every table of every project.
+
+        :param stage: Name of the stage, i.e. extract, normalize or load.
+        :param step_info: Info returned by the stage, with the metrics of the written or loaded files.
+        :param duration: Duration of the stage in seconds.
+        """
+        metrics.DLT_STAGE_DURATION.observe(duration, stage=stage, source_type=self.source.type)
+        for step_metrics in itertools.chain.from_iterable(step_info.metrics.values()):
+            if stage == "load":
+                for job_metrics in step_metrics["job_metrics"].values():
+                    if job_metrics.table_name.startswith(utils.DLT_TABLES_PREFIX) or not job_metrics.finished_at:
+                        continue
+                    metrics.DLT_TABLE_DURATION.inc(
+                        (job_metrics.finished_at - job_metrics.started_at).total_seconds(),
+                        stage=stage,
+                        source_type=self.source.type,
+                    )
+                continue
+            for table_name, table_metrics in step_metrics["table_metrics"].items():
+                if table_name.startswith(utils.DLT_TABLES_PREFIX):
+                    continue
+                labels = {"stage": stage, "source_type": self.source.type}
+                metrics.DLT_TABLE_ROWS.inc(table_metrics.items_count, **labels)
+                metrics.DLT_TABLE_BYTES.inc(table_metrics.file_size, **labels)
+                metrics.DLT_TABLE_DURATION.inc(table_metrics.last_modified - table_metrics.created, **labels)
+
+    def _run_load_batches(self) -> list[LoadInfo]:
+        """Extract, normalize and load the tables batch by batch, checkpointing the loaded tables.
+
+        A retry of a failed request resumes from the unfinished tables, see _plan_load_batches.
+        """
+        load_infos = []
+        for batch_index, (table_names, batch_resources) in enumerate(self.load_batches, start=1):
+            # Tables are extracted in parallel, see _configure_extract_concurrency.
+            self.log.info("DLT Extract from source (batch %s/%s)...", batch_index, len(self.load_batches))
+            self._report_progress(
+                "extract",
+                extract_order=self.extract_order,
+                extract_workers=self.extract_workers,
+                batch=batch_index,
+                batches=len(self.load_batches),
+                finished_tables=len(self.checkpoints),
+            )
+            # File rotation is configured globally in dlt, hence it is set for the batch of tables of similar size
+            self._set_job_env_var(
+                "DATA_WRITER__FILE_MAX_BYTES",
+                str(max(self.extract_plan[name]["file_max_bytes"] for name in table_names)),
+            )
+            if self.destination.format == "parquet":
+                # Every flush of the writer buffer starts a new row group, so both are sized together
+                row_group_size = str(min(self.extract_plan[name]["row_group_size"] for name in table_names))
+                self._set_job_env_var("DATA_WRITER__ROW_GROUP_SIZE", row_group_size)
+                self._set_job_env_var("DATA_WRITER__BUFFER_MAX_ITEMS", row_group_size)
+            # Write dispositions are set per table, see _get_incremental.
+            # Tables and state of the batch resources are dropped only when all of them are replaced.
+            started = time.perf_counter()
+            extract_info = self.pipeline.extract(
+                batch_resources,
+                max_parallel_items=self.extract_workers,
+                workers=self.extract_workers,
+                refresh=(
+                    "drop_resources"
+                    if all(self.write_dispositions[name] == "replace" for name in table_names)
+                    else None
+                ),
+            )
+            self._record_stage_metrics("extract", extract_info, time.perf_counter() - started)
+
+            # By default, normalization happens in 1 (single) thread.
+            self.log.info("DLT Normalize...")
+            self._report_progress("normalize", batch=batch_index)
+            started = time.perf_counter()
+            normalize_info = self.pipeline.normalize(loader_file_format=self.loader_file_format)
+            self._record_stage_metrics("normalize", normalize_info, time.perf_counter() - started)
+
+            # By default, loading happens in 20 threads, each loading a single file.
+            self.log.info("DLT Load to destination...")
+            self._report_progress("load", batch=batch_index)
+            started = time.perf_counter()
+            load_infos.append(self.pipeline.load())
+            if isinstance(self.dlt_destination, postgres.UnloggedPostgres):
+                # Tables are checkpointed once they are logged, i.e. crash safe
+                postgres.set_tables_logged(
+                    engines.get_engine(self._get_destination_connection_string()),
+                    self.pipeline.dataset_name,
+                    [self.pipeline.default_schema.naming.normalize_table_identifier(name) for name in table_names],
+                    self.log,
+                )
+            self._record_stage_metrics("load", load_infos[-1], time.perf_counter() - started)
+            self._save_checkpoints(table_names, normalize_info.row_counts)
+
+        return load_infos
+
+    def _get_postgresql_result(self, load_infos: list[LoadInfo]) -> dict:
+        """Optimise the tables loaded into PostgreSQL, if enabled, and return the loaded tables."""
+        optimize_timings = {}
+        if settings.publish_postgresql_optimize:
+            self.log.info("Optimise destination tables...")
+            self._report_progress("optimize")
+            optimize_timings = self._optimize_destination_tables()
+
+        # Return the table name where data was loaded, once per table
+        loaded_tables = dict.fromkeys(
+            (load_info.dataset_name, job.job_file_info.table_name)
+            for load_info in load_infos
+            for load_package in load_info.load_packages
+            for job in load_package.jobs.get("completed_jobs", [])
+            if not job.job_file_info.table_name.startswith("_dlt_")
+        )
+        return {
+            "data_retrieved": [
+                {
+                    "table_name": dataset_name + "." + table_name,
+                    **({"optimize": optimize_timings[table_name]} if table_name in optimize_timings else {}),
+                }
+                for dataset_name, table_name in loaded_tables
+            ],
+            "extract_plan": self._get_extract_plan_summary(),
+        }
+
     async def retrieve_data(self) -> dict:
         """Main function to retrieve data using DLT."""
         # Set staging target path
-        self.staging_target_path, _, _, _, _ = utils.get_target_paths(
+        self.staging_target_path, _, _, staging_container, _ = utils.get_target_paths(
             self.access_payload,
         )
+        if staging_container is not None:
+            self.staging_trash_path = staging_container / cleanup.TRASH_FOLDER_NAME
 
-        # Clear staging directory
+        # Clear staging directory, unless a previous attempt of the same request finished some tables
         try:
-            self._clear_staging_directory()
+            self._prepare_staging_directory()
         except Exception as e:
             msg = f"Failed to clear staging directory: {e}"
             raise RuntimeError(msg) from e
 
         # Initialize source
+        self._report_progress("initialize_source")
         try:
             self._initialize_dlt_source()
         except Exception as e:
@@ -463,6 +1486,8 @@ class DLTDataRetriever:
         # Initialize DLT pipeline
         try:
             self._initialize_dlt_pipeline()
+            # Start from a clean pipeline state, e.g. when the previous run was interrupted
+            self.pipeline.drop()
         except Exception as e:
             msg = f"Failed to initialize DLT pipeline: {e}"
             raise RuntimeError(msg) from e
@@ -473,50 +1498,27 @@ class DLTDataRetriever:
             dlt.config["normalize.parquet_normalizer.add_dlt_load_id"] = False
             dlt.config["normalize.parquet_normalizer.add_dlt_id"] = False
 
-            # By default, extraction happens in 5 threads, max_parallel_items = 20.
-            self.log.info("DLT Extract from source...")
-            self.pipeline.extract(
-                self.source,
-                write_disposition="replace",
-                refresh="drop_sources",
-            )
+            load_infos = self._run_load_batches()
+            self._save_high_water_marks()
 
-            # By default, normalization happens in 1 (single) thread.
-            self.log.info("DLT Normalize...")
-            self.pipeline.normalize(loader_file_format=self.loader_file_format)
+            if self.destination.type == "filestore":
+                # The manifest lists the stored files, see manifest.py
+                self.log.info("Write package manifest...")
+                self._report_progress("manifest")
+                files_entries = self._write_manifest()
 
-            # By default, loading happens in 20 threads, each loading a single file.
-            self.log.info("DLT Load to destination...")
-            load_info = self.pipeline.load()
+                # The package is complete, a new request starts from scratch
+                shutil.rmtree(self.staging_target_path / utils.CHECKPOINTS_FOLDER, ignore_errors=True)
 
-            if self.destination.type == "filestore":
-                # Collect stored file paths
-                self.log.info("Collect stored file paths...")
-                files = utils.collect_stored_file_paths(
-                    self.staging_target_path,
-                    utils.EXPECTED_TARGET_FILE_PATTERNS,
-                    os.path.join(str(self.staging_target_path), "").replace(  # noqa: PTH118
-                        utils.CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE,
-                        "",
-                    ),
-                )
-                return {
-                    "data_retrieved": [{"file_path": str(file)} for file in files],
-                }
-            if self.destination.type == "postgresql":
-                # Return the table name where data was loaded
                 return {
                     "data_retrieved": [
-                        {
-                            "table_name": load_info.dataset_name
-                            + "."
-                            + job.job_file_info.table_name,
-                        }
-                        for load_package in load_info.load_packages
-                        for job in load_package.jobs.get("completed_jobs", [])
-                        if not job.job_file_info.table_name.startswith("_dlt_")
+                        {"file_path": utils.CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE + relative_path}
+                        for relative_path in files_entries
                     ],
+                    "extract_plan": self._get_extract_plan_summary(),
                 }
+            if self.destination.type == "postgresql":
+                return self._get_postgresql_result(load_infos)
 
         except Exception as e:
             error_message = str(e)
@@ -541,10 +1543,14 @@ class DLTDataRetriever:
 async def dlt_data_retrieve(
     access_payload: cr8_schema.DataContractTransferRequest,
     log: config.logging.Logger,
+    progress_callback: Callable[..., None] | None = None,
 ) -> dict:
     """Entry point to retrieve data using DLT."""
-    retriever = DLTDataRetriever(access_payload, log)
-    return await retriever.retrieve_data()
+    retriever = DLTDataRetriever(access_payload, log, progress_callback)
+    try:
+        return await retriever.retrieve_data()
+    finally:
+        retriever.restore_env_vars()
 
 
 async def dlt_validate_source_destination(
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""High-water marks of incremental (cursor based) package requests.
+
+In the incremental extract mode, every table with a cursor column is read only from the
+last cursor value (high-water mark) loaded into the project. The marks are persisted per
+project, start time, destination and schema in the state directory.
+
+For filestore destinations the new marks are kept in the staging folder next to the data
+files and committed to the state directory only when the data is published to production,
+so that packages which are never published do not move the marks forward.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from . import config
+
+if TYPE_CHECKING:
+    from cr8tor.core import schema as cr8_schema
+
+settings = config.get_settings()
+
+# Name of the file in the staging folder holding the write dispositions and new high-water marks of the package
+PACKAGE_STATE_FILE_NAME = "_package_state.json"
+
+
+def encode_cursor_value(value: Any) -> dict | None:  # noqa: ANN401
+    """Encode the cursor value as json, keeping its type.
+
+    Args:
+        value: The cursor value, e.g. an integer, decimal, date or datetime.
+
+    Returns:
+        dict | None: The encoded value or None if the value is missing.
+
+    """
+    if value is None:
+        return None
+    if isinstance(value, dt.datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, dt.date):
+        return {"type": "date", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"type": "decimal", "value": str(value)}
+    return {"type": "json", "value": value}
+
+
+def decode_cursor_value(encoded: dict | None) -> Any:  # noqa: ANN401
+    """Decode the cursor value encoded with encode_cursor_value.
+
+    Args:
+        encoded (dict | None): The encoded value.
+
+    Returns:
+        Any: The cursor value or None if the value is missing.
+
+    """
+    if not encoded:
+        return None
+    value = encoded["value"]
+    if encoded["type"] == "datetime":
+        return dt.datetime.fromisoformat(value)
+    if encoded["type"] == "date":
+        return dt.date.fromisoformat(value)
+    if encoded["type"] == "decimal":
+        return Decimal(value)
+    return value
+
+
+class HighWaterMarkStore:
+    """File based store of the cursor high-water marks of a project."""
+
+    def __init__(
+        self,
+        project_name: str,
+        project_start_time: str,
+        destination: cr8_schema.Destination,
+        schema_name: str,
+        state_dir: str | Path | None = None,
+    ) -> None:
+        """Initialize the high-water mark store.
+
+        :param project_name: Name of the project.
+        :param project_start_time: Start time of the project.
+        :param destination: The destination the data is loaded into, the marks of each destination are separate.
+        :param schema_name: Name of the source schema.
+        :param state_dir: Directory where the marks are persisted. Defaults to the PUBLISH_STATE_DIR setting.
+        """
+        self.path = (
+            Path(state_dir or settings.publish_state_dir)
+            / project_name
+            / project_start_time
+            / f"{destination.name.lower()}_{destination.type.lower()}_{schema_name}.json"
+        )
+
+    def load(self) -> dict:
+        """Return the marks as {"table_name": {"cursor_column": str, "last_value": dict}}."""
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def save(self, marks: dict) -> None:
+        """Atomically update the marks of the given tables. Tables with a None mark are removed."""
+        merged_marks = {**self.load(), **marks}
+        merged_marks = {name: mark for name, mark in merged_marks.items() if mark is not None}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(merged_marks, indent=2))
+        tmp_path.replace(self.path)
+
+
+def write_package_state(staging_target_path: Path, package_state: dict) -> None:
+    """Write the write dispositions and new high-water marks of the package to the staging folder.
+
+    Args:
+        staging_target_path (Path): The staging folder of the package.
+        package_state (dict): The package state to persist.
+
+    """
+    staging_target_path.mkdir(parents=True, exist_ok=True)
+    (staging_target_path / PACKAGE_STATE_FILE_NAME).write_text(
+        json.dumps(package_state, indent=2),
+    )
+
+
+def read_package_state(staging_target_path: Path) -> dict:
+    """Read the package state written by write_package_state.
+
+    Args:
+        staging_target_path (Path): The staging folder of the package.
+
+    Returns:
+        dict: The package state or an empty dict if the package was created without it.
+
+    """
+    try:
+        return json.loads((staging_target_path / PACKAGE_STATE_FILE_NAME).read_text())
+    except FileNotFoundError:
+        return {}
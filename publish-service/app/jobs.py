@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""Asynchronous execution of long running package requests.
+
+Package requests run the blocking dltHub extract/normalize/load steps, which may
+take hours for large datasets. To keep the FastAPI event loop responsive, every
+package request is executed as a job in a dedicated process pool. Job state is
+persisted as json files in the jobs directory on the persistent storage, so that
+any uvicorn worker of any replica can report the status of a job submitted to
+another worker. The janitor removes the records of finished jobs after
+PUBLISH_JOB_TTL seconds.
+
+The uvicorn worker which submitted a job holds an exclusive file lock on the job
+from its creation until its outcome is recorded. When a worker starts, the queued
+or running jobs whose lock is not held, e.g. left by a worker or pod which was
+killed, are marked as failed.
+
+The uvicorn worker also waits for a free job slot of the pod before it submits the
+job to its process pool, so that the pool processes only run jobs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from cr8tor.core import schema as cr8_schema
+
+from . import config, core, metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+settings = config.get_settings()
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+JOB_FINAL_STATUSES = (JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED)
+
+# Interval (in seconds) between attempts to acquire a free job slot
+JOB_SLOT_POLL_INTERVAL = 1.0
+
+# Job slots bound the jobs running in the pod, hence their locks are on the filesystem of the container
+JOB_SLOTS_DIR = Path(tempfile.gettempdir()) / "publish-job-slots"
+
+_executor: ProcessPoolExecutor | None = None
+_running_jobs: dict[str, asyncio.Future] = {}
+_job_locks: dict[str, IO] = {}
+
+
+def _utcnow() -> str:
+    """Return the current UTC time in ISO format."""
+    return datetime.now(UTC).isoformat()
+
+
+class JobStore:
+    """File based store of package jobs shared by all workers of the pod."""
+
+    def __init__(self, jobs_dir: str | Path | None = None) -> None:
+        """Initialize the job store.
+
+        :param jobs_dir: Directory where job records are persisted. Defaults to the PUBLISH_JOBS_DIR setting.
+        """
+        self.jobs_dir = Path(jobs_dir or settings.publish_jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+    def _job_path(self, job_id: str) -> Path:
+        """Return the path of the job record file."""
+        return self.jobs_dir / f"{job_id}.json"
+
+    def create(self, payload: cr8_schema.DataContractTransferRequest) -> tuple[dict, IO]:
+        """Register a new queued job for the given package request.
+
+        The job is locked before its record is written, so that reconcile never fails a new job.
+
+        :return: The job record and the open lock file of the job, to be passed to unlock.
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": JOB_STATUS_QUEUED,
+            "stage": None,
+            "progress": {},
+            "project_name": payload.project_name,
+            "project_start_time": payload.project_start_time,
+            "submitted_at": _utcnow(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        lock_file = self.lock(job["job_id"])
+        self._write(job)
+        return job, lock_file
+
+    def get(self, job_id: str) -> dict | None:
+        """Return the job record or None if the job does not exist."""
+        # Job ids are generated as uuid hex strings, reject anything else to avoid path traversal
+        if not job_id.isalnum():
+            return None
+        try:
+            return json.loads(self._job_path(job_id).read_text())
+        except FileNotFoundError:
+            return None
+
+    def update(self, job_id: str, **fields: Any) -> dict:  # noqa: ANN401
+        """Update the job record with the given fields."""
+        with self._record_lock(job_id):
+            job = self.get(job_id) or {"job_id": job_id}
+            job.update(fields)
+            self._write(job)
+        return job
+
+    def update_progress(self, job_id: str, stage: str, **details: Any) -> dict:  # noqa: ANN401
+        """Set the current stage of the job and add the details to its progress."""
+        with self._record_lock(job_id):
+            job = self.get(job_id) or {"job_id": job_id}
+            job.update(stage=stage, progress={**(job.get("progress") or {}), **details})
+            self._write(job)
+        return job
+
+    def expire(self, now: float) -> int:
+        """Remove the records of the finished jobs which were not updated for PUBLISH_JOB_TTL seconds.
+
+        Returns:
+            int: The number of removed job records.
+
+        """
+        expired_jobs = 0
+        for path in self.jobs_dir.glob("*.json"):
+            job = self.get(path.stem)
+            # The record may be removed by the janitor of another replica while it is listed
+            with contextlib.suppress(FileNotFoundError):
+                if job and job.get("status") in JOB_FINAL_STATUSES and path.stat().st_mtime < now - settings.publish_job_ttl:
+                    path.unlink()
+                    self._record_lock_path(path.stem).unlink(missing_ok=True)
+                    expired_jobs += 1
+        return expired_jobs
+
+    def _lock_path(self, job_id: str) -> Path:
+        """Return the path of the job lock file."""
+        return self.jobs_dir / "locks" / f"{job_id}.lock"
+
+    def _record_lock_path(self, job_id: str) -> Path:
+        """Return the path of the lock file of the job record."""
+        return self.jobs_dir / "locks" / f"{job_id}.record.lock"
+
+    @contextlib.contextmanager
+    def _record_lock(self, job_id: str) -> Iterator[None]:
+        """Hold the exclusive lock of the job record, so that concurrent updates of the record are not lost.
+
+        It is separate from the job lock, which the uvicorn worker holds for the whole job.
+        """
+        lock_path = self._record_lock_path(job_id)
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def lock(self, job_id: str, *, blocking: bool = True) -> IO | None:
+        """Acquire the exclusive lock of the job.
+
+        :param job_id: The job to lock.
+        :param blocking: Whether to wait for the lock, otherwise None is returned if the lock is held.
+        :return: The open lock file, to be passed to unlock, or None if the lock is held.
+        """
+        lock_path = self._lock_path(job_id)
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = lock_path.open("a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def unlock(self, job_id: str, lock_file: IO) -> None:
+        """Release the lock of the job and remove its lock file."""
+        self._lock_path(job_id).unlink(missing_ok=True)
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    def reconcile(self) -> list[str]:
+        """Mark as failed the queued or running jobs whose lock is not held by any worker.
+
+        :return: The ids of the jobs marked as failed.
+        """
+        failed_jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            job = self.get(path.stem)
+            if not job or job.get("status") in JOB_FINAL_STATUSES:
+                continue
+            lock_file = self.lock(path.stem, blocking=False)
+            if lock_file is None:
+                continue
+            try:
+                # The worker records the outcome of the job before it releases the lock
+                job = self.get(path.stem) or {}
+                if job.get("status") not in JOB_FINAL_STATUSES:
+                    self.update(
+                        path.stem,
+                        status=JOB_STATUS_FAILED,
+                        finished_at=_utcnow(),
+                        error="Job interrupted, the worker running it stopped",
+                    )
+                    failed_jobs.append(path.stem)
+            finally:
+                self.unlock(path.stem, lock_file)
+        return failed_jobs
+
+    def _write(self, job: dict) -> None:
+        """Atomically write the job record."""
+        path = self._job_path(job["job_id"])
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(job, default=str))
+        tmp_path.replace(path)
+
+
+def _try_acquire_job_slot() -> IO | None:
+    """Acquire one of the pod wide job slots, if one is free.
+
+    Slots are implemented as exclusive file locks in JOB_SLOTS_DIR, which bounds the
+    number of concurrently running jobs across all uvicorn workers of the pod.
+
+    :return: The open lock file of the slot, to be passed to _release_job_slot, or None if all slots are busy.
+    """
+    JOB_SLOTS_DIR.mkdir(parents=True, exist_ok=True)
+    for slot in range(settings.publish_job_max_workers):
+        lock_file = (JOB_SLOTS_DIR / f"slot-{slot}.lock").open("w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        return lock_file
+    return None
+
+
+def _release_job_slot(lock_file: IO) -> None:
+    """Release the job slot acquired by _try_acquire_job_slot."""
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+
+async def _wait_for_job_slot(job_id: str, log: config.logging.Logger) -> IO:
+    """Wait in the event loop until one of the pod wide job slots is free and acquire it."""
+    waiting_logged = False
+    while (lock_file := _try_acquire_job_slot()) is None:
+        if not waiting_logged:
+            log.info("All job slots are busy. Package job %s waits for a free slot...", job_id)
+            waiting_logged = True
+        await asyncio.sleep(JOB_SLOT_POLL_INTERVAL)
+    return lock_file
+
+
+def run_package_job(job_id: str, payload: dict[str, Any]) -> tuple[dict, dict]:
+    """Execute the package job. Runs in a worker process of the job pool.
+
+    Returns:
+        tuple: The package result and the metrics recorded by the worker process during the job,
+            which are merged into the metrics of the uvicorn worker exposing them.
+
+    """
+    access_payload = cr8_schema.DataContractTransferRequest.model_validate(payload)
+    log = config.setup_logger(f"PublishService Project {access_payload.project_name}")
+    store = JobStore()
+
+    def report_progress(stage: str, **details: Any) -> None:  # noqa: ANN401
+        """Persist the current stage of the job."""
+        store.update_progress(job_id, stage, **details)
+
+    try:
+        log.info("Starting package job %s", job_id)
+        store.update(job_id, status=JOB_STATUS_RUNNING, started_at=_utcnow())
+        try:
+            result = asyncio.run(
+                core.dlt_data_retrieve(access_payload, log, report_progress),
+            )
+        except Exception as e:
+            log.exception("Package job %s failed", job_id)
+            store.update(
+                job_id,
+                status=JOB_STATUS_FAILED,
+                finished_at=_utcnow(),
+                error=str(e),
+            )
+            raise
+        store.update(
+            job_id,
+            status=JOB_STATUS_SUCCEEDED,
+            finished_at=_utcnow(),
+            result=result,
+        )
+        log.info("Package job %s completed", job_id)
+    finally:
+        # Reset the metrics of the worker process also when the job failed, so that they are not
+        # reported with the next job run by the process
+        job_metrics = metrics.REGISTRY.drain()
+    return result, job_metrics
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the job process pool, creating it on first use or when a worker process died and broke it."""
+    global _executor  # noqa: PLW0603
+    if _executor is not None and _executor._broken:  # noqa: SLF001
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _executor is None:
+        # Spawn fresh interpreters rather than forking the uvicorn worker with its event loop
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.publish_job_max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _on_job_done(job_id: str, future: asyncio.Future) -> None:
+    """Record the job metrics and mark the job as failed if its worker process died before reporting the outcome."""
+    _running_jobs.pop(job_id, None)
+    store = JobStore()
+    if not future.cancelled() and future.exception() is None:
+        _, worker_metrics = future.result()
+        metrics.REGISTRY.merge(worker_metrics)
+        metrics.PACKAGE_JOBS.inc(status=JOB_STATUS_SUCCEEDED)
+    else:
+        metrics.PACKAGE_JOBS.inc(status=JOB_STATUS_FAILED)
+        job = store.get(job_id) or {}
+        if job.get("status") not in JOB_FINAL_STATUSES:
+            store.update(
+                job_id,
+                status=JOB_STATUS_FAILED,
+                finished_at=_utcnow(),
+                error=str(future.exception()) if not future.cancelled() else "Job cancelled",
+            )
+    lock_file = _job_locks.pop(job_id, None)
+    if lock_file is not None:
+        store.unlock(job_id, lock_file)
+
+
+async def _run_job(job_id: str, payload: dict[str, Any], log: config.logging.Logger) -> tuple[dict, dict]:
+    """Wait for a free job slot and run the job in the job pool, holding the slot until the job ends."""
+    slot_file = await _wait_for_job_slot(job_id, log)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_executor(),
+            run_package_job,
+            job_id,
+            payload,
+        )
+    finally:
+        _release_job_slot(slot_file)
+
+
+def submit_package_job(
+    payload: cr8_schema.DataContractTransferRequest,
+    log: config.logging.Logger,
+) -> tuple[dict, asyncio.Future]:
+    """Submit the package request to the job pool.
+
+    Returns:
+        tuple: The job record and the future resolving to the package result and the job metrics.
+
+    """
+    store = JobStore()
+    job, lock_file = store.create(payload)
+    _job_locks[job["job_id"]] = lock_file
+    log.info("Submitted package job %s", job["job_id"])
+
+    future = asyncio.ensure_future(_run_job(job["job_id"], payload.model_dump(mode="json"), log))
+    _running_jobs[job["job_id"]] = future
+    future.add_done_callback(lambda f: _on_job_done(job["job_id"], f))
+    return job, future
+
+
+async def run_package(
+    payload: cr8_schema.DataContractTransferRequest,
+    log: config.logging.Logger,
+) -> dict:
+    """Run the package request in the job pool and wait for its result."""
+    _, future = submit_package_job(payload, log)
+    result, _ = await future
+    return result
+
+
+def get_job(job_id: str) -> dict | None:
+    """Return the job record or None if the job does not exist."""
+    return JobStore().get(job_id)
+
+
+def reconcile_jobs() -> None:
+    """Mark as failed the jobs left queued or running by a worker which stopped, see JobStore.reconcile."""
+    log = config.setup_logger("PublishService Jobs")
+    for job_id in JobStore().reconcile():
+        log.warning("Package job %s was interrupted and is marked as failed", job_id)
+
+
+def shutdown() -> None:
+    """Shut down the job pool. Running jobs are left to complete."""
+    global _executor  # noqa: PLW0603
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Manifest of the data files of packages.
+
+The manifest is the inventory of the data files of a package: their paths, sizes, tables and
+part indexes. It is written to staging when the package is complete and kept in production with
+the published files, so that the files do not have to be listed by scanning the folders, which
+is slow on network mounts holding thousands of rotated files.
+
+The SHA512 checksums of the data files are calculated when the tables are loaded into
+staging, while the files are still in the page cache, and persisted in a sidecar manifest
+next to the data files. On publish, the manifest is merged into the manifest of the
+production folder and the stored checksums of the files whose size and modification time
+did not change are reused instead of reading the published files again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from . import config, utils
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+settings = config.get_settings()
+
+# Name of the manifest file in the staging and production folders
+MANIFEST_FILE_NAME = "_manifest.json"
+
+# Modification times are compared with a tolerance, as files moved between mounts may keep them
+# with a coarser precision (e.g. 100 ns on SMB shares)
+MTIME_TOLERANCE_NS = 1_000_000_000
+
+
+def calculate_file_checksum(file: Path) -> tuple[str, int]:
+    """Calculate the SHA512 checksum and size of the file in a single read.
+
+    The values are the same as the hash value and total bytes of bagit.generate_manifest_lines.
+
+    Args:
+        file (Path): The file to hash.
+
+    Returns:
+        tuple: The hex digest of the SHA512 hash and the number of bytes read.
+
+    """
+    hasher = hashlib.sha512()
+    total_bytes = 0
+    buffer = bytearray(settings.publish_checksum_block_bytes)
+    view = memoryview(buffer)
+    with file.open("rb", buffering=0) as f:
+        while read_bytes := f.readinto(buffer):
+            hasher.update(view[:read_bytes])
+            total_bytes += read_bytes
+    return hasher.hexdigest(), total_bytes
+
+
+def describe_file(file: Path) -> dict:
+    """Return the manifest entry of the file: its checksum, size and modification time."""
+    # The file is stat-ed before it is read, so a file modified while it is hashed does not match its entry
+    mtime_ns = file.stat().st_mtime_ns
+    hash_value, total_bytes = calculate_file_checksum(file)
+    return {"hash_value": hash_value, "total_bytes": total_bytes, "mtime_ns": mtime_ns}
+
+
+def describe_files(files: list[Path], base_path: Path) -> dict[str, dict]:
+    """Calculate the manifest entries of the files in parallel.
+
+    Files are hashed in parallel, hashlib releases the GIL while hashing large blocks.
+
+    Args:
+        files (list[Path]): The files to describe.
+        base_path (Path): The folder the paths of the entries are relative to.
+
+    Returns:
+        dict: The entries of the files, keyed by their paths relative to the base path.
+
+    """
+    if not files:
+        return {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.publish_checksum_workers, len(files))),
+        thread_name_prefix="checksum",
+    ) as executor:
+        entries = list(executor.map(describe_file, files))
+    return {str(file.relative_to(base_path)): entry for file, entry in zip(files, entries, strict=True)}
+
+
+def collect_files(
+    path: Path,
+    files_entries: dict[str, dict] | None,
+    table_names: list[str] | None = None,
+) -> list[Path]:
+    """Return the data files of the folder listed in its manifest.
+
+    The folder is scanned when it has no manifest or the manifest is incomplete, i.e. a listed file
+    is missing or a table of the package has no listed files.
+
+    Args:
+        path (Path): The staging or production folder of the package.
+        files_entries (dict | None): The file entries of the manifest, None to scan the folder.
+        table_names (list[str] | None): The tables of the package, which must all be listed in the manifest.
+
+    Returns:
+        list[Path]: The data files.
+
+    """
+    if files_entries:
+        files = [path / relative_path for relative_path in files_entries]
+        listed_tables = {entry.get("table_name") for entry in files_entries.values()}
+        if all(file.is_file() for file in files) and listed_tables.issuperset(table_names or []):
+            return files
+    return utils.collect_stored_file_paths(path)
+
+
+def is_unchanged(file: Path, entry: dict | None) -> bool:
+    """Check whether the file has the size and modification time recorded in its manifest entry."""
+    if not entry:
+        return False
+    try:
+        stat = file.stat()
+    except FileNotFoundError:
+        return False
+    return (
+        stat.st_size == entry["total_bytes"]
+        and abs(stat.st_mtime_ns - entry["mtime_ns"]) < MTIME_TOLERANCE_NS
+    )
+
+
+def read_manifest(path: Path) -> dict[str, dict]:
+    """Read the file entries of the manifest in the given folder.
+
+    Args:
+        path (Path): The staging or production folder of the package.
+
+    Returns:
+        dict: The file entries or an empty dict if the folder has no manifest.
+
+    """
+    try:
+        return json.loads((path / MANIFEST_FILE_NAME).read_text())["files"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def write_manifest(path: Path, files: dict[str, dict]) -> None:
+    """Atomically write the manifest with the given file entries to the folder.
+
+    Args:
+        path (Path): The staging or production folder of the package.
+        files (dict): The file entries, keyed by their paths relative to the folder.
+
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    manifest_path = path / MANIFEST_FILE_NAME
+    tmp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"files": files}, indent=2))
+    tmp_path.replace(manifest_path)
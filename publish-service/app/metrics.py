@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Prometheus metrics of the Publish Service.
+
+The metrics registry and the request latency middleware are shared by all services, see
+cr8tor_publisher_common.metrics.
+"""
+
+from cr8tor_publisher_common.metrics import CONTENT_TYPE, REGISTRY, measure_request
+
+__all__ = ["CONTENT_TYPE", "REGISTRY", "measure_request"]
+
+DATABRICKS_REQUEST_DURATION = REGISTRY.histogram(
+    "databricks_request_duration_seconds",
+    "Latency of the Databricks REST API calls, including retries.",
+    ("method", "endpoint", "status"),
+)
+OPAL_REQUEST_DURATION = REGISTRY.histogram(
+    "opal_request_duration_seconds",
+    "Latency of the Opal REST API calls.",
+    ("method", "endpoint", "status"),
+)
+PACKAGE_JOBS = REGISTRY.counter(
+    "publish_package_jobs_total",
+    "Number of finished package jobs.",
+    ("status",),
+)
+PUBLISH_PROMOTE_DURATION = REGISTRY.histogram(
+    "publish_promote_duration_seconds",
+    "Duration of moving the package files from staging to production.",
+    ("strategy",),
+)
+PUBLISH_COPY_BYTES = REGISTRY.counter(
+    "publish_copy_bytes_total",
+    "Number of bytes copied from staging to production on a different filesystem.",
+    ("method",),
+)
+CLEANUP_RECLAIMED_BYTES = REGISTRY.counter(
+    "publish_cleanup_reclaimed_bytes_total",
+    "Size of the files removed from discarded and expired folders.",
+    ("area",),
+)
+CLEANUP_EXPIRED_FOLDERS = REGISTRY.counter(
+    "publish_cleanup_expired_folders_total",
+    "Number of staging packages and pipeline folders removed by the janitor after their TTL.",
+    ("area",),
+)
+POSTGRESQL_OPTIMIZE_DURATION = REGISTRY.histogram(
+    "publish_postgresql_optimize_duration_seconds",
+    "Duration of the steps optimising a table loaded into the PostgreSQL destination.",
+    ("step",),
+)
+DLT_STAGE_DURATION = REGISTRY.histogram(
+    "publish_dlt_stage_duration_seconds",
+    "Duration of the DLT extract, normalize and load stages of a batch of tables.",
+    ("stage", "source_type"),
+)
+DLT_TABLE_ROWS = REGISTRY.counter(
+    "publish_dlt_table_rows_total",
+    "Number of rows written by the DLT extract and normalize stages.",
+    ("stage", "source_type"),
+)
+DLT_TABLE_BYTES = REGISTRY.counter(
+    "publish_dlt_table_bytes_total",
+    "Size of the files written by the DLT extract and normalize stages.",
+    ("stage", "source_type"),
+)
+DLT_TABLE_DURATION = REGISTRY.counter(
+    "publish_dlt_table_duration_seconds_total",
+    "Time spent writing (extract, normalize) or loading (load) the files of the table.",
+    ("stage", "source_type"),
+)
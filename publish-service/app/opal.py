@@ -1,10 +1,23 @@
 #!/usr/bin/env python3
-"""Functions for interacting with Obiba Opal."""
+"""Functions for interacting with Obiba Opal.
+
+The publish requests of a worker process share one authenticated Opal client, see get_session.
+obiba_opal prepares its requests outside of the requests session, so the opalsid cookie of the
+Opal session is never sent back and every call would authenticate again, creating a new session
+on the server. The shared client sends the cookie with its requests and authenticates again with
+the credentials only when the Opal session expired.
+"""
 
 from __future__ import annotations
 
+import copy
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
 
 from obiba_opal import (
     DataSHIELDPermService,
@@ -16,42 +29,187 @@ from obiba_opal import (
     RESTService,
     UserService,
 )
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from requests.cookies import get_cookie_header
 from typing_extensions import Self
 
-from . import config, utils
+from . import config, metrics, utils
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from requests.cookies import RequestsCookieJar
 
 settings = config.get_settings()
 
-class Opal:
-    """Class for interacting with Obiba Opal."""
+RESOURCE_STATUS_CREATED = "created"
+RESOURCE_STATUS_UPDATED = "updated"
+RESOURCE_STATUS_UNCHANGED = "unchanged"
+RESOURCE_STATUS_FAILED = "failed"
+RESOURCE_STATUSES = (RESOURCE_STATUS_CREATED, RESOURCE_STATUS_UPDATED, RESOURCE_STATUS_UNCHANGED, RESOURCE_STATUS_FAILED)
 
-    def __init__(self, log: config.logging.Logger) -> None:
-        """Initialize Opal client."""
-        self.log = log
+DEFAULT_USER_NAME = "dsuser_default"
+
+# Keys of the cached lookups of the shared session
+LOOKUP_DATASHIELD_GROUP_PERMS = "datashield_group_perms"
+
+_session: OpalSession | None = None
+_session_lock = threading.Lock()
+
+
+class MeasuredHTTPAdapter(HTTPAdapter):
+    """HTTP adapter recording the latency of the Opal REST API calls."""
+
+    def send(self, request: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Send the request and record its latency per method, endpoint and status code."""
+        # The resource type without object names, e.g. /ws/project
+        endpoint = "/" + "/".join([part for part in request.path_url.split("?")[0].split("/") if part][:2])
+        status_code = "error"
+        started = time.perf_counter()
+        try:
+            response = super().send(request, *args, **kwargs)
+            status_code = response.status_code
+        finally:
+            metrics.OPAL_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=request.method,
+                endpoint=endpoint,
+                status=status_code,
+            )
+        return response
+
+
+class OpalSessionAdapter(MeasuredHTTPAdapter):
+    """HTTP adapter sending the Opal session cookie with the requests of the shared client."""
+
+    def __init__(self, cookies: RequestsCookieJar, **kwargs: Any) -> None:  # noqa: ANN401
+        """Initialize the adapter.
 
+        :param cookies: The cookie jar of the client session, where the opalsid cookie is stored.
+        :param kwargs: Additional arguments of HTTPAdapter.
+        """
+        super().__init__(**kwargs)
+        self.cookies = cookies
+        self.credentials_rejected = False
+
+    def send(self, request: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Send the request with the session cookie, and again with the credentials only if the session expired."""
+        cookie_header = get_cookie_header(self.cookies, request)
+        if not cookie_header or "Cookie" in request.headers:
+            response = super().send(request, *args, **kwargs)
+        else:
+            request.headers["Cookie"] = cookie_header
+            response = super().send(request, *args, **kwargs)
+            if response.status_code != HTTPStatus.UNAUTHORIZED:
+                return response
+            # The Opal session expired, authenticate again with the credentials
+            response.close()
+            self.cookies.clear()
+            del request.headers["Cookie"]
+            response = super().send(request, *args, **kwargs)
+        if response.status_code == HTTPStatus.UNAUTHORIZED:
+            # The password may have been rotated, the session is replaced by the next publish
+            self.credentials_rejected = True
+        return response
+
+
+class OpalSession:
+    """Authenticated Opal client shared by the publish requests of the worker process.
+
+    The client keeps up to PUBLISH_OPAL_WORKERS connections alive. The service objects are created
+    once, and the slowly changing lookups are cached for OPAL_LOOKUP_CACHE_TTL seconds.
+    """
+
+    def __init__(self) -> None:
+        """Authenticate to Opal."""
         self.client = OpalClient.buildWithAuthentication(
             server=os.getenv("DESTINATION_OPAL_HOST"),
             user=os.getenv("DESTINATION_OPAL_USERNAME"),
             password=settings.get_secret(os.getenv("DESTINATION_OPAL_PASSWORD_SECRET_NAME")).get_secret_value(),
             no_ssl_verify=os.getenv("DESTINATION_OPAL_NO_SSL_VERIFY", "false").lower() == "true",
         )
+        # The project resources are provisioned in parallel over the same keep-alive connections
+        self.adapter = OpalSessionAdapter(self.client.session.cookies, pool_maxsize=settings.publish_opal_workers)
+        self.client.session.mount("https://", self.adapter)
+        self.client.session.mount("http://", self.adapter)
+
+        self.projects = ProjectService(self.client)
+        self.groups = GroupService(self.client)
+        self.users = UserService(self.client)
+        self.datashield_perms = DataSHIELDPermService(self.client)
+        self.resources_perms = ResourcesPermService(self.client)
+        self.rest = RESTService(self.client)
+
+        self._lookups: dict[str, tuple[Any, float]] = {}
+        self._lookups_lock = threading.Lock()
+
+    def lookup(self, key: str, load: Callable[[], Any]) -> Any:  # noqa: ANN401
+        """Return a copy of the cached value of the lookup, loading it if missing or older than OPAL_LOOKUP_CACHE_TTL."""
+        now = time.monotonic()
+        with self._lookups_lock:
+            value, loaded_at = self._lookups.get(key, (None, None))
+        if loaded_at is None or now - loaded_at > settings.opal_lookup_cache_ttl:
+            value = load()
+            with self._lookups_lock:
+                self._lookups[key] = (value, now)
+        return copy.deepcopy(value)
+
+    def invalidate(self, key: str) -> None:
+        """Drop the cached value of the lookup, e.g. after it was modified."""
+        with self._lookups_lock:
+            self._lookups.pop(key, None)
+
+    def close(self) -> None:
+        """Close the Opal session and its connections."""
+        self.client.close()
+        self.client.session.close()
+
+
+def get_session() -> OpalSession:
+    """Return the Opal session shared by the publish requests of the process, authenticating on first use."""
+    global _session  # noqa: PLW0603
+    with _session_lock:
+        if _session is not None and _session.adapter.credentials_rejected:
+            _session.close()
+            _session = None
+        if _session is None:
+            _session = OpalSession()
+        return _session
+
+
+def close_session() -> None:
+    """Close the shared Opal session."""
+    global _session  # noqa: PLW0603
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+class Opal:
+    """Class for interacting with Obiba Opal."""
+
+    def __init__(self, log: config.logging.Logger) -> None:
+        """Initialize Opal client, using the session shared by the process."""
+        self.log = log
+        self.session = get_session()
+        self.client = self.session.client
 
     def __enter__(self) -> Self:
         """Context manager entry."""
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> bool:  # noqa: ANN001
-        """Context manager exit."""
-        if self.client:
-            self.client.close()  # or whatever cleanup method your client has
+        """Context manager exit. The shared session is kept open for the next requests."""
         # Return False to propagate any exception, or True to suppress it
         return False
 
     def create_project(self, project_name: str) -> str:
         """Create project if it doesn't exist."""
-        if not ProjectService(self.client).get_project(project_name):
+        if not self.session.projects.get_project(project_name):
             self.log.info("Creating new Opal project '%s'", project_name)
-            ProjectService(self.client).add_project(
+            self.session.projects.add_project(
                 name=project_name,
                 database=None,
                 title=project_name,
@@ -66,25 +224,26 @@ class Opal:
     def create_group(self, group_name: str) -> str:
         """Create group if it doesn't exist."""
         try:
-            GroupService(self.client).get_group(group_name)
+            self.session.groups.get_group(group_name)
             self.log.info("Opal - Group '%s' already exists", group_name)
         except HTTPError:
             self.log.info("Opal - Creating Opal group '%s'", group_name)
-            default_user = UserService(self.client).get_user("dsuser_default")
+            # The user is read uncached, as its groups are written back and may have been changed by another worker
+            default_user = self.session.users.get_user(DEFAULT_USER_NAME)
             if not default_user:
-                self.log.info("Opal - Creating dsuser_default")
-                UserService(self.client).add_user(
-                    "dsuser_default",
+                self.log.info("Opal - Creating %s", DEFAULT_USER_NAME)
+                self.session.users.add_user(
+                    DEFAULT_USER_NAME,
                     upassword=utils.generate_password(20),
                     groups=[group_name],
                 )
-                default_user = UserService(self.client).get_user("dsuser_default")
+                default_user = self.session.users.get_user(DEFAULT_USER_NAME)
             if group_name not in default_user.get("groups", []):
                 default_user["groups"] = list(
                     {*default_user.get("groups", []), group_name},
                 )
-            UserService(self.client).update_user(
-                "dsuser_default",
+            self.session.users.update_user(
+                DEFAULT_USER_NAME,
                 groups=default_user["groups"],
                 disabled=not default_user.get("enabled", True),
             )
@@ -94,15 +253,114 @@ class Opal:
         """Add group to DataSHIELD permissions."""
         existing_principals = [
             perm["subject"]["principal"]
-            for perm in DataSHIELDPermService(self.client).get_perms("group")
+            for perm in self.session.lookup(
+                LOOKUP_DATASHIELD_GROUP_PERMS,
+                lambda: self.session.datashield_perms.get_perms("group"),
+            )
         ]
         if group_name not in existing_principals:
             self.log.info("Opal - Adding DataSHIELD group '%s'", group_name)
-            DataSHIELDPermService(self.client).add_perm(
-                subject=group_name,
-                type="group",
-                permission="use",
-            )
+            try:
+                self.session.datashield_perms.add_perm(
+                    subject=group_name,
+                    type="group",
+                    permission="use",
+                )
+            finally:
+                self.session.invalidate(LOOKUP_DATASHIELD_GROUP_PERMS)
+
+    def _resource_config(
+        self,
+        project_name: str,
+        table_info: dict,
+        resource_username: str,
+        resource_password: str,
+    ) -> dict:
+        """Return the configuration of the project resource of the table."""
+        table_name = table_info.get("name", "default_table")
+        schema_name = table_info.get("schema", "default_schema")
+        resource_type = "postgresql"
+        return {
+            "name": f"tre_{resource_type}_{schema_name}_{table_name}",
+            "description": f"Resource for table {table_name} in schema {schema_name}",
+            "project": project_name,
+            "provider": "resourcer",
+            "factory": "sql",
+            "parameters": json.dumps(
+                {
+                    "host": os.getenv(f"DESTINATION_{resource_type.upper()}_HOST"),
+                    "port": os.getenv(f"DESTINATION_{resource_type.upper()}_PORT"),
+                    "db": os.getenv(
+                        f"DESTINATION_{resource_type.upper()}_DATABASE",
+                    ),
+                    "table": table_name,
+                    "schema": schema_name,
+                    "driver": resource_type,
+                },
+            ),
+            "credentials": json.dumps(
+                {
+                    "username": resource_username,
+                    "password": resource_password,
+                },
+            ),
+        }
+
+    @staticmethod
+    def _is_resource_outdated(existing_resource: dict, resource_config: dict) -> bool:
+        """Check whether the existing resource differs from its desired configuration.
+
+        The credentials are not compared, Opal does not return them.
+        """
+        try:
+            existing_parameters = json.loads(existing_resource.get("parameters") or "{}")
+        except ValueError:
+            return True
+        return (
+            existing_parameters != json.loads(resource_config["parameters"])
+            or existing_resource.get("provider") != resource_config["provider"]
+            or existing_resource.get("factory") != resource_config["factory"]
+        )
+
+    def _provision_resource(
+        self,
+        project_name: str,
+        resource_config: dict,
+        existing_resource: dict | None,
+    ) -> dict:
+        """Create the resource or update it if it differs from its configuration.
+
+        Returns:
+            dict: The outcome of the resource: its name, status and error message if it failed.
+
+        """
+        resource_name = resource_config["name"]
+        try:
+            if existing_resource is None:
+                self.log.info("Opal - Creating project resource: %s", resource_name)
+                self.session.rest.make_request(
+                    method="POST",
+                ).content_type_json().resource(
+                    f"/project/{project_name}/resources",
+                ).content(json.dumps(resource_config)).send()
+                status = RESOURCE_STATUS_CREATED
+            elif self._is_resource_outdated(existing_resource, resource_config):
+                self.log.info("Opal - Updating project resource: %s", resource_name)
+                self.session.rest.make_request(
+                    method="PUT",
+                ).content_type_json().resource(
+                    f"/project/{project_name}/resource/{resource_name}",
+                ).content(json.dumps(resource_config)).send()
+                status = RESOURCE_STATUS_UPDATED
+            else:
+                status = RESOURCE_STATUS_UNCHANGED
+        except HTTPError as e:
+            self.log.exception("Opal - Failed to provision project resource: %s", resource_name)
+            return {"name": resource_name, "status": RESOURCE_STATUS_FAILED, "error": f"{e.error} - {e.message}"}
+        except RequestException as e:
+            self.log.exception("Opal - Failed to provision project resource: %s", resource_name)
+            return {"name": resource_name, "status": RESOURCE_STATUS_FAILED, "error": str(e)}
+        return {"name": resource_name, "status": status, "error": None}
 
     def create_resources(
         self,
@@ -110,58 +368,50 @@ class Opal:
         tables_list: list[dict],
         resource_username: str,
         resource_password: str,
-    ) -> list[str]:
-        """Create project resources."""
+    ) -> list[dict]:
+        """Create or update the project resources of the tables.
+
+        The desired resources are compared with a single listing of the project resources, and only
+        the missing or outdated ones are created or updated, in parallel (up to PUBLISH_OPAL_WORKERS).
+        A failure of a resource does not stop the provisioning of the other resources.
+
+        Returns:
+            list[dict]: The outcome of the resource of each table, in the order of the tables:
+                its name, status (created, updated, unchanged or failed) and error message.
+
+        """
         response = (
-            RESTService(self.client)
+            self.session.rest
             .make_request(method="GET")
             .resource(f"/project/{project_name}/resources")
             .send()
         )
-        response = response.from_json()
-        existing_resources = [res["name"] for res in response]
-        resource_names = []
-        for table_info in tables_list:
-            table_name = table_info.get("name", "default_table")
-            schema_name = table_info.get("schema", "default_schema")
-            resource_type = "postgresql"
-            resource_name = f"tre_{resource_type}_{schema_name}_{table_name}"
-            if resource_name in existing_resources:
-                resource_names.append(resource_name)
-                continue
-            self.log.info("Opal - Creating project resource: %s", resource_name)
-            resource_config = {
-                "name": resource_name,
-                "description": f"Resource for table {table_name} in schema {schema_name}",
-                "project": project_name,
-                "provider": "resourcer",
-                "factory": "sql",
-                "parameters": json.dumps(
-                    {
-                        "host": os.getenv(f"DESTINATION_{resource_type.upper()}_HOST"),
-                        "port": os.getenv(f"DESTINATION_{resource_type.upper()}_PORT"),
-                        "db": os.getenv(
-                            f"DESTINATION_{resource_type.upper()}_DATABASE",
-                        ),
-                        "table": table_name,
-                        "schema": schema_name,
-                        "driver": resource_type,
-                    },
-                ),
-                "credentials": json.dumps(
-                    {
-                        "username": resource_username,
-                        "password": resource_password,
-                    },
+        existing_resources = {res["name"]: res for res in response.from_json() or []}
+        resource_configs = [
+            self._resource_config(project_name, table_info, resource_username, resource_password)
+            for table_info in tables_list
+        ]
+        if not resource_configs:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(settings.publish_opal_workers, len(resource_configs))),
+            thread_name_prefix="opal",
+        ) as executor:
+            outcomes = list(
+                executor.map(
+                    lambda resource_config: self._provision_resource(
+                        project_name,
+                        resource_config,
+                        existing_resources.get(resource_config["name"]),
+                    ),
+                    resource_configs,
                 ),
-            }
-            RESTService(self.client).make_request(
-                method="POST",
-            ).content_type_json().resource(
-                f"/project/{project_name}/resources",
-            ).content(json.dumps(resource_config)).send()
-            resource_names.append(resource_name)
-        return resource_names
+            )
+        self.log.info(
+            "Opal - Project resources: %s",
+            {status: sum(outcome["status"] == status for outcome in outcomes) for status in RESOURCE_STATUSES},
+        )
+        return outcomes
 
     def set_resources_permissions(
         self,
@@ -190,7 +440,7 @@ class Opal:
                 group_name,
                 project_name,
             )
-            ResourcesPermService(self.client).add_perm(
+            self.session.resources_perms.add_perm(
                 project=project_name,
                 subject=group_name,
                 type="group",
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Bulk loading and physical optimisation of the tables of the PostgreSQL destination.
+
+By default, dlt loads the PostgreSQL destination with INSERT statements. With the copy loader
+(PUBLISH_POSTGRESQL_LOADER=copy) the tables are normalized to csv files which dlt streams into
+the destination with COPY FROM STDIN, several files in parallel. The data tables are created
+UNLOGGED, which skips writing the copied rows to the write-ahead log, and switched to logged
+once the tables are loaded, which writes each table to the log in a single pass. dlt cannot
+write binary values which are not valid UTF-8 to csv files, hence the tables with binary
+columns (e.g. BYTEA or BLOB) are still loaded with INSERT statements by the copy loader.
+
+dlt creates the destination tables without primary keys or indexes, so every query of the
+DataSHIELD resources scans the whole table. When PUBLISH_POSTGRESQL_OPTIMIZE is set, the loaded
+tables are optimised for reading once they are loaded: the fillfactor of the read-only tables is
+set, the primary key of the source table and the indexes declared in the data contract are
+created, the table is optionally clustered on its primary key and its statistics are collected, also
+when a previous step failed. Tables are optimised in parallel, each one on its own connection.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import dlt
+import sqlalchemy.types as sqltypes
+from dlt.common.destination.reference import Destination
+from dlt.destinations.impl.postgres.postgres import PostgresClient
+from sqlalchemy import text
+
+from . import config, metrics
+
+if TYPE_CHECKING:
+    from dlt.common.schema.typing import TTableSchema
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Connection, Engine
+
+settings = config.get_settings()
+
+# Loaders of the PostgreSQL destination and the dlt loader file format they use
+LOADER_INSERT = "insert"
+LOADER_COPY = "copy"
+LOADER_FILE_FORMATS = {LOADER_INSERT: None, LOADER_COPY: "csv"}
+# File format of the tables with binary columns loaded by the copy loader
+BINARY_TABLE_FILE_FORMAT = "insert_values"
+
+OPTIMIZE_STEP_FILLFACTOR = "fillfactor"
+OPTIMIZE_STEP_PRIMARY_KEY = "primary_key"
+OPTIMIZE_STEP_INDEXES = "indexes"
+OPTIMIZE_STEP_CLUSTER = "cluster"
+OPTIMIZE_STEP_ANALYZE = "analyze"
+
+# Maximum length (in bytes) of PostgreSQL identifiers, longer names are truncated by the server
+MAX_IDENTIFIER_BYTES = 63
+
+
+class UnloggedPostgresClient(PostgresClient):
+    """dlt PostgreSQL client creating the data tables UNLOGGED. The dlt internal tables are logged."""
+
+    def _make_create_table(self, qualified_name: str, table: TTableSchema) -> str:
+        """Return the beginning of the CREATE TABLE statement of the table."""
+        create_table = super()._make_create_table(qualified_name, table)
+        if table["name"] in self.schema.dlt_table_names():
+            return create_table
+        return create_table.replace("CREATE TABLE", "CREATE UNLOGGED TABLE", 1)
+
+
+class UnloggedPostgres(dlt.destinations.postgres):
+    """dlt PostgreSQL destination creating the data tables UNLOGGED, see set_tables_logged."""
+
+    @property
+    def destination_type(self) -> str:
+        """Keep the type of the built-in destination, which identifies the destination in the pipeline state."""
+        return Destination.normalize_type("postgres")
+
+    @property
+    def client_class(self) -> type[PostgresClient]:
+        """Return the client creating the UNLOGGED tables."""
+        return UnloggedPostgresClient
+
+
+def has_binary_columns(table: Table) -> bool:
+    """Check whether the source table has binary columns, which the copy loader cannot write to csv files."""
+    return any(
+        isinstance(column.type, (sqltypes.LargeBinary, sqltypes.BINARY, sqltypes.VARBINARY)) for column in table.columns
+    )
+
+
+def set_tables_logged(engine: Engine, schema_name: str, table_names: list[str], log: config.logging.Logger) -> None:
+    """Switch the loaded UNLOGGED tables to logged, in parallel up to PUBLISH_POSTGRESQL_LOAD_WORKERS tables.
+
+    Tables which are already logged, e.g. tables created before the copy loader was enabled, are left unchanged.
+
+    Args:
+        engine (Engine): The engine of the destination database.
+        schema_name (str): The schema (dataset) of the tables.
+        table_names (list[str]): The names of the tables in the destination.
+        log (Logger): The logger reporting the switched tables.
+
+    """
+    quote = engine.dialect.identifier_preparer.quote_identifier
+
+    def set_logged(table_name: str) -> None:
+        """Switch the table to logged, which rewrites it to the write-ahead log."""
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE IF EXISTS {quote(schema_name)}.{quote(table_name)} SET LOGGED"))
+        log.info("Table %s.%s set logged in %.1f seconds", schema_name, table_name, time.perf_counter() - started)
+
+    if not table_names:
+        return
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.publish_postgresql_load_workers, len(table_names))),
+        thread_name_prefix="logged",
+    ) as executor:
+        list(executor.map(set_logged, table_names))
+
+
+def index_name(table_name: str, columns: list[str], suffix: str) -> str:
+    """Return the name of the index of the table columns, shortened with a hash if it is too long."""
+    name = f"{table_name}_{'_'.join(columns)}_{suffix}"
+    if len(name.encode()) <= MAX_IDENTIFIER_BYTES:
+        return name
+    digest = hashlib.sha256(name.encode()).hexdigest()[:8]
+    prefix = name.encode()[: MAX_IDENTIFIER_BYTES - len(suffix) - len(digest) - 2].decode(errors="ignore")
+    return f"{prefix}_{digest}_{suffix}"
+
+
+def _get_primary_key_index(conn: Connection, qualified_name: str) -> str | None:
+    """Return the name of the index of the primary key of the table, e.g. created by a previous package.
+
+    The primary key may have been created under another name than index_name, e.g. by hand.
+    """
+    return conn.execute(
+        text(
+            "SELECT i.relname FROM pg_catalog.pg_constraint c "
+            "JOIN pg_catalog.pg_class i ON i.oid = c.conindid "
+            "WHERE c.conrelid = to_regclass(:name) AND c.contype = 'p'",
+        ),
+        {"name": qualified_name},
+    ).scalar()
+
+
+def optimize_table(
+    engine: Engine,
+    schema_name: str,
+    table_name: str,
+    primary_key: list[str],
+    indexes: list[list[str]],
+) -> dict:
+    """Optimise the loaded table for reading, see the module docstring.
+
+    Each step is committed on its own, so that a failing step keeps the previous ones. The statistics
+    are collected even when a step failed, before its error is raised.
+
+    Args:
+        engine (Engine): The engine of the destination database.
+        schema_name (str): The schema (dataset) of the table.
+        table_name (str): The name of the table in the destination.
+        primary_key (list[str]): The primary key columns of the table, may be empty.
+        indexes (list[list[str]]): The columns of the other indexes of the table.
+
+    Returns:
+        dict: The duration (in seconds) of each step which was run.
+
+    """
+    quote = engine.dialect.identifier_preparer.quote_identifier
+    qualified_name = f"{quote(schema_name)}.{quote(table_name)}"
+    fillfactor = settings.publish_postgresql_fillfactor
+    timings = {}
+
+    def run_step(step: str, statements: list[str]) -> None:
+        """Run the statements of the step in a transaction and record its duration."""
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+        timings[step] = time.perf_counter() - started
+        metrics.POSTGRESQL_OPTIMIZE_DURATION.observe(timings[step], step=step)
+
+    # Pages of read-only tables do not need free space for updates
+    run_step(OPTIMIZE_STEP_FILLFACTOR, [f"ALTER TABLE {qualified_name} SET (fillfactor = {fillfactor})"])
+
+    try:
+        with engine.connect() as conn:
+            primary_key_index = _get_primary_key_index(conn, qualified_name)
+        if primary_key and primary_key_index is None:
+            primary_key_index = index_name(table_name, primary_key, "pkey")
+            run_step(
+                OPTIMIZE_STEP_PRIMARY_KEY,
+                [
+                    (
+                        f"ALTER TABLE {qualified_name} ADD CONSTRAINT {quote(primary_key_index)} "
+                        f"PRIMARY KEY ({', '.join(quote(column) for column in primary_key)}) WITH (fillfactor = {fillfactor})"
+                    ),
+                ],
+            )
+        if indexes:
+            run_step(
+                OPTIMIZE_STEP_INDEXES,
+                [
+                    (
+                        f"CREATE INDEX IF NOT EXISTS {quote(index_name(table_name, columns, 'idx'))} ON {qualified_name} "
+                        f"({', '.join(quote(column) for column in columns)}) WITH (fillfactor = {fillfactor})"
+                    )
+                    for columns in indexes
+                ],
+            )
+        if settings.publish_postgresql_cluster and primary_key_index:
+            # Rewrites the table in primary key order, which also applies the fillfactor to the existing pages
+            run_step(OPTIMIZE_STEP_CLUSTER, [f"CLUSTER {qualified_name} USING {quote(primary_key_index)}"])
+    finally:
+        run_step(OPTIMIZE_STEP_ANALYZE, [f"ANALYZE {qualified_name}"])
+    return timings
+
+
+def optimize_tables(
+    engine: Engine,
+    schema_name: str,
+    tables: dict[str, dict],
+    log: config.logging.Logger,
+) -> dict[str, dict]:
+    """Optimise the loaded tables in parallel, up to PUBLISH_POSTGRESQL_OPTIMIZE_WORKERS tables at once.
+
+    A table which cannot be optimised, e.g. with duplicated primary key values, does not stop the others.
+
+    Args:
+        engine (Engine): The engine of the destination database.
+        schema_name (str): The schema (dataset) of the tables.
+        tables (dict): The primary key and index columns of each table, as
+            {"table_name": {"primary_key": [columns], "indexes": [[columns], ...]}}.
+        log (Logger): The logger reporting the optimised tables.
+
+    Returns:
+        dict: The duration of the steps of each table and the total duration, or the error of the table.
+
+    """
+
+    def optimize(table_name: str) -> dict:
+        """Optimise the table, reporting the error if it fails."""
+        started = time.perf_counter()
+        try:
+            timings = optimize_table(
+                engine,
+                schema_name,
+                table_name,
+                tables[table_name]["primary_key"],
+                tables[table_name]["indexes"],
+            )
+        except Exception as e:
+            log.exception("Failed to optimise table %s.%s", schema_name, table_name)
+            return {"error": str(e), "seconds": time.perf_counter() - started}
+        timings["seconds"] = time.perf_counter() - started
+        log.info("Optimised table %s.%s in %.1f seconds: %s", schema_name, table_name, timings["seconds"], timings)
+        return timings
+
+    if not tables:
+        return {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.publish_postgresql_optimize_workers, len(tables))),
+        thread_name_prefix="optimize",
+    ) as executor:
+        return dict(zip(tables, executor.map(optimize, tables), strict=True))
@@ -1,17 +1,35 @@
 #!/usr/bin/env python3
 """Functions related to publishing stage of endpoint."""
 
+import contextlib
+import errno
 import os
 import shutil
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePath
 
-from bagit import generate_manifest_lines
 from cr8tor.core import schema as cr8_schema
 
-from . import config, core, opal, utils
+from . import (
+    cleanup,
+    config,
+    core,
+    incremental,
+    manifest,
+    metrics,
+    opal,
+    transfer,
+    utils,
+)
 
 settings = config.get_settings()
 
+# Strategies of promoting the package files from staging to production, see _promote_files
+PROMOTE_STRATEGY_RENAME = "rename"
+PROMOTE_STRATEGY_MOVE = "move"
+PROMOTE_STRATEGY_COPY = "copy"
+
 async def data_publish(
     project_payload: cr8_schema.DataContractPublishRequest,
     log: config.logging.Logger,
@@ -41,14 +59,20 @@ async def _publish_to_filestore(
 ) -> dict:
     """Publish data to filestore destination."""
     log.info("Publishing data files from staging to production...")
-    staging_target_path, production_target_path, storage_mount_path, _, _ = (
+    staging_target_path, production_target_path, storage_mount_path, staging_container, _ = (
         utils.get_target_paths(
             project_payload,
         )
     )
-    # Collect stored file paths
+    # Collect stored file paths from the package manifest, see manifest.py
     log.info("Collect stored file paths...")
-    files = utils.collect_stored_file_paths(staging_target_path)
+    staging_files = manifest.read_manifest(staging_target_path)
+    package_state = incremental.read_package_state(staging_target_path)
+    files = manifest.collect_files(
+        staging_target_path,
+        staging_files,
+        list(package_state.get("write_dispositions", {})),
+    )
 
     # if no files are found, raise an error
     if not files:
@@ -56,14 +80,139 @@ async def _publish_to_filestore(
         log.error(error_message)
         raise FileNotFoundError(error_message)
 
-    # Ensure target directory exists
-    production_target_path.mkdir(parents=True, exist_ok=True)
+    # Files published before the production manifest was introduced are listed by scanning the folder
+    production_files = manifest.read_manifest(production_target_path)
+    production_listed = bool(production_files) or not production_target_path.is_dir()
+
+    # Tables replaced in the package replace their previously published files, while incremental
+    # tables are appended to them.
+    replaced_table_paths = []
+    table_folders = package_state.get("table_folders", {})
+    for table_name, write_disposition in package_state.get("write_dispositions", {}).items():
+        # Packages created before the table folders were recorded use the table names
+        table_folder = table_folders.get(table_name, f"{package_state['schema_name']}/{table_name}")
+        table_path = production_target_path / table_folder
+        if write_disposition == "replace" and table_path.is_dir():
+            replaced_table_paths.append(table_path)
+            table_prefix = f"{table_folder}/"
+            production_files = {
+                relative_path: entry
+                for relative_path, entry in production_files.items()
+                if not relative_path.startswith(table_prefix)
+            }
+    # The staging manifest lists all package files, including the files promoted by a failed attempt
+    package_paths = set(staging_files) | {str(file.relative_to(staging_target_path)) for file in files}
 
     # Move files to production
-    for file in files:
+    started = time.perf_counter()
+    promote_strategy = _promote_files(staging_target_path, production_target_path, files, log)
+    promote_duration = time.perf_counter() - started
+    metrics.PUBLISH_PROMOTE_DURATION.observe(promote_duration, strategy=promote_strategy)
+    log.info(
+        "Moved %s files to production with the %s strategy in %.1f seconds",
+        len(files),
+        promote_strategy,
+        promote_duration,
+    )
+
+    # The previously published files of the replaced tables are removed once the package is promoted,
+    # so that a publish failing while the files are moved or copied keeps them
+    for table_path in replaced_table_paths:
+        log.info("Remove previously published files of table %s", table_path.name)
+        _remove_unpublished_files(production_target_path, table_path, package_paths)
+
+    # Generate checksums for files in production
+    log.info("Generate checksums...")
+    # The staging entries take precedence over the entries of previously published files
+    stored_files = {**production_files, **staging_files}
+    checksums = generate_checksums(
+        production_target_path,
+        stored_files,
+        manifest.collect_files(production_target_path, stored_files if production_listed else None),
+    )
+
+    # Commit the high-water marks of the published incremental tables
+    if package_state.get("high_water_marks"):
+        incremental.HighWaterMarkStore(
+            project_payload.project_name,
+            project_payload.project_start_time,
+            project_payload.destination,
+            package_state["schema_name"],
+        ).save(package_state["high_water_marks"])
+
+    # Remove staging directory after successful move to production, in the background (see cleanup.py)
+    try:
+        if Path.exists(staging_target_path):
+            log.info("Remove staging directory...")
+            cleanup.discard(
+                staging_target_path,
+                staging_container / cleanup.TRASH_FOLDER_NAME,
+                cleanup.CLEANUP_AREA_STAGING,
+            )
+        # The package folder is left empty, also when the files were promoted by renaming the folder
+        cleanup.remove_empty_folders(staging_target_path.parent, staging_target_path.parents[2])
+    except OSError as e:
+        error_message = f"Failure clearing staging directory: {e}"
+        log.exception(error_message)
+        raise OSError(error_message) from e
+
+    # Return checksums
+    return {"data_published": checksums, "promote_strategy": promote_strategy}
+
+
+def _promote_files(
+    staging_target_path: Path,
+    production_target_path: Path,
+    files: list[Path],
+    log: config.logging.Logger,
+) -> str:
+    """Move the package files from staging to production.
+
+    When the package is published for the first time and staging and production share a filesystem,
+    the staging folder is renamed to the production folder in a single atomic operation. Otherwise,
+    e.g. when an incremental package is appended to previously published files, the files are moved
+    one by one in parallel. When staging and production are different filesystems, the files are
+    copied in parallel, see transfer.py.
+
+    Returns:
+        str: The strategy used, PROMOTE_STRATEGY_RENAME, PROMOTE_STRATEGY_MOVE or PROMOTE_STRATEGY_COPY.
+
+    """
+    # Device of the production folder, or of its closest existing parent
+    production_device = next(
+        path.stat().st_dev for path in (production_target_path, *production_target_path.parents) if path.exists()
+    )
+    same_filesystem = staging_target_path.stat().st_dev == production_device
+
+    if same_filesystem and not production_target_path.exists():
+        # Files which are not part of the package (e.g. the dlt state tables) are not published
+        _prune_package_folder(staging_target_path, files)
+        production_target_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            staging_target_path.rename(production_target_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                error_message = f"Failure moving files from staging to production: {e}"
+                log.exception(error_message)
+                raise OSError(error_message) from e
+            same_filesystem = False
+        else:
+            return PROMOTE_STRATEGY_RENAME
+
+    if not same_filesystem:
+        log.info("Staging and production are different filesystems. Copying files...")
+        try:
+            transfer.copy_files(files, staging_target_path, production_target_path, log)
+        except OSError as e:
+            error_message = f"Failure copying files from staging to production: {e}"
+            log.exception(error_message)
+            raise OSError(error_message) from e
+        return PROMOTE_STRATEGY_COPY
+
+    def move_file(file: Path) -> None:
+        """Move the file to the same relative path in production."""
         log.info("Move file %s", str(file))
-        relative_path = file.relative_to(staging_target_path)
-        destination_path = production_target_path / relative_path
+        destination_path = production_target_path / file.relative_to(staging_target_path)
 
         # Ensure parent directory exists
         destination_path.parent.mkdir(parents=True, exist_ok=True)
@@ -76,29 +225,78 @@ async def _publish_to_filestore(
             log.exception(error_message)
             raise OSError(error_message) from e
 
-    # Generate checksums for files in production
-    log.info("Generate checksums...")
-    checksums = generate_checksums(production_target_path)
+    production_target_path.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.publish_move_workers, len(files))),
+        thread_name_prefix="promote",
+    ) as executor:
+        # Consume the results to raise the first failure
+        list(executor.map(move_file, files))
+    return PROMOTE_STRATEGY_MOVE
 
-    # Remove staging directory after successful move to production
-    try:
-        if Path.exists(staging_target_path):
-            log.info("Remove staging directory...")
-            shutil.rmtree(staging_target_path)
-    except OSError as e:
-        error_message = f"Failure clearing staging directory: {e}"
-        log.exception(error_message)
-        raise OSError(error_message) from e
 
-    # Return checksums
-    return {"data_published": checksums}
+def _remove_unpublished_files(production_target_path: Path, table_path: Path, package_paths: set[str]) -> None:
+    """Remove the files of the production table folder which are not part of the published package.
+
+    Args:
+        production_target_path (Path): The production folder of the package.
+        table_path (Path): The production folder of the replaced table.
+        package_paths (set[str]): The paths of the package files, relative to the production folder.
+
+    """
+    for file in sorted(table_path.rglob("*"), reverse=True):
+        if file.is_dir():
+            # Folders left empty, e.g. of key ranges which are no longer published
+            with contextlib.suppress(OSError):
+                file.rmdir()
+        elif str(file.relative_to(production_target_path)) not in package_paths:
+            file.unlink()
 
 
-def generate_checksums(path: Path) -> list:
+def _holds_data_files(entry: Path) -> bool:
+    """Check whether the entry of the package folder is, or holds, data files other than the dlt tables."""
+    if entry.name.startswith(utils.DLT_TABLES_PREFIX):
+        return False
+    if entry.is_dir():
+        return bool(utils.collect_stored_file_paths(entry))
+    return any(entry.match(pattern) for pattern in utils.EXPECTED_TARGET_FILE_PATTERNS)
+
+
+def _prune_package_folder(path: Path, files: list[Path]) -> None:
+    """Remove the entries of the package folder which are neither the package files nor their manifest.
+
+    Only the folders holding package files are listed, the other entries are removed as a whole.
+    Data files are never removed, even when they are not package files, e.g. missing from a stale manifest.
+    """
+    relative_paths = {str(file.relative_to(path)) for file in files}
+    folders = {str(parent) for relative_path in relative_paths for parent in PurePath(relative_path).parents}
+    for folder in sorted(folders):
+        for entry in (path / folder).iterdir():
+            relative_path = str(entry.relative_to(path))
+            if relative_path in relative_paths or relative_path in folders or relative_path == manifest.MANIFEST_FILE_NAME:
+                continue
+            if _holds_data_files(entry):
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry)
+            else:
+                entry.unlink()
+
+
+def generate_checksums(
+    path: Path,
+    stored_files: dict[str, dict] | None = None,
+    files: list[Path] | None = None,
+) -> list:
     """Generates checksums for files in the given path.
 
+    The stored checksums of files with an unchanged size and modification time are reused, unless
+    PUBLISH_CHECKSUM_VERIFY is set. The checksums are persisted in the manifest of the folder.
+
     Args:
         path (Path): The path to the directory containing files for which checksums are to be generated.
+        stored_files (dict | None): The manifest entries of the files. Defaults to the manifest of the folder.
+        files (list[Path] | None): The files in the path. Defaults to the files listed in the manifest entries.
 
     Returns:
         list: A list of dictionaries containing file paths, hash values, and total bytes.
@@ -116,29 +314,47 @@ def generate_checksums(path: Path) -> list:
     #   bag-info.txt
     #   manifest-sha512.txt
 
-    # Collect stored file paths
-    files = utils.collect_stored_file_paths(path)
-
-    checksums = []
-
-    for file in files:
-        relative_path = file.relative_to(path)
-        checksums.append(
-            {
-                "file_path": utils.CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE
-                + str(relative_path),
-                "hash_value": generate_manifest_lines(
-                    str(file),
-                    algorithms=["SHA512"],
-                )[0][1],  # hash value
-                "total_bytes": generate_manifest_lines(
-                    str(file),
-                    algorithms=["SHA512"],
-                )[0][3],  # total bytes
-            },
-        )
+    if stored_files is None:
+        stored_files = manifest.read_manifest(path)
 
-    return checksums
+    # Collect stored file paths
+    if files is None:
+        files = manifest.collect_files(path, stored_files)
+
+    # Only new or modified files are read, or all of them in the full verification mode
+    relative_paths = [str(file.relative_to(path)) for file in files]
+    pending_files = [
+        file
+        for file, relative_path in zip(files, relative_paths, strict=True)
+        if settings.publish_checksum_verify or not manifest.is_unchanged(file, stored_files.get(relative_path))
+    ]
+    files_entries = manifest.describe_files(pending_files, path)
+
+    if settings.publish_checksum_verify:
+        mismatched_files = [
+            relative_path
+            for relative_path, entry in files_entries.items()
+            if relative_path in stored_files and stored_files[relative_path]["hash_value"] != entry["hash_value"]
+        ]
+        if mismatched_files:
+            msg = f"Checksums of published files do not match the package manifest: {', '.join(mismatched_files)}"
+            raise RuntimeError(msg)
+
+    # The table and part of the files are kept from the package manifest
+    files_entries = {
+        relative_path: {**stored_files.get(relative_path, {}), **files_entries.get(relative_path, {})}
+        for relative_path in relative_paths
+    }
+    manifest.write_manifest(path, files_entries)
+
+    return [
+        {
+            "file_path": utils.CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE + relative_path,
+            "hash_value": entry["hash_value"],
+            "total_bytes": entry["total_bytes"],
+        }
+        for relative_path, entry in files_entries.items()
+    ]
 
 
 async def _publish_to_postgresql(
@@ -148,21 +364,9 @@ async def _publish_to_postgresql(
     """Publish data to PostgreSQL destination."""
     retriever = core.DLTDataRetriever(project_payload, log)
     log.info("Retrieving available tables in destination PostgreSQL...")
-    tables_list = retriever.get_destination_tables_list()
-
-    # filter tables_list on schema if meets pattern project_name
-    tables_list = [
-        table
-        for table in tables_list
-        if table["schema"]
-        .lower()
-        .startswith(
-            project_payload.project_name.lower()
-            + "_"
-            + project_payload.project_start_time.lower(),
-        )
-        and not table["name"].lower().startswith("_dlt_")
-    ]
+    tables_list = retriever.get_destination_tables_list(
+        schema_prefix=project_payload.project_name + "_" + project_payload.project_start_time,
+    )
 
     # Orchestrate Opal tasks
     log.info("Initializing Opal instance...")
@@ -180,23 +384,30 @@ async def _publish_to_postgresql(
             settings.get_secret(os.getenv("DESTINATION_POSTGRESQL_OPAL_READONLY_PASSWORD_SECRET_NAME")).get_secret_value(),
         )
         opal_client.set_resources_permissions(project_payload.project_name, group_name)
-
-        # Build response with captured values
-        published_data = []
-        for i, table in enumerate(tables_list):
-            published_data.append(
-                {
-                    "postgresql_table_name": table["schema"] + "." + table["name"],
-                    "opal_resource_name": opal_resources[i]
-                    if isinstance(opal_resources, list)
-                    else str(opal_resources),
-                    "opal_project_name": opal_project_name,
-                    "opal_group_name": opal_group_name,
-                },
-            )
     except opal.HTTPError as e:
         msg = f"Opal module failure: {e.error} - {e.message}"
         log.exception("Opal module failure: %s", msg)
         raise RuntimeError(msg) from e
 
+    # The resources which were provisioned are kept, a retry provisions only the failed ones
+    failed_resources = [resource for resource in opal_resources if resource["status"] == opal.RESOURCE_STATUS_FAILED]
+    if failed_resources:
+        msg = "Opal module failure: failed to provision resources " + ", ".join(
+            f"{resource['name']} ({resource['error']})" for resource in failed_resources
+        )
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    # Build response with captured values
+    published_data = [
+        {
+            "postgresql_table_name": table["schema"] + "." + table["name"],
+            "opal_resource_name": resource["name"],
+            "opal_resource_status": resource["status"],
+            "opal_project_name": opal_project_name,
+            "opal_group_name": opal_group_name,
+        }
+        for table, resource in zip(tables_list, opal_resources, strict=True)
+    ]
+
     return {"data_published": published_data}
@@ -1,18 +1,58 @@
 #!/usr/bin/env python3
 """Contains the FastAPI application and its endpoints."""
 
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 from cr8tor.core import schema as cr8_schema
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from . import auth, config, core, exception, publish, schema
+from . import (
+    auth,
+    cleanup,
+    config,
+    core,
+    engines,
+    exception,
+    jobs,
+    metrics,
+    opal,
+    publish,
+    schema,
+    utils,
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Manage resources shared by the application for its whole lifetime."""
+    metrics.REGISTRY.start_flushing()
+    await asyncio.to_thread(jobs.reconcile_jobs)
+    janitor = (
+        asyncio.create_task(cleanup.run_janitor())
+        if config.get_settings().publish_janitor_interval > 0
+        else None
+    )
+    yield
+    if janitor is not None:
+        janitor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await janitor
+    jobs.shutdown()
+    cleanup.shutdown()
+    engines.dispose_all()
+    opal.close_session()
+    metrics.REGISTRY.stop_flushing()
+
 
 app_config: dict[str, Any] = {"title": config.get_settings().app_name}
 
-app = FastAPI(**app_config)
+app = FastAPI(**app_config, lifespan=lifespan)
 
 # Register exception handlers
 app.add_exception_handler(
@@ -25,6 +65,13 @@ app.add_exception_handler(
     StarletteHTTPException,
     exception.starlette_http_exception_handler,
 )
+app.middleware("http")(metrics.measure_request)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(_: auth.AuthDependency) -> Response:
+    """Expose the metrics of the service in the Prometheus text format."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/data-publish/validate", response_model=schema.SuccessResponse)
@@ -62,12 +109,14 @@ async def datapublish_validate(
 @app.post("/data-publish/package", response_model=schema.SuccessResponse)
 async def datapublish_package(
     payload: cr8_schema.DataContractTransferRequest,
+    request: Request,
     _: auth.AuthDependency,
 ) -> schema.SuccessResponse:
     """Publish Service Endpoint which retrieves the data from the source system.
 
     Args:
         payload: Endpoint accepts json with project details along with requested datasets details (list of tables, columns, files, etc.)
+        request: The request, whose body is checked for contract fields unknown to cr8tor
         _: Authentication dependency
 
     Returns:
@@ -75,6 +124,7 @@ async def datapublish_package(
         On Failure, returns the error message
 
     """
+    await _check_contract_fields(request, payload)
     log = config.setup_logger(f"PublishService Project {payload.project_name}")
     log.info("Publishing data files from staging to production ...")
     log.info("Project: %s", payload.project_name)
@@ -84,13 +134,142 @@ async def datapublish_package(
     log.info("Project destination type: %s", payload.destination.type)
     log.info("Project destination format: %s", payload.destination.format)
 
-    res = await core.dlt_data_retrieve(payload, log)
+    # Run the package in the job pool, so that the event loop is not blocked by the DLT pipeline
+    res = await jobs.run_package(payload, log)
     return schema.SuccessResponse(
         status="success",
         payload=res,
     )
 
 
+@app.post(
+    "/data-publish/package/jobs",
+    response_model=schema.SuccessResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def datapublish_package_submit(
+    payload: cr8_schema.DataContractTransferRequest,
+    request: Request,
+    _: auth.AuthDependency,
+) -> schema.SuccessResponse:
+    """Publish Service Endpoint which submits the package request as an asynchronous job.
+
+    Args:
+        payload: Endpoint accepts json with project details along with requested datasets details (list of tables, columns, files, etc.)
+        request: The request, whose body is checked for contract fields unknown to cr8tor
+        _: Authentication dependency
+
+    Returns:
+        On Successful submission, returns the job id and its status
+        On Failure, returns the error message
+
+    """
+    await _check_contract_fields(request, payload)
+    log = config.setup_logger(f"PublishService Project {payload.project_name}")
+    log.info("Submitting package job ...")
+    log.info("Project: %s", payload.project_name)
+    log.info("Project start time: %s", payload.project_start_time)
+    log.info("Project source type: %s", payload.source.type)
+    log.info("Project destination name: %s", payload.destination.name)
+    log.info("Project destination type: %s", payload.destination.type)
+    log.info("Project destination format: %s", payload.destination.format)
+
+    job, _ = jobs.submit_package_job(payload, log)
+    return schema.SuccessResponse(
+        status="success",
+        payload={
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/data-publish/package/jobs/{job['job_id']}",
+            "result_url": f"/data-publish/package/jobs/{job['job_id']}/result",
+        },
+    )
+
+
+@app.get("/data-publish/package/jobs/{job_id}", response_model=schema.SuccessResponse)
+async def datapublish_package_status(
+    job_id: str,
+    _: auth.AuthDependency,
+) -> schema.SuccessResponse:
+    """Publish Service Endpoint which reports the status and progress of a package job.
+
+    Args:
+        job_id: Identifier of the package job
+        _: Authentication dependency
+
+    Returns:
+        On Successful execution, returns the job status, stage and progress
+        On Failure, returns the error message
+
+    """
+    job = _get_job_or_404(job_id)
+    job.pop("result", None)
+    return schema.SuccessResponse(
+        status="success",
+        payload=job,
+    )
+
+
+@app.get(
+    "/data-publish/package/jobs/{job_id}/result",
+    response_model=schema.SuccessResponse,
+)
+async def datapublish_package_result(
+    job_id: str,
+    _: auth.AuthDependency,
+) -> schema.SuccessResponse:
+    """Publish Service Endpoint which returns the result of a completed package job.
+
+    Args:
+        job_id: Identifier of the package job
+        _: Authentication dependency
+
+    Returns:
+        On Successful execution, returns the retrieved data
+        On Failure, returns the error message
+
+    """
+    job = _get_job_or_404(job_id)
+    if job["status"] == jobs.JOB_STATUS_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Package job {job_id} failed: {job.get('error')}",
+        )
+    if job["status"] != jobs.JOB_STATUS_SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Package job {job_id} is {job['status']}. The result is not available yet.",
+        )
+    return schema.SuccessResponse(
+        status="success",
+        payload=job["result"],
+    )
+
+
+async def _check_contract_fields(request: Request, payload: cr8_schema.DataContractTransferRequest) -> None:
+    """Raise HTTP 422 if the request sets contract fields which the installed cr8tor models drop."""
+    undeclared_fields = utils.get_undeclared_contract_fields(await request.json(), payload)
+    if undeclared_fields:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"The fields {', '.join(undeclared_fields)} are not supported by the installed cr8tor version. "
+                "Upgrade cr8tor to a version declaring them."
+            ),
+        )
+
+
+def _get_job_or_404(job_id: str) -> dict:
+    """Return the job record or raise HTTP 404 if the job does not exist."""
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Package job {job_id} not found",
+        )
+    return job
+
+
 @app.post("/data-publish/publish", response_model=schema.SuccessResponse)
 async def datapublish_publish(
     payload: cr8_schema.DataContractPublishRequest,
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Copy of the package files from staging to production on a different filesystem.
+
+When staging and production are different mounts, the files cannot be renamed and are copied.
+The data is copied with copy_file_range, which lets the kernel offload the copy to the storage
+(server-side copy on NFS 4.2 and SMB 3, reflinks on filesystems which support them), falling
+back to sendfile and to plain reads and writes where it is not available.
+
+Several files are copied in parallel, bounded by the total size of the files being copied.
+Each file is copied to a partial file next to its destination, named after the size and
+modification time of the source, and renamed once complete. A retry of a failed publish
+resumes the copy of a large file from the last complete chunk of its partial file.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from . import config, metrics
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+settings = config.get_settings()
+
+COPY_METHOD_COPY_FILE_RANGE = "copy_file_range"
+COPY_METHOD_SENDFILE = "sendfile"
+COPY_METHOD_READ_WRITE = "read_write"
+COPY_METHODS = (COPY_METHOD_COPY_FILE_RANGE, COPY_METHOD_SENDFILE, COPY_METHOD_READ_WRITE)
+
+# Errors of copy_file_range and sendfile when the copy between the given files is not supported
+UNSUPPORTED_COPY_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+# Interval (in seconds) between the progress messages of a file copy
+COPY_PROGRESS_INTERVAL = 30.0
+
+
+class ByteBudget:
+    """Bound of the total size of the files copied in parallel."""
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize the budget.
+
+        :param max_bytes: Maximum total size of the files copied in parallel.
+        """
+        self.max_bytes = max_bytes
+        self.bytes_in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> int:
+        """Wait until the file fits in the budget. A file larger than the budget is copied alone.
+
+        Returns:
+            int: The bytes reserved for the file, to be released once it is copied.
+
+        """
+        reserved = min(size, self.max_bytes)
+        with self._condition:
+            self._condition.wait_for(lambda: self.bytes_in_flight + reserved <= self.max_bytes)
+            self.bytes_in_flight += reserved
+        return reserved
+
+    def release(self, reserved: int) -> None:
+        """Release the bytes reserved for a copied file."""
+        with self._condition:
+            self.bytes_in_flight -= reserved
+            self._condition.notify_all()
+
+
+def _copy_chunk(method: str, source_fd: int, destination_fd: int, offset: int, count: int) -> int:
+    """Copy up to count bytes at the offset of the source to the same offset of the destination.
+
+    Returns:
+        int: The number of bytes copied, 0 at the end of the source.
+
+    """
+    if method == COPY_METHOD_COPY_FILE_RANGE:
+        return os.copy_file_range(source_fd, destination_fd, count, offset, offset)
+    if method == COPY_METHOD_SENDFILE:
+        os.lseek(destination_fd, offset, os.SEEK_SET)
+        return os.sendfile(destination_fd, source_fd, offset, count)
+    data = os.pread(source_fd, count, offset)
+    return os.pwrite(destination_fd, data, offset)
+
+
+def copy_file(source: Path, destination: Path, log: config.logging.Logger) -> dict:
+    """Copy the file to the destination, keeping its modification time, and remove the source.
+
+    Args:
+        source (Path): The file to copy.
+        destination (Path): The path of the copy.
+        log (Logger): The logger reporting the progress of the copy.
+
+    Returns:
+        dict: The statistics of the copy: bytes, resumed bytes, seconds and the copy method.
+
+    """
+    source_stat = source.stat()
+    partial_path = destination.with_name(
+        f".{destination.name}.{source_stat.st_size}-{source_stat.st_mtime_ns}.part",
+    )
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    chunk_bytes = settings.publish_copy_chunk_bytes
+    methods = [method for method in COPY_METHODS if method == COPY_METHOD_READ_WRITE or hasattr(os, method)]
+
+    started = time.perf_counter()
+    # The partial file is not opened in append mode, which copy_file_range does not support
+    partial_fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT, 0o644)
+    with source.open("rb") as source_file, os.fdopen(partial_fd, "wb") as partial_file:
+        source_fd, destination_fd = source_file.fileno(), partial_file.fileno()
+        # Resume from the last complete chunk of a previous attempt
+        resumed_bytes = os.fstat(destination_fd).st_size // chunk_bytes * chunk_bytes
+        os.ftruncate(destination_fd, resumed_bytes)
+        if resumed_bytes:
+            log.info("Resume copy of %s from %s bytes", str(source), resumed_bytes)
+
+        offset = resumed_bytes
+        last_progress = started
+        while offset < source_stat.st_size:
+            try:
+                copied_bytes = _copy_chunk(
+                    methods[0],
+                    source_fd,
+                    destination_fd,
+                    offset,
+                    min(chunk_bytes, source_stat.st_size - offset),
+                )
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_COPY_ERRNOS or len(methods) == 1:
+                    raise
+                methods.pop(0)
+                continue
+            if not copied_bytes:
+                # Some filesystems report an unsupported copy as the end of the source
+                if len(methods) == 1:
+                    break
+                methods.pop(0)
+                continue
+            offset += copied_bytes
+            metrics.PUBLISH_COPY_BYTES.inc(copied_bytes, method=methods[0])
+            if time.perf_counter() - last_progress >= COPY_PROGRESS_INTERVAL:
+                last_progress = time.perf_counter()
+                log.info(
+                    "Copying %s: %s of %s bytes (%.0f%%)",
+                    str(source),
+                    offset,
+                    source_stat.st_size,
+                    100 * offset / source_stat.st_size,
+                )
+
+    if offset != source_stat.st_size:
+        msg = f"Source file {source} changed while it was copied"
+        raise OSError(msg)
+    shutil.copystat(source, partial_path)
+    partial_path.replace(destination)
+    source.unlink()
+
+    duration = time.perf_counter() - started
+    log.info(
+        "Copied %s: %s bytes in %.1f seconds (%.1f MB/s, %s)",
+        str(source),
+        source_stat.st_size,
+        duration,
+        (source_stat.st_size - resumed_bytes) / max(duration, 1e-6) / 1e6,
+        methods[0],
+    )
+    return {
+        "bytes": source_stat.st_size,
+        "resumed_bytes": resumed_bytes,
+        "seconds": duration,
+        "method": methods[0],
+    }
+
+
+def copy_files(
+    files: list[Path],
+    source_path: Path,
+    destination_path: Path,
+    log: config.logging.Logger,
+) -> list[dict]:
+    """Copy the files in parallel to the same relative paths in the destination folder, see copy_file.
+
+    Args:
+        files (list[Path]): The files to copy.
+        source_path (Path): The folder the files are copied from.
+        destination_path (Path): The folder the files are copied to.
+        log (Logger): The logger reporting the progress of the copies.
+
+    Returns:
+        list[dict]: The statistics of the copy of each file.
+
+    """
+    budget = ByteBudget(settings.publish_copy_max_bytes_in_flight)
+
+    def copy_within_budget(file: Path) -> dict:
+        """Copy the file once it fits in the budget."""
+        reserved = budget.acquire(file.stat().st_size)
+        try:
+            return copy_file(file, destination_path / file.relative_to(source_path), log)
+        finally:
+            budget.release(reserved)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.publish_move_workers, len(files))),
+        thread_name_prefix="copy",
+    ) as executor:
+        return list(executor.map(copy_within_budget, files))
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 """Utility functions for use in other modules."""
 
+import datetime as dt
 import os
 import secrets
 import string
+from decimal import Decimal
 from itertools import chain
 from pathlib import Path
 
@@ -15,12 +17,105 @@ from cr8tor.core import schema as cr8_schema
 #   /{project_start_time}/{CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE=data/outputs}/
 CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE = "data/outputs/"
 
+# Layout of files written to filestore destinations, relative to the dataset folder.
+# Each table is stored in its own folder, as it may be written as several rotated files.
+FILESTORE_LAYOUT = "{table_name}/{file_id}.{ext}"
+
+# Folder in staging holding the per-table completion markers of a package request, see core.DLTDataRetriever.
+# A retry of a failed request resumes from the tables without a marker.
+CHECKPOINTS_FOLDER = "_checkpoints"
+CHECKPOINTS_REQUEST_FILE_NAME = "_request.json"
+
+# Formats of filestore destinations written as data files, one folder per table (see FILESTORE_LAYOUT).
+# Other filestore formats (duckdb) are written as a single database file.
+FILESTORE_FILE_FORMATS = ["csv", "parquet"]
+
 # List of expected target file patterns
-EXPECTED_TARGET_FILE_PATTERNS = ["*.csv", "*.duckdb"]
+EXPECTED_TARGET_FILE_PATTERNS = ["*.csv", "*.duckdb", "*.parquet"]
+
+# Prefix of the dlt pipeline state tables (_dlt_loads, _dlt_pipeline_state, _dlt_version),
+# which the filesystem destination writes alongside the data files. They are not part of the package.
+DLT_TABLES_PREFIX = "_dlt_"
 
 # List of supported source types
 EXPECTED_SOURCE_TYPES = ["databrickssql", "mysql", "postgresql", "sqlserver", "mssql"]
 
+# Extract modes of package requests.
+# In the incremental mode, tables with a cursor column are read from the last loaded cursor value.
+EXTRACT_MODE_FULL = "full"
+EXTRACT_MODE_INCREMENTAL = "incremental"
+EXPECTED_EXTRACT_MODES = [EXTRACT_MODE_FULL, EXTRACT_MODE_INCREMENTAL]
+
+# Fields of the data contract read by the service, which are not declared by every cr8tor version
+EXTRACT_CONFIG_CONTRACT_FIELDS = ("mode", "full_refresh")
+TABLE_CONTRACT_FIELDS = ("cursor_column", "partition_column", "partition_count", "indexes")
+
+# Queries returning table size estimates from the source catalog statistics.
+# Each query returns columns: table_name, row_count, total_bytes.
+SOURCE_TABLE_STATISTICS_QUERIES = {
+    "postgresql": """
+        SELECT c.relname AS table_name,
+            c.reltuples::bigint AS row_count,
+            pg_total_relation_size(c.oid) AS total_bytes
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = :schema AND c.relkind IN ('r', 'p')
+    """,
+    "mysql": """
+        SELECT table_name AS table_name,
+            table_rows AS row_count,
+            data_length AS total_bytes
+        FROM information_schema.tables
+        WHERE table_schema = :schema
+    """,
+    "mssql": """
+        SELECT t.name AS table_name,
+            SUM(CASE WHEN p.index_id IN (0, 1) THEN p.row_count ELSE 0 END) AS row_count,
+            SUM(p.used_page_count) * 8192 AS total_bytes
+        FROM sys.dm_db_partition_stats p
+        JOIN sys.tables t ON t.object_id = p.object_id
+        JOIN sys.schemas s ON s.schema_id = t.schema_id
+        WHERE s.name = :schema
+        GROUP BY t.name
+    """,
+}
+
+# Extraction planner defaults, see core.DLTDataRetriever._plan_table_extract.
+# Backend engine chosen by the planner for each table
+BACKEND_ENGINE_AUTO = "auto"
+# Bounds of the number of rows read from the source per chunk (and written per parquet row group)
+PLAN_CHUNK_SIZE_MIN = 10_000
+PLAN_CHUNK_SIZE_MAX = 1_000_000
+# Bounds of the size of the rotated files and the number of files a large table is written to
+PLAN_FILE_MAX_BYTES_MIN = 1024 * 1024 * 100  # 100 MB
+PLAN_FILE_MAX_BYTES_MAX = 1024 * 1024 * 1024  # 1 GB
+PLAN_FILES_PER_TABLE = 100
+
+# Estimated width (in bytes) of a value of the given column type, used to estimate the average row width.
+# Checked in order, so subclasses must precede their base types. Strings use their length, if declared.
+COLUMN_WIDTH_ESTIMATES = (
+    (sqltypes.Boolean, 1),
+    (sqltypes.SmallInteger, 2),
+    (sqltypes.BigInteger, 8),
+    (sqltypes.Integer, 4),
+    (sqltypes.Float, 8),
+    (sqltypes.Numeric, 16),
+    (sqltypes.DateTime, 8),
+    (sqltypes.Date, 4),
+    (sqltypes.Time, 8),
+    (sqltypes.String, 32),
+    (sqltypes.LargeBinary, 256),
+)
+DEFAULT_COLUMN_WIDTH = 32
+
+# Column types which can be split into key ranges for parallel extraction
+PARTITION_COLUMN_TYPES = (
+    sqltypes.Integer,
+    sqltypes.Numeric,
+    sqltypes.Date,
+    sqltypes.DateTime,
+)
+
 # Mapping of source data types to SQLAlchemy types for DLTHub data loading.
 DLTHUB_DATATYPE_EXTRA_MAPPING = {
     ### DATABRICKS SQL TYPES
@@ -161,6 +256,40 @@ def get_target_paths(
     )
 
 
+def get_undeclared_contract_fields(
+    request_body: dict,
+    payload: cr8_schema.DataContractTransferRequest,
+) -> list[str]:
+    """Return the fields of the request read by the service which the installed cr8tor models do not declare.
+
+    pydantic ignores the fields which a model does not declare, hence with a cr8tor version predating
+    them, e.g. a request in the incremental mode would silently be extracted in full.
+
+    Args:
+        request_body (dict): The json body of the request.
+        payload (DataContractTransferRequest): The request validated by the cr8tor model.
+
+    Returns:
+        list[str]: The paths of the undeclared fields.
+
+    """
+    extract_config = getattr(payload, "extract_config", None)
+    declared_fields = type(extract_config).model_fields if extract_config is not None else {}
+    requested_config = request_body.get("extract_config") or {}
+    undeclared_fields = [
+        f"extract_config.{field}"
+        for field in EXTRACT_CONFIG_CONTRACT_FIELDS
+        if field in requested_config and field not in declared_fields
+    ]
+    requested_tables = (request_body.get("dataset") or {}).get("tables") or []
+    undeclared_fields.extend(
+        f"dataset.tables.{field}"
+        for field in TABLE_CONTRACT_FIELDS
+        if any(field in table for table in requested_tables) and field not in cr8_schema.TableMetadata.model_fields
+    )
+    return undeclared_fields
+
+
 def collect_stored_file_paths(
     path: Path,
     patterns: list[str] = EXPECTED_TARGET_FILE_PATTERNS,
@@ -184,9 +313,85 @@ def collect_stored_file_paths(
         for file_path in chain.from_iterable(
             path.rglob(pattern) for pattern in patterns
         )
+        if not any(
+            part.startswith(DLT_TABLES_PREFIX)
+            for part in file_path.relative_to(path).parts
+        )
     ]
 
 
+def parse_int(value: object) -> int | None:
+    """Parse an integer statistic value, returning None when it is missing or invalid.
+
+    Args:
+        value (object): The value to parse, e.g. a number or a numeric string.
+
+    Returns:
+        int | None: The parsed integer or None.
+
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_row_width(columns: list) -> int:
+    """Estimate the average width (in bytes) of a row with the given columns.
+
+    Args:
+        columns (list): The SQLAlchemy columns of the table.
+
+    Returns:
+        int: The estimated row width.
+
+    """
+    width = 0
+    for column in columns:
+        length = getattr(column.type, "length", None)
+        if isinstance(column.type, sqltypes.String) and length:
+            width += length
+            continue
+        width += next(
+            (
+                type_width
+                for column_type, type_width in COLUMN_WIDTH_ESTIMATES
+                if isinstance(column.type, column_type)
+            ),
+            DEFAULT_COLUMN_WIDTH,
+        )
+    return max(width, 1)
+
+
+def split_key_range(
+    lower: int | Decimal | dt.date | dt.datetime | None,
+    upper: int | Decimal | dt.date | dt.datetime | None,
+    count: int,
+) -> list:
+    """Split the key range [lower, upper] into count ranges of equal width.
+
+    Args:
+        lower: The minimum key value.
+        upper: The maximum key value.
+        count (int): The number of ranges.
+
+    Returns:
+        list: Sorted inner boundaries of the ranges (at most count - 1 values).
+            Empty list if the range cannot be split.
+
+    """
+    if lower is None or upper is None or count < 2 or not lower < upper:  # noqa: PLR2004
+        return []
+    if isinstance(lower, int):
+        boundaries = {lower + (upper - lower) * i // count for i in range(1, count)}
+    elif isinstance(lower, float | Decimal | dt.date):
+        # dt.datetime is a subclass of dt.date
+        boundaries = {lower + (upper - lower) * i / count for i in range(1, count)}
+    else:
+        return []
+    return sorted(boundary for boundary in boundaries if lower < boundary <= upper)
+
+
 # More customizable password generation
 def generate_password(length: int = 16, *, include_symbols: bool = True) -> str:
     """Generate a random password.
@@ -0,0 +1 @@
+"""Benchmarks of the Publish Service."""
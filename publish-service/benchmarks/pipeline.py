@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Benchmark of the publish pipeline with a local stand-in source.
+
+Synthetic tables of configurable width and row count are generated in a SQLite database and
+packaged end to end with DLTDataRetriever.retrieve_data, for every combination of backend engine
+and destination format. Each case runs in a fresh process, so that its peak RSS is not inflated
+by the previous cases. Throughput, peak RSS and output size are written as json, to be compared
+between releases.
+
+Run from the publish-service folder:
+
+    uv run python -m benchmarks.pipeline --rows 1000000 --columns 20 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import datetime as dt
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+BACKENDS = ("sqlalchemy", "pyarrow", "pandas")
+FORMATS = ("csv", "parquet", "duckdb")
+
+# Types of the synthetic columns, cycled after the integer primary key.
+# SQLite stores decimals as binary floats, which do not round trip as exact decimals, hence FLOAT.
+COLUMN_TYPES = ("INTEGER", "VARCHAR(32)", "FLOAT", "DATE", "DATETIME")
+
+# Number of rows inserted into the source database at once
+INSERT_BATCH_ROWS = 10_000
+
+# Packages whose versions are reported with the results
+REPORTED_PACKAGES = ("dlt", "sqlalchemy", "pyarrow", "pandas", "duckdb")
+
+log = logging.getLogger("benchmark")
+
+
+def _generate_value(column_type: str, rng: random.Random) -> Any:  # noqa: ANN401
+    """Generate a random value of the column type."""
+    if column_type == "INTEGER":
+        return rng.randint(0, 2**31)
+    if column_type.startswith("VARCHAR"):
+        return "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(8, 32)))
+    if column_type == "FLOAT":
+        return round(rng.uniform(0, 1_000_000), 2)
+    timestamp = dt.datetime(2020, 1, 1, tzinfo=dt.UTC) + dt.timedelta(seconds=rng.randint(0, 5 * 365 * 86400))
+    if column_type == "DATE":
+        return timestamp.date().isoformat()
+    return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def create_source_database(database_path: Path, tables: int, rows: int, columns: int, seed: int) -> list[str]:
+    """Create the SQLite database with the synthetic tables.
+
+    Args:
+        database_path (Path): Path of the database file, replaced if it exists.
+        tables (int): Number of tables.
+        rows (int): Number of rows per table.
+        columns (int): Number of columns per table, including the primary key.
+        seed (int): Seed of the generated values.
+
+    Returns:
+        list[str]: Names of the created tables.
+
+    """
+    database_path.unlink(missing_ok=True)
+    column_types = list(itertools.islice(itertools.cycle(COLUMN_TYPES), max(columns - 1, 0)))
+    definitions = "".join(f", col_{i} {column_type}" for i, column_type in enumerate(column_types, start=1))
+    placeholders = ", ".join("?" * (len(column_types) + 1))
+    table_names = [f"table_{i}" for i in range(tables)]
+
+    with sqlite3.connect(database_path) as conn:
+        for table_index, table_name in enumerate(table_names):
+            rng = random.Random(seed + table_index)  # noqa: S311
+            conn.execute(f"CREATE TABLE {table_name} (id INTEGER PRIMARY KEY{definitions})")
+            for start in range(0, rows, INSERT_BATCH_ROWS):
+                conn.executemany(
+                    f"INSERT INTO {table_name} VALUES ({placeholders})",  # noqa: S608
+                    [
+                        (row_id, *(_generate_value(column_type, rng) for column_type in column_types))
+                        for row_id in range(start, min(start + INSERT_BATCH_ROWS, rows))
+                    ],
+                )
+    return table_names
+
+
+def run_case(database_path: Path, table_names: list[str], backend: str, destination_format: str) -> dict:
+    """Package the synthetic tables with the backend and destination format. Runs in a fresh process."""
+    from cr8tor.core import schema as cr8_schema  # noqa: PLC0415
+    from sqlalchemy import inspect, text  # noqa: PLC0415
+
+    from app import core  # noqa: PLC0415
+
+    class LocalSourceRetriever(core.DLTDataRetriever):
+        """Retriever reading the synthetic tables from the SQLite stand-in source."""
+
+        def _get_source_connection_string(self) -> None:
+            self.connection_string = f"sqlite:///{database_path}"
+
+        def _get_tables_metadata(self, table_names: list[str]) -> dict[str, tuple]:
+            inspector = inspect(self.engine)
+            return {
+                table_name: (
+                    {
+                        column["name"]: {
+                            "data_type": str(column["type"]).split("(")[0],
+                            "is_nullable": column["nullable"],
+                        }
+                        for column in inspector.get_columns(table_name)
+                    },
+                    inspector.get_pk_constraint(table_name)["constrained_columns"],
+                )
+                for table_name in table_names
+            }
+
+        def _get_table_statistics(self) -> dict:
+            with self.engine.connect() as conn:
+                for table in self.dataset.tables:
+                    row_count = conn.execute(text(f"SELECT COUNT(*) FROM {table.name}")).scalar()  # noqa: S608
+                    self.table_statistics[table.name] = {"row_count": row_count, "total_bytes": None}
+            return self.table_statistics
+
+    with sqlite3.connect(database_path) as conn:
+        column_names = [row[1] for row in conn.execute(f"PRAGMA table_info({table_names[0]})")]
+        rows = sum(conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for name in table_names)  # noqa: S608
+
+    payload = cr8_schema.DataContractTransferRequest(
+        project_name=f"benchmark_{backend}_{destination_format}",
+        project_start_time="20250101_000000",
+        destination={"name": "BENCHMARK", "type": "filestore", "format": destination_format},
+        source={
+            "type": "postgresql",
+            "host_url": "localhost",
+            "database": database_path.stem,
+            "port": 0,
+            "credentials": {"username_key": "unused", "password_key": "unused"},
+        },
+        dataset={
+            "schema_name": "main",
+            "tables": [
+                {"name": table_name, "columns": [{"name": column_name} for column_name in column_names]}
+                for table_name in table_names
+            ],
+        },
+        extract_config={"backend_engine": backend},
+    )
+    retriever = LocalSourceRetriever(payload, log)
+    baseline_rss_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    result = {"backend": backend, "format": destination_format, "rows": rows, "columns": len(column_names)}
+    started = time.perf_counter()
+    try:
+        # Keep stdout for the results, the DLT progress is logged to stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            asyncio.run(retriever.retrieve_data())
+    except Exception as e:  # noqa: BLE001
+        return {**result, "status": "failed", "error": str(e)}
+    seconds = time.perf_counter() - started
+
+    return {
+        **result,
+        "status": "success",
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds),
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "baseline_rss_bytes": baseline_rss_bytes,
+        "output_bytes": sum(path.stat().st_size for path in retriever.staging_target_path.rglob("*") if path.is_file()),
+    }
+
+
+def _get_environment() -> dict:
+    """Return the versions and hardware the benchmark ran with."""
+    versions = {}
+    for package in REPORTED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark cases and write the results."""
+    parser = argparse.ArgumentParser(description="Benchmark of the publish pipeline with a local stand-in source.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of rows per table.")
+    parser.add_argument("--columns", type=int, default=10, help="Number of columns per table.")
+    parser.add_argument("--tables", type=int, default=2, help="Number of tables.")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated values.")
+    parser.add_argument("--work-dir", type=Path, help="Directory of the source database and outputs.")
+    parser.add_argument("--output", type=Path, help="Json file with the results. Defaults to stdout.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="[%(asctime)s] %(name)s [%(levelname)s] %(message)s")
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="publish-benchmark-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    # Inherited by the processes running the cases
+    os.environ["TARGET_STORAGE_ACCOUNT_BENCHMARK_SDE_MNT_PATH"] = str(work_dir / "outputs")
+    os.environ["DLTHUB_PIPELINE_WORKING_DIR"] = str(work_dir / "pipelines")
+    os.environ["RUNTIME__DLTHUB_TELEMETRY"] = "false"
+
+    log.info("Generating %d tables of %d rows and %d columns in %s", args.tables, args.rows, args.columns, work_dir)
+    database_path = work_dir / "source.db"
+    table_names = create_source_database(database_path, args.tables, args.rows, args.columns, args.seed)
+
+    results = []
+    for backend, destination_format in itertools.product(args.backends, args.formats):
+        log.info("Running the %s backend with the %s format...", backend, destination_format)
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results.append(executor.submit(run_case, database_path, table_names, backend, destination_format).result())
+        log.info("Result: %s", results[-1])
+
+    report = json.dumps(
+        {
+            "created_at": dt.datetime.now(dt.UTC).isoformat(),
+            "environment": _get_environment(),
+            "parameters": {
+                "rows": args.rows,
+                "columns": args.columns,
+                "tables": args.tables,
+                "seed": args.seed,
+            },
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        args.output.write_text(report)
+        log.info("Results written to %s", args.output)
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
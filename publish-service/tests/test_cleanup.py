@@ -0,0 +1,110 @@
+"""Module containing unit tests for the removal of staging folders."""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from app import cleanup, metrics
+
+
+def _wait_for_removals() -> None:
+    """Wait until the background thread removed the discarded folders."""
+    cleanup._get_executor().submit(lambda: None).result()  # noqa: SLF001
+
+
+def _set_mtime(path: Path, mtime: float) -> None:
+    """Set the modification time of the folder and all its content."""
+    for file in [path, *path.rglob("*")]:
+        os.utime(file, (mtime, mtime))
+
+
+class TestCleanup:
+    """Unit tests for the discard and expire functions."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Set up the test case with a staging container holding two packages."""
+        monkeypatch.setattr(cleanup.settings, "publish_cleanup_ttl", 3600)
+        metrics.REGISTRY.drain()
+        self.staging_container = tmp_path / "staging"
+        self.trash_path = self.staging_container / cleanup.TRASH_FOLDER_NAME
+        self.old_package = self.staging_container / "project" / "20250101_000000"
+        self.new_package = self.staging_container / "project" / "20250205_010101"
+        for package_path in (self.old_package, self.new_package):
+            table_path = package_path / "data" / "outputs" / "main" / "table_1"
+            table_path.mkdir(parents=True)
+            (table_path / "1.csv").write_text("id\n1\n")
+        _set_mtime(self.old_package, time.time() - 7200)
+
+    def test_discard(self) -> None:
+        """Test case for moving the folder to the trash and removing it in the background."""
+        cleanup.discard(self.new_package, self.trash_path, cleanup.CLEANUP_AREA_STAGING)
+
+        assert not self.new_package.exists()
+        _wait_for_removals()
+        assert list(self.trash_path.iterdir()) == []
+        assert 'publish_cleanup_reclaimed_bytes_total{area="staging"} 5' in metrics.REGISTRY.render()
+
+    def test_expire_staging(self) -> None:
+        """Test case for removing the packages which were not modified for the TTL."""
+        expired_packages = cleanup.expire_staging(self.staging_container, time.time())
+
+        assert expired_packages == 1
+        assert not self.old_package.exists()
+        assert self.new_package.exists()
+
+    def test_expire_staging_removes_empty_project_folders(self) -> None:
+        """Test case for removing the project folders left empty by published packages."""
+        empty_project = self.staging_container / "published_project"
+        empty_project.mkdir()
+        _set_mtime(empty_project, time.time() - 7200)
+        new_project = self.staging_container / "new_project"
+        new_project.mkdir()
+
+        cleanup.expire_staging(self.staging_container, time.time())
+
+        assert not empty_project.exists()
+        assert new_project.exists()
+        assert self.new_package.exists()
+
+    def test_remove_empty_folders(self) -> None:
+        """Test case for removing the empty folders of a package up to the project folder."""
+        outputs_path = self.new_package / "data" / "outputs"
+        shutil.rmtree(outputs_path)
+
+        cleanup.remove_empty_folders(outputs_path, self.new_package.parent)
+
+        assert not self.new_package.exists()
+        assert self.old_package.exists()
+
+    def test_run_janitor_once_skips_recent_run(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test case for running the janitor once per interval across the replicas sharing the storage."""
+        monkeypatch.setattr(cleanup.settings, "publish_storage_mnt_path", str(tmp_path / "storage"))
+        monkeypatch.setattr(cleanup.settings, "publish_janitor_interval", 3600)
+        monkeypatch.setenv("TARGET_STORAGE_ACCOUNT_LSC_SDE_MNT_PATH", str(tmp_path))
+        lock_path = tmp_path / "storage" / cleanup.JANITOR_LOCK_NAME
+        lock_path.parent.mkdir()
+        lock_path.write_text(str(time.time() - 60))
+
+        cleanup.run_janitor_once()
+
+        assert self.old_package.exists()
+
+        lock_path.write_text(str(time.time() - 3600))
+        cleanup.run_janitor_once()
+
+        assert not self.old_package.exists()
+        assert float(lock_path.read_text()) > time.time() - 60
+
+    def test_expire_staging_purges_orphaned_trash(self) -> None:
+        """Test case for removing the trash left by a process which stopped before removing it."""
+        orphan_path = self.trash_path / f"{int(time.time()) - cleanup.TRASH_ORPHAN_AGE - 1}-abc-20250101_000000"
+        self.trash_path.mkdir()
+        self.old_package.rename(orphan_path)
+
+        cleanup.expire_staging(self.staging_container, time.time())
+
+        assert not orphan_path.exists()
@@ -0,0 +1,111 @@
+"""Module containing unit tests for the Databricks REST API helpers."""
+
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app import databricks
+
+
+class TestGetAccessToken:
+    """Unit tests for the get_access_token function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> Iterator[None]:
+        """Set up the test case with an empty token cache."""
+        databricks._token_cache.clear()  # noqa: SLF001
+        patcher = patch("app.databricks._request_access_token", return_value=("test_token", 3600))
+        self.mock_request_access_token = patcher.start()
+        yield
+        patcher.stop()
+        databricks._token_cache.clear()  # noqa: SLF001
+
+    def test_reuse_cached_token(self) -> None:
+        """Test case for requesting a token once per host and service principal."""
+        assert databricks.get_access_token("https://example.com", "clientid", "secret") == "test_token"
+        assert databricks.get_access_token("https://example.com/", "clientid", "secret") == "test_token"
+        databricks.get_access_token("https://example.com", "otherclientid", "secret")
+
+        assert self.mock_request_access_token.call_count == 2  # noqa: PLR2004
+
+    def test_refresh_token_ahead_of_expiry(self) -> None:
+        """Test case for refreshing a token which expires within the refresh margin."""
+        self.mock_request_access_token.return_value = ("short_lived_token", 60)
+        databricks.get_access_token("https://example.com", "clientid", "secret")
+        databricks.get_access_token("https://example.com", "clientid", "secret")
+
+        assert self.mock_request_access_token.call_count == 2  # noqa: PLR2004
+
+    def test_single_flight_refresh(self) -> None:
+        """Test case for concurrent callers waiting for a single token request."""
+
+        def slow_request(*_) -> tuple[str, int]:  # noqa: ANN002
+            time.sleep(0.1)
+            return "test_token", 3600
+
+        self.mock_request_access_token.side_effect = slow_request
+        threads = [
+            threading.Thread(target=databricks.get_access_token, args=("https://example.com", "clientid", "secret"))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.mock_request_access_token.assert_called_once()
+
+    def test_share_token_between_processes(self, tmp_path: Path) -> None:
+        """Test case for reusing the token written to the cache directory by another worker process."""
+        mock_settings = MagicMock(databricks_token_cache_dir=str(tmp_path), databricks_token_refresh_margin=300)
+        with patch.object(databricks, "settings", mock_settings):
+            databricks.get_access_token("https://example.com", "clientid", "secret")
+            # Simulate another worker process with an empty in-memory cache
+            databricks._token_cache.clear()  # noqa: SLF001
+            access_token = databricks.get_access_token("https://example.com", "clientid", "secret")
+
+        assert access_token == "test_token"  # noqa: S105
+        self.mock_request_access_token.assert_called_once()
+        (token_file,) = tmp_path.glob("*.json")
+        assert token_file.stat().st_mode & 0o777 == 0o600  # noqa: PLR2004
+
+
+class TestHandleRestapiRequest:
+    """Unit tests for the pooled session of the handle_restapi_request function."""
+
+    def test_retry_transient_errors(self) -> None:
+        """Test case for retrying throttled and unavailable responses with backoff."""
+        session = databricks.create_session(4)
+
+        adapter = session.get_adapter("https://example.com")
+        assert adapter._pool_maxsize == 4  # noqa: SLF001, PLR2004
+        assert {429, 503} <= set(adapter.max_retries.status_forcelist)
+        assert adapter.max_retries.respect_retry_after_header
+
+    def test_paginate_over_shared_session(self) -> None:
+        """Test case for requesting all pages over the shared session and recording their latency."""
+        mock_session = MagicMock()
+        mock_session.request.side_effect = [
+            MagicMock(status_code=200, ok=True, json=MagicMock(return_value={"tables": [1, 2], "next_page_token": "p2"})),
+            MagicMock(status_code=200, ok=True, json=MagicMock(return_value={"tables": [3]})),
+        ]
+        databricks.metrics.DATABRICKS_REQUEST_DURATION.drain()
+
+        with patch("app.databricks.get_session", return_value=mock_session):
+            tables = databricks.handle_restapi_request(
+                "https://example.com/api/2.1/unity-catalog/tables",
+                {},
+                {"catalog_name": "test_catalog"},
+                "tables",
+                paginate=True,
+            )
+
+        assert tables == [1, 2, 3]
+        assert mock_session.request.call_count == 2  # noqa: PLR2004
+        ((labels, observations),) = databricks.metrics.DATABRICKS_REQUEST_DURATION.drain()
+        assert labels == ["GET", "/api/2.1/unity-catalog/tables", "200"]
+        assert observations[-2] == 2  # noqa: PLR2004
@@ -0,0 +1,65 @@
+"""Module containing unit tests for the SQLAlchemy engine registry."""
+
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app import engines
+
+
+class TestGetEngine:
+    """Unit tests for the get_engine function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> Iterator[None]:
+        """Set up the test case with an empty engine registry."""
+        self.connection_string = f"sqlite:///{tmp_path / 'source.db'}"
+        yield
+        engines.dispose_all()
+
+    def test_reuse_engine(self) -> None:
+        """Test case for sharing the engine of the same connection string."""
+        engine = engines.get_engine(self.connection_string)
+
+        assert engines.get_engine(self.connection_string) is engine
+        assert engines.get_engine(self.connection_string + "?timeout=1") is not engine
+        assert engine.pool._pre_ping  # noqa: SLF001
+
+    def test_evict_idle_engine(self) -> None:
+        """Test case for disposing the engines which were not requested for the idle timeout."""
+        engine = engines.get_engine(self.connection_string)
+
+        with (
+            patch.object(engines.settings, "sqlalchemy_engine_idle_timeout", -1),
+            patch.object(engine, "dispose") as mock_dispose,
+        ):
+            new_engine = engines.get_engine(self.connection_string)
+
+        mock_dispose.assert_called_once()
+        assert new_engine is not engine
+
+    def test_keep_idle_engine_in_use(self) -> None:
+        """Test case for keeping the engines with a connection checked out, e.g. by a long running query."""
+        engine = engines.get_engine(self.connection_string)
+
+        with (
+            engine.connect(),
+            patch.object(engines.settings, "sqlalchemy_engine_idle_timeout", -1),
+            patch.object(engine, "dispose") as mock_dispose,
+        ):
+            assert engines.get_engine(self.connection_string + "?timeout=1") is not engine
+            assert engines.get_engine(self.connection_string) is engine
+
+        mock_dispose.assert_not_called()
+
+    def test_dispose_all(self) -> None:
+        """Test case for disposing all registered engines on shutdown."""
+        engine = engines.get_engine(self.connection_string)
+
+        with patch.object(engine, "dispose") as mock_dispose:
+            engines.dispose_all()
+
+        mock_dispose.assert_called_once()
+        assert engines.get_engine(self.connection_string) is not engine
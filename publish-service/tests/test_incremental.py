@@ -0,0 +1,123 @@
+"""Module containing unit tests for the incremental high-water marks."""
+
+import datetime as dt
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from cr8tor.core import schema as cr8_schema
+
+from app import incremental, utils
+
+
+class TestHighWaterMarkStore:
+    """Unit tests for the HighWaterMarkStore class."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
+        """Set up the test case with a temporary state directory."""
+        self.store = incremental.HighWaterMarkStore(
+            "test_project",
+            "20250205_010101",
+            cr8_schema.Destination(name="LSC", type="filestore"),
+            "example_schema_name",
+            state_dir=tmp_path,
+        )
+        self.mark = {
+            "cursor_column": "updated_at",
+            "last_value": {"type": "datetime", "value": "2025-02-05T01:01:01+00:00"},
+        }
+
+    def test_load_without_marks(self) -> None:
+        """Test case for loading the marks of a project packaged for the first time."""
+        assert self.store.load() == {}
+
+    def test_save_marks(self) -> None:
+        """Test case for updating the marks of some tables only."""
+        self.store.save({"person": self.mark, "address": self.mark})
+
+        self.store.save({"address": None, "visit": self.mark})
+
+        assert self.store.load() == {"person": self.mark, "visit": self.mark}
+
+
+class TestCursorValues:
+    """Unit tests for the cursor value json encoding."""
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            1199,
+            "b-0042",
+            Decimal("123.45"),
+            dt.date(2025, 2, 5),
+            dt.datetime(2025, 2, 5, 1, 1, 1, tzinfo=dt.UTC),
+        ],
+    )
+    def test_cursor_value_roundtrip(self, value: object) -> None:
+        """Test case for keeping the type of the cursor values persisted as json."""
+        decoded = incremental.decode_cursor_value(incremental.encode_cursor_value(value))
+
+        assert decoded == value
+        assert type(decoded) is type(value)
+
+
+class TestContractFields:
+    """Unit tests for detecting the contract fields dropped by the installed cr8tor models."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        """Set up the test case with a package request in the incremental mode."""
+        self.body = {
+            "project_name": "test_project",
+            "project_start_time": "20250205_010101",
+            "destination": {"name": "LSC", "type": "filestore", "format": "csv"},
+            "source": {
+                "type": "postgresql",
+                "host_url": "localhost",
+                "database": "source",
+                "port": 5432,
+                "credentials": {"username_key": "username", "password_key": "password"},
+            },
+            "dataset": {
+                "schema_name": "main",
+                "tables": [
+                    {
+                        "name": "patients",
+                        "columns": [{"name": "id"}, {"name": "updated_at"}],
+                        "cursor_column": "updated_at",
+                        "partition_column": "id",
+                        "partition_count": 4,
+                        "indexes": ["id"],
+                    },
+                ],
+            },
+            "extract_config": {"mode": "incremental", "full_refresh": True},
+        }
+
+    def test_undeclared_contract_fields(self) -> None:
+        """Test case for reporting every requested field which the installed cr8tor model does not keep."""
+        payload = cr8_schema.DataContractTransferRequest.model_validate(self.body)
+
+        undeclared_fields = utils.get_undeclared_contract_fields(self.body, payload)
+
+        extract_config = getattr(payload, "extract_config", None)
+        dropped_fields = [
+            f"extract_config.{field}"
+            for field in utils.EXTRACT_CONFIG_CONTRACT_FIELDS
+            if getattr(extract_config, field, None) != self.body["extract_config"][field]
+        ] + [
+            f"dataset.tables.{field}"
+            for field in utils.TABLE_CONTRACT_FIELDS
+            if getattr(payload.dataset.tables[0], field, None) != self.body["dataset"]["tables"][0][field]
+        ]
+        assert undeclared_fields == dropped_fields
+
+    def test_request_without_contract_fields(self) -> None:
+        """Test case for accepting a full extract request with any cr8tor version."""
+        del self.body["extract_config"]
+        for field in utils.TABLE_CONTRACT_FIELDS:
+            del self.body["dataset"]["tables"][0][field]
+        payload = cr8_schema.DataContractTransferRequest.model_validate(self.body)
+
+        assert utils.get_undeclared_contract_fields(self.body, payload) == []
@@ -0,0 +1,164 @@
+"""Module containing unit tests for the package jobs store."""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import jobs, metrics
+
+
+class TestJobStore:
+    """Unit tests for the JobStore class."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
+        """Set up the test case with a temporary jobs directory."""
+        self.store = jobs.JobStore(tmp_path)
+        self.payload = MagicMock(
+            project_name="test_project",
+            project_start_time="20250205_010101",
+        )
+
+    def _create_unlocked(self) -> dict:
+        """Create a job and release its lock, as if the worker which created it stopped."""
+        job, lock_file = self.store.create(self.payload)
+        self.store.unlock(job["job_id"], lock_file)
+        return job
+
+    def test_create_job(self) -> None:
+        """Test case for registering a new queued job, locked before its record is written."""
+        job, lock_file = self.store.create(self.payload)
+
+        assert job["status"] == jobs.JOB_STATUS_QUEUED
+        assert job["project_name"] == "test_project"
+        assert self.store.get(job["job_id"]) == job
+        assert self.store.reconcile() == []
+        self.store.unlock(job["job_id"], lock_file)
+
+    def test_update_job(self) -> None:
+        """Test case for updating the job status and progress."""
+        job = self._create_unlocked()
+
+        self.store.update(job["job_id"], status=jobs.JOB_STATUS_RUNNING, stage="extract")
+
+        stored_job = self.store.get(job["job_id"])
+        assert stored_job["status"] == jobs.JOB_STATUS_RUNNING
+        assert stored_job["stage"] == "extract"
+        assert stored_job["submitted_at"] == job["submitted_at"]
+
+    def test_update_progress(self) -> None:
+        """Test case for adding the details of the current stage to the progress of the job."""
+        job = self._create_unlocked()
+
+        self.store.update_progress(job["job_id"], "extract", tables=2)
+        self.store.update_progress(job["job_id"], "load", loaded_tables=1)
+
+        stored_job = self.store.get(job["job_id"])
+        assert stored_job["stage"] == "load"
+        assert stored_job["progress"] == {"tables": 2, "loaded_tables": 1}
+
+    def test_expire_jobs(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test case for removing the records of the jobs which finished before the TTL."""
+        monkeypatch.setattr(jobs.settings, "publish_job_ttl", 3600)
+        old_job = self._create_unlocked()
+        self.store.update(old_job["job_id"], status=jobs.JOB_STATUS_SUCCEEDED)
+        new_job = self._create_unlocked()
+        self.store.update(new_job["job_id"], status=jobs.JOB_STATUS_FAILED)
+        running_job = self._create_unlocked()
+        self.store.update(running_job["job_id"], status=jobs.JOB_STATUS_RUNNING)
+        for job in (old_job, running_job):
+            os.utime(self.store._job_path(job["job_id"]), (time.time() - 7200, time.time() - 7200))  # noqa: SLF001
+
+        expired_jobs = self.store.expire(time.time())
+
+        assert expired_jobs == 1
+        assert self.store.get(old_job["job_id"]) is None
+        assert self.store.get(new_job["job_id"]) is not None
+        assert self.store.get(running_job["job_id"]) is not None
+
+    def test_get_unknown_job(self) -> None:
+        """Test case for retrieving a job which does not exist."""
+        assert self.store.get("unknownjob") is None
+
+    def test_get_rejects_path_traversal(self) -> None:
+        """Test case for rejecting job ids which are not generated by the store."""
+        assert self.store.get("../secrets") is None
+
+    def test_reconcile_jobs(self) -> None:
+        """Test case for failing the running jobs whose worker stopped, keeping the locked and finished ones."""
+        interrupted_job = self._create_unlocked()
+        self.store.update(interrupted_job["job_id"], status=jobs.JOB_STATUS_RUNNING)
+        locked_job, lock_file = self.store.create(self.payload)
+        finished_job = self._create_unlocked()
+        self.store.update(finished_job["job_id"], status=jobs.JOB_STATUS_SUCCEEDED)
+
+        failed_jobs = self.store.reconcile()
+
+        assert failed_jobs == [interrupted_job["job_id"]]
+        assert self.store.get(interrupted_job["job_id"])["status"] == jobs.JOB_STATUS_FAILED
+        assert self.store.get(locked_job["job_id"])["status"] == jobs.JOB_STATUS_QUEUED
+        assert self.store.get(finished_job["job_id"])["status"] == jobs.JOB_STATUS_SUCCEEDED
+        self.store.unlock(locked_job["job_id"], lock_file)
+
+
+class TestJobPool:
+    """Unit tests for the job process pool."""
+
+    def test_recreate_broken_pool(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test case for replacing the pool broken by a worker process which died."""
+        broken_executor = MagicMock(_broken="A child process terminated abruptly")
+        monkeypatch.setattr(jobs, "_executor", broken_executor)
+        monkeypatch.setattr(jobs, "ProcessPoolExecutor", MagicMock())
+
+        executor = jobs._get_executor()  # noqa: SLF001
+
+        assert executor is not broken_executor
+        broken_executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+    def test_wait_for_job_slot(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+        """Test case for waiting in the event loop until a job releases its slot."""
+        monkeypatch.setattr(jobs.settings, "publish_job_max_workers", 1)
+        monkeypatch.setattr(jobs, "JOB_SLOTS_DIR", tmp_path)
+        monkeypatch.setattr(jobs, "JOB_SLOT_POLL_INTERVAL", 0.01)
+        busy_slot = jobs._try_acquire_job_slot()  # noqa: SLF001
+
+        async def wait_for_slot() -> bool:
+            waiting = asyncio.create_task(jobs._wait_for_job_slot("job", MagicMock()))  # noqa: SLF001
+            await asyncio.sleep(0.05)
+            was_waiting = not waiting.done()
+            jobs._release_job_slot(busy_slot)  # noqa: SLF001
+            jobs._release_job_slot(await waiting)  # noqa: SLF001
+            return was_waiting
+
+        assert asyncio.run(wait_for_slot())
+
+
+class TestRunPackageJob:
+    """Unit tests for running a package job in a worker process of the job pool."""
+
+    def test_failed_job_resets_metrics(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+        """Test case for not reporting the metrics of a failed job with the next job of the worker process."""
+
+        async def failing_retrieve(*_: object) -> dict:
+            metrics.DLT_TABLE_ROWS.inc(10, stage="extract", source_type="sqlserver")
+            msg = "Source not available"
+            raise RuntimeError(msg)
+
+        monkeypatch.setattr(jobs.settings, "publish_jobs_dir", str(tmp_path))
+        monkeypatch.setattr(jobs.core, "dlt_data_retrieve", failing_retrieve)
+        monkeypatch.setattr(
+            jobs.cr8_schema.DataContractTransferRequest,
+            "model_validate",
+            MagicMock(return_value=MagicMock(project_name="test_project")),
+        )
+        job, _ = jobs.JobStore(tmp_path).create(MagicMock(project_name="test_project", project_start_time="20250205_010101"))
+
+        with pytest.raises(RuntimeError, match="Source not available"):
+            jobs.run_package_job(job["job_id"], {})
+
+        assert metrics.DLT_TABLE_ROWS.drain() == []
+        assert jobs.JobStore(tmp_path).get(job["job_id"])["status"] == jobs.JOB_STATUS_FAILED
@@ -0,0 +1,58 @@
+"""Module containing unit tests for the package manifest."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app import manifest, utils
+
+
+class TestCollectFiles:
+    """Unit tests for the collect_files function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
+        """Set up the test case with a package folder and its manifest."""
+        self.path = tmp_path.resolve()
+        (self.path / "main" / "table_1").mkdir(parents=True)
+        (self.path / "main" / "table_1" / "1.csv").write_text("id\n1\n")
+        (self.path / "main" / "table_1" / "2.csv").write_text("id\n2\n")
+        self.files_entries = manifest.describe_files(utils.collect_stored_file_paths(self.path), self.path)
+        manifest.write_manifest(self.path, self.files_entries)
+
+    def test_collect_files_from_manifest(self) -> None:
+        """Test case for listing the files of the manifest without scanning the folder."""
+        with patch.object(utils, "collect_stored_file_paths") as collect_stored_file_paths:
+            files = manifest.collect_files(self.path, manifest.read_manifest(self.path))
+
+        collect_stored_file_paths.assert_not_called()
+        assert files == [self.path / relative_path for relative_path in self.files_entries]
+
+    def test_collect_files_stale_manifest(self) -> None:
+        """Test case for scanning the folder when a file of the manifest is missing."""
+        (self.path / "main" / "table_1" / "2.csv").unlink()
+
+        files = manifest.collect_files(self.path, manifest.read_manifest(self.path))
+
+        assert files == [self.path / "main" / "table_1" / "1.csv"]
+
+    def test_collect_files_incomplete_manifest(self) -> None:
+        """Test case for scanning the folder when a table of the package has no files in the manifest."""
+        (self.path / "main" / "patient_data").mkdir()
+        (self.path / "main" / "patient_data" / "1.csv").write_text("id\n1\n")
+        files_entries = {relative_path: {**entry, "table_name": "table_1"} for relative_path, entry in self.files_entries.items()}
+
+        files = manifest.collect_files(self.path, files_entries, ["table_1", "PatientData"])
+
+        assert sorted(files) == sorted(
+            [*(self.path / relative_path for relative_path in self.files_entries), self.path / "main" / "patient_data" / "1.csv"],
+        )
+
+    def test_collect_files_without_manifest(self) -> None:
+        """Test case for scanning the folder when it has no manifest."""
+        (self.path / manifest.MANIFEST_FILE_NAME).unlink()
+
+        files = manifest.collect_files(self.path, manifest.read_manifest(self.path))
+
+        assert sorted(files) == sorted(self.path / relative_path for relative_path in self.files_entries)
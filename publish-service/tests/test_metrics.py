@@ -0,0 +1,81 @@
+"""Module containing unit tests for the Prometheus metrics."""
+
+from pathlib import Path
+
+from cr8tor_publisher_common import metrics as common_metrics
+from fastapi.testclient import TestClient
+
+from app import config
+from app.server import app
+
+
+class TestRegistry:
+    """Unit tests for the Registry class."""
+
+    def setup_method(self) -> None:
+        """Set up the test case with an empty registry."""
+        self.registry = common_metrics.Registry()
+        self.rows = self.registry.counter("test_rows_total", "Number of rows.", ("table",))
+        self.latency = self.registry.histogram("test_latency_seconds", "Latency.", ("stage",))
+
+    def test_render(self) -> None:
+        """Test case for rendering counters and histograms in the Prometheus text format."""
+        self.rows.inc(10, table='my"table')
+        self.latency.observe(0.2, stage="extract")
+
+        lines = self.registry.render().splitlines()
+
+        assert "# TYPE test_rows_total counter" in lines
+        assert 'test_rows_total{table="my\\"table"} 10' in lines
+        assert 'test_latency_seconds_bucket{stage="extract",le="0.1"} 0' in lines
+        assert 'test_latency_seconds_bucket{stage="extract",le="0.25"} 1' in lines
+        assert 'test_latency_seconds_bucket{stage="extract",le="+Inf"} 1' in lines
+        assert 'test_latency_seconds_count{stage="extract"} 1' in lines
+        assert 'test_latency_seconds_sum{stage="extract"} 0.2' in lines
+
+    def test_drain_and_merge(self) -> None:
+        """Test case for moving the metrics of a job worker process to the uvicorn worker."""
+        self.rows.inc(10, table="a")
+        self.latency.observe(2, stage="load")
+        snapshot = self.registry.drain()
+
+        assert self.rows.drain() == []
+
+        self.rows.inc(5, table="a")
+        self.registry.merge(snapshot)
+
+        assert self.rows.drain() == [[["a"], 15]]
+        ((_, observations),) = self.latency.drain()
+        assert observations[-2:] == [1, 2]
+
+    def test_render_multiprocess(self, tmp_path: Path) -> None:
+        """Test case for summing the metrics of all uvicorn workers sharing the multiprocess directory."""
+        workers = [common_metrics.Registry(tmp_path), common_metrics.Registry(tmp_path)]
+        for amount, worker in enumerate(workers, start=2):
+            worker.counter("test_rows_total", "Number of rows.", ("table",)).inc(amount, table="a")
+        workers[1].flush()
+
+        lines = workers[0].render().splitlines()
+
+        assert 'test_rows_total{table="a"} 5' in lines
+        assert len(list(tmp_path.glob("*.json"))) == 2  # noqa: PLR2004
+
+
+class TestMetricsEndpoint:
+    """Unit tests for the /metrics endpoint."""
+
+    def test_metrics_endpoint(self) -> None:
+        """Test case for exposing the request latency of the served endpoints."""
+        client = TestClient(app)
+        headers = {"x-api-key": config.get_settings().publishserviceapikey}
+
+        client.get("/metrics", headers=headers)
+        response = client.get("/metrics", headers=headers)
+
+        assert response.status_code == 200  # noqa: PLR2004
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_request_duration_seconds_count{method="GET",route="/metrics",status="200"}' in response.text
+
+    def test_metrics_endpoint_requires_api_key(self) -> None:
+        """Test case for rejecting requests without the API key."""
+        assert TestClient(app).get("/metrics").status_code == 403  # noqa: PLR2004
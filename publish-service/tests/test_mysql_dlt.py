@@ -1,8 +1,10 @@
 """Module containing unit tests for the DLTDataRetriever class."""
 
+import os
 from unittest.mock import MagicMock, patch
 
 import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table
 
 from app.config import logging
 from app.core import DLTDataRetriever
@@ -110,6 +112,144 @@ class TestDLTDataRetriever:
         }
         assert primary_key_list == ["id"]
 
+    def test_get_tables_metadata_in_bulk(self) -> None:
+        """Test case for reading the metadata of all tables with a single column and primary key query."""
+        mock_engine = MagicMock()
+        mock_conn = mock_engine.connect.return_value.__enter__.return_value
+        mock_conn.execute.side_effect = [
+            [
+                MagicMock(table_name="family", column_name="auto_wiki", data_type="INTEGER", is_nullable="NO"),
+                MagicMock(table_name="family", column_name="noise_cutoff", data_type="VARCHAR", is_nullable="YES"),
+                MagicMock(table_name="clan", column_name="clan_acc", data_type="VARCHAR", is_nullable="NO"),
+            ],
+            [
+                MagicMock(table_name="family", column_name="auto_wiki"),
+            ],
+        ]
+        self.retriever.engine = mock_engine
+
+        tables_metadata = self.retriever._get_tables_metadata(["family", "clan", "missing"])  # noqa: SLF001
+
+        assert mock_conn.execute.call_count == 2  # noqa: PLR2004
+        assert tables_metadata == {
+            "family": (
+                {
+                    "auto_wiki": {"data_type": "INTEGER", "is_nullable": False},
+                    "noise_cutoff": {"data_type": "VARCHAR", "is_nullable": True},
+                },
+                ["auto_wiki"],
+            ),
+            "clan": ({"clan_acc": {"data_type": "VARCHAR", "is_nullable": False}}, []),
+            "missing": ({}, []),
+        }
+
+    def test_get_tables_metadata_falls_back_to_per_table_queries(self) -> None:
+        """Test case for reading the metadata table by table when the bulk lookup fails."""
+        mock_engine = MagicMock()
+        mock_engine.connect.return_value.__enter__.return_value.execute.side_effect = Exception("Bulk lookup failed")
+        self.retriever.engine = mock_engine
+
+        with patch.object(
+            self.retriever,
+            "_get_table_metadata",
+            return_value=({"auto_wiki": {"data_type": "INTEGER", "is_nullable": False}}, ["auto_wiki"]),
+        ) as mock_get_table_metadata:
+            tables_metadata = self.retriever._get_tables_metadata(["family"])  # noqa: SLF001
+
+        mock_get_table_metadata.assert_called_once_with("family")
+        assert tables_metadata["family"][1] == ["auto_wiki"]
+
+    def test_get_partition_predicates_on_primary_key(self) -> None:
+        """Test case for splitting a large table into key ranges on its primary key."""
+        table_obj = Table(
+            "family",
+            MetaData(schema="Rfam"),
+            Column("auto_wiki", Integer, primary_key=True),
+            Column("noise_cutoff", String),
+        )
+        self.retriever.table_statistics = {"family": {"row_count": 25_000_000}}
+        mock_engine = MagicMock()
+        mock_conn = mock_engine.connect.return_value.__enter__.return_value
+        mock_conn.execute.return_value.one.return_value = (1, 3001)
+        self.retriever.engine = mock_engine
+
+        predicates = self.retriever._get_partition_predicates(  # noqa: SLF001
+            self.access_payload.dataset.tables[0],
+            table_obj,
+        )
+
+        assert [str(p.compile(compile_kwargs={"literal_binds": True})) for p in predicates] == [
+            '"Rfam".family.auto_wiki < 1001 OR "Rfam".family.auto_wiki IS NULL',
+            '"Rfam".family.auto_wiki >= 1001 AND "Rfam".family.auto_wiki < 2001',
+            '"Rfam".family.auto_wiki >= 2001',
+        ]
+
+    def test_get_partition_predicates_small_table(self) -> None:
+        """Test case for reading a table below the partitioning threshold with a single reader."""
+        table_obj = Table(
+            "family",
+            MetaData(schema="Rfam"),
+            Column("auto_wiki", Integer, primary_key=True),
+        )
+        self.retriever.table_statistics = {"family": {"row_count": 1000}}
+
+        assert (
+            self.retriever._get_partition_predicates(  # noqa: SLF001
+                self.access_payload.dataset.tables[0],
+                table_obj,
+            )
+            is None
+        )
+
+    def _run_load_batches(self, destination_format: str, extract_workers: int) -> tuple[MagicMock, dict]:
+        """Run the load batches of a job with a mock pipeline, restoring the environment as dlt_data_retrieve does.
+
+        Returns:
+            tuple: The mock pipeline and the data writer environment variables set while extracting.
+
+        """
+        payload = self.access_payload.model_copy(deep=True)
+        payload.destination.format = destination_format
+        retriever = DLTDataRetriever(payload, self.log)
+        retriever.pipeline = MagicMock()
+        retriever.dlt_destination = MagicMock()
+        retriever.loader_file_format = destination_format
+        retriever.extract_workers = extract_workers
+        retriever.extract_order = ["family"]
+        retriever.write_dispositions = {"family": "replace"}
+        retriever.extract_plan = {"family": {"file_max_bytes": 1024, "row_group_size": 500}}
+        retriever.load_batches = [(["family"], [MagicMock()])]
+        extract_env = {}
+        retriever.pipeline.extract.side_effect = lambda *_, **__: extract_env.update(
+            {name: value for name, value in os.environ.items() if name.startswith("DATA_WRITER__")},
+        )
+        with (
+            patch.object(retriever, "_record_stage_metrics"),
+            patch.object(retriever, "_save_checkpoints"),
+        ):
+            try:
+                retriever._run_load_batches()  # noqa: SLF001
+            finally:
+                retriever.restore_env_vars()
+        return retriever.pipeline, extract_env
+
+    def test_consecutive_jobs_do_not_share_settings(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test case for configuring the extract of a job without changing the settings of the next job of the process."""
+        monkeypatch.delenv("DATA_WRITER__ROW_GROUP_SIZE", raising=False)
+        monkeypatch.delenv("DATA_WRITER__BUFFER_MAX_ITEMS", raising=False)
+
+        parquet_workers = 4
+        parquet_pipeline, parquet_env = self._run_load_batches("parquet", parquet_workers)
+        csv_pipeline, csv_env = self._run_load_batches("csv", 1)
+
+        assert parquet_pipeline.extract.call_args.kwargs["workers"] == parquet_workers
+        assert parquet_env["DATA_WRITER__BUFFER_MAX_ITEMS"] == "500"
+        assert csv_pipeline.extract.call_args.kwargs["workers"] == 1
+        assert csv_pipeline.extract.call_args.kwargs["max_parallel_items"] == 1
+        assert "DATA_WRITER__BUFFER_MAX_ITEMS" not in csv_env
+        assert "DATA_WRITER__ROW_GROUP_SIZE" not in os.environ
+        assert "EXTRACT__WORKERS" not in os.environ
+
     @patch("app.config.Settings.get_secret")
     def test_get_source_connection_string_success(
         self,
@@ -0,0 +1,212 @@
+"""Module containing unit tests for the Opal session and the provisioning of Opal project resources."""
+
+import io
+import json
+import logging
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+
+from app import opal
+
+
+class FakeRequest:
+    """Fake Opal REST request recording the sent requests."""
+
+    def __init__(self, service: "FakeRESTService", method: str) -> None:
+        """Initialize the request of the given method."""
+        self.service = service
+        self.method = method
+        self.path = None
+        self.body = None
+
+    def content_type_json(self) -> "FakeRequest":
+        """Return the request."""
+        return self
+
+    def resource(self, path: str) -> "FakeRequest":
+        """Set the resource path of the request."""
+        self.path = path
+        return self
+
+    def content(self, body: str) -> "FakeRequest":
+        """Set the body of the request."""
+        self.body = body
+        return self
+
+    def send(self) -> SimpleNamespace:
+        """Record the request and return the listing of the project resources."""
+        self.service.sent.append((self.method, self.path))
+        if self.path in self.service.failing_paths:
+            raise opal.HTTPError(SimpleNamespace(code=HTTPStatus.INTERNAL_SERVER_ERROR, content=None))
+        return SimpleNamespace(from_json=lambda: self.service.existing_resources)
+
+
+class FakeRESTService:
+    """Fake Opal REST service, shared by all requests of a test."""
+
+    def __init__(self, existing_resources: list[dict], failing_paths: set[str]) -> None:
+        """Initialize the service with the existing project resources."""
+        self.existing_resources = existing_resources
+        self.failing_paths = failing_paths
+        self.sent = []
+
+    def make_request(self, method: str) -> FakeRequest:
+        """Return a new request of the given method."""
+        return FakeRequest(self, method)
+
+
+class TestCreateResources:
+    """Unit tests for the Opal.create_resources method."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Set up the test case with a project holding an up to date and an outdated resource."""
+        monkeypatch.setenv("DESTINATION_POSTGRESQL_HOST", "postgres")
+        monkeypatch.setenv("DESTINATION_POSTGRESQL_PORT", "5432")
+        monkeypatch.setenv("DESTINATION_POSTGRESQL_DATABASE", "resources")
+        self.opal = opal.Opal.__new__(opal.Opal)
+        self.opal.log = logging.getLogger("test_opal")
+        self.opal.session = SimpleNamespace(rest=None)
+        self.tables_list = [{"schema": "project_20250101", "name": f"table_{i}"} for i in range(1, 5)]
+        configs = [self.opal._resource_config("project", table, "user", "password") for table in self.tables_list]  # noqa: SLF001
+        outdated_config = {**configs[1], "parameters": json.dumps({**json.loads(configs[1]["parameters"]), "port": "5433"})}
+        self.rest_service = FakeRESTService(
+            existing_resources=[configs[0], outdated_config],
+            failing_paths={"/project/project/resource/tre_postgresql_project_20250101_table_2"},
+        )
+        self.opal.session.rest = self.rest_service
+
+    def test_create_resources(self) -> None:
+        """Test case for creating the missing resources and updating the outdated ones."""
+        self.rest_service.failing_paths = set()
+
+        outcomes = self.opal.create_resources("project", self.tables_list, "user", "password")
+
+        assert [outcome["status"] for outcome in outcomes] == [
+            opal.RESOURCE_STATUS_UNCHANGED,
+            opal.RESOURCE_STATUS_UPDATED,
+            opal.RESOURCE_STATUS_CREATED,
+            opal.RESOURCE_STATUS_CREATED,
+        ]
+        assert [outcome["name"] for outcome in outcomes] == [
+            f"tre_postgresql_project_20250101_table_{i}" for i in range(1, 5)
+        ]
+        assert sorted(self.rest_service.sent) == [
+            ("GET", "/project/project/resources"),
+            ("POST", "/project/project/resources"),
+            ("POST", "/project/project/resources"),
+            ("PUT", "/project/project/resource/tre_postgresql_project_20250101_table_2"),
+        ]
+
+    def test_create_resources_failure(self) -> None:
+        """Test case for reporting a failed resource without stopping the provisioning of the others."""
+        outcomes = self.opal.create_resources("project", self.tables_list, "user", "password")
+
+        assert outcomes[1]["status"] == opal.RESOURCE_STATUS_FAILED
+        assert outcomes[1]["error"]
+        assert [outcomes[i]["status"] for i in (0, 2, 3)] == [
+            opal.RESOURCE_STATUS_UNCHANGED,
+            opal.RESOURCE_STATUS_CREATED,
+            opal.RESOURCE_STATUS_CREATED,
+        ]
+
+
+class TestCreateGroup:
+    """Unit tests for the Opal.create_group method."""
+
+    def test_create_group_keeps_default_user_groups(self) -> None:
+        """Test case for adding the group to the current groups of the default user, read uncached."""
+        updates = []
+
+        def get_group(_group_name: str) -> dict:
+            """Answer that the group does not exist."""
+            raise opal.HTTPError(SimpleNamespace(code=HTTPStatus.NOT_FOUND, content=None))
+
+        def lookup(_key: str, _load: object) -> dict:
+            """Return a stale default user, missing the group added by another worker."""
+            return {"name": opal.DEFAULT_USER_NAME, "groups": ["project_1"]}
+
+        opal_client = opal.Opal.__new__(opal.Opal)
+        opal_client.log = logging.getLogger("test_opal")
+        opal_client.session = SimpleNamespace(
+            groups=SimpleNamespace(get_group=get_group),
+            users=SimpleNamespace(
+                get_user=lambda _name: {"name": opal.DEFAULT_USER_NAME, "groups": ["project_1", "project_2"]},
+                update_user=lambda _name, groups, disabled: updates.append((sorted(groups), disabled)),
+            ),
+            lookup=lookup,
+        )
+
+        assert opal_client.create_group("project_3") == "project_3"
+        assert updates == [(["project_1", "project_2", "project_3"], False)]
+
+
+class TestOpalSession:
+    """Unit tests for the reuse of the Opal session and its cached lookups."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Set up the test case with an Opal server accepting a single session cookie."""
+        self.sent_cookies = []
+
+        def send(_adapter: HTTPAdapter, request: requests.PreparedRequest, *_args: object, **_kwargs: object) -> requests.Response:
+            """Answer 401 to the requests sending an expired session cookie."""
+            self.sent_cookies.append(request.headers.get("Cookie"))
+            response = requests.Response()
+            response.raw = io.BytesIO()
+            response.status_code = (
+                HTTPStatus.UNAUTHORIZED if request.headers.get("Cookie") == "opalsid=expired" else HTTPStatus.OK
+            )
+            return response
+
+        monkeypatch.setattr(HTTPAdapter, "send", send)
+        self.cookies = RequestsCookieJar()
+        self.adapter = opal.OpalSessionAdapter(self.cookies)
+        self.request = requests.Request("GET", "https://opal.example.org/ws/system/subject-profile/_current").prepare()
+
+    def test_send_session_cookie(self) -> None:
+        """Test case for sending the session cookie stored by the client session."""
+        self.cookies.set("opalsid", "valid", domain="opal.example.org", path="/")
+
+        response = self.adapter.send(self.request)
+
+        assert response.status_code == HTTPStatus.OK
+        assert self.sent_cookies == ["opalsid=valid"]
+
+    def test_send_expired_session_cookie(self) -> None:
+        """Test case for authenticating again with the credentials when the session expired."""
+        self.cookies.set("opalsid", "expired", domain="opal.example.org", path="/")
+
+        response = self.adapter.send(self.request)
+
+        assert response.status_code == HTTPStatus.OK
+        assert self.sent_cookies == ["opalsid=expired", None]
+        assert len(self.cookies) == 0
+        assert not self.adapter.credentials_rejected
+
+    def test_lookup(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test case for caching the lookups until they expire or are invalidated."""
+        session = opal.OpalSession.__new__(opal.OpalSession)
+        session._lookups = {}  # noqa: SLF001
+        session._lookups_lock = opal.threading.Lock()  # noqa: SLF001
+        loads = []
+
+        def load() -> list[dict]:
+            """Return the DataSHIELD group permissions."""
+            loads.append(1)
+            return [{"subject": {"principal": "existing_group"}}]
+
+        session.lookup(opal.LOOKUP_DATASHIELD_GROUP_PERMS, load).append({"subject": {"principal": "project_group"}})
+        assert session.lookup(opal.LOOKUP_DATASHIELD_GROUP_PERMS, load) == [{"subject": {"principal": "existing_group"}}]
+        assert loads == [1]
+
+        session.invalidate(opal.LOOKUP_DATASHIELD_GROUP_PERMS)
+        session.lookup(opal.LOOKUP_DATASHIELD_GROUP_PERMS, load)
+        monkeypatch.setattr(opal.settings, "opal_lookup_cache_ttl", -1)
+        session.lookup(opal.LOOKUP_DATASHIELD_GROUP_PERMS, load)
+        assert loads == [1, 1, 1]
@@ -0,0 +1,231 @@
+"""Module containing unit tests for the publish functions."""
+
+import asyncio
+import errno
+import json
+import logging
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from bagit import generate_manifest_lines
+from cr8tor.core import schema as cr8_schema
+
+from app import incremental, manifest, publish, utils
+
+
+class TestGenerateChecksums:
+    """Unit tests for the generate_checksums function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Set up the test case with data files larger than the checksum block."""
+        monkeypatch.setattr(publish.settings, "publish_checksum_block_bytes", 1024)
+        self.path = tmp_path.resolve()
+        (self.path / "table_1").mkdir()
+        (self.path / "table_2").mkdir()
+        (self.path / "table_1" / "1.csv").write_bytes(b"id,name\n" + b"1,a\n" * 1000)
+        (self.path / "table_2" / "1.parquet").write_bytes(bytes(range(256)) * 17)
+        (self.path / "table_2" / "2.parquet").write_bytes(b"")
+
+    def test_generate_checksums_matches_bagit(self) -> None:
+        """Test case for checksums identical to the BagIt manifest values."""
+        checksums = publish.generate_checksums(self.path)
+
+        files = utils.collect_stored_file_paths(self.path)
+        assert [checksum["file_path"] for checksum in checksums] == [
+            utils.CR8TOR_BAGIT_EXTRA_FOLDER_STRUCTURE + str(file.relative_to(self.path)) for file in files
+        ]
+        for checksum, file in zip(checksums, files, strict=True):
+            _, hash_value, _, total_bytes = generate_manifest_lines(str(file), algorithms=["SHA512"])[0]
+            assert checksum["hash_value"] == hash_value
+            assert checksum["total_bytes"] == total_bytes
+
+    def test_generate_checksums_empty_folder(self) -> None:
+        """Test case for a folder without data files."""
+        (self.path / "table_3").mkdir()
+
+        assert publish.generate_checksums(self.path / "table_3") == []
+
+    def test_generate_checksums_reuses_manifest(self) -> None:
+        """Test case for reusing the stored checksums of unchanged files."""
+        stored_files = manifest.describe_files(utils.collect_stored_file_paths(self.path), self.path)
+        stored_files["table_1/1.csv"]["hash_value"] = "stored"
+
+        with patch.object(manifest, "calculate_file_checksum", wraps=manifest.calculate_file_checksum) as calculate:
+            checksums = publish.generate_checksums(self.path, stored_files)
+
+        calculate.assert_not_called()
+        assert checksums[0] == {"file_path": "data/outputs/table_1/1.csv", "hash_value": "stored", "total_bytes": 4008}
+        assert manifest.read_manifest(self.path) == stored_files
+
+    def test_generate_checksums_rehashes_modified_files(self) -> None:
+        """Test case for reading the files modified after the manifest was written."""
+        stored_files = manifest.describe_files(utils.collect_stored_file_paths(self.path), self.path)
+        (self.path / "table_1" / "1.csv").write_bytes(b"id,name\n")
+
+        with patch.object(manifest, "calculate_file_checksum", wraps=manifest.calculate_file_checksum) as calculate:
+            checksums = publish.generate_checksums(self.path, stored_files)
+
+        calculate.assert_called_once_with(self.path / "table_1" / "1.csv")
+        _, hash_value, _, _ = generate_manifest_lines(str(self.path / "table_1" / "1.csv"), algorithms=["SHA512"])[0]
+        assert checksums[0] == {"file_path": "data/outputs/table_1/1.csv", "hash_value": hash_value, "total_bytes": 8}
+
+    def test_generate_checksums_verify_mismatch(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test case for the full verification mode detecting files which do not match the manifest."""
+        monkeypatch.setattr(publish.settings, "publish_checksum_verify", True)
+        publish.generate_checksums(self.path)
+        stored_manifest = json.loads((self.path / manifest.MANIFEST_FILE_NAME).read_text())
+        stored_manifest["files"]["table_2/1.parquet"]["hash_value"] = "corrupted"
+        (self.path / manifest.MANIFEST_FILE_NAME).write_text(json.dumps(stored_manifest))
+
+        with pytest.raises(RuntimeError, match=r"table_2/1\.parquet"):
+            publish.generate_checksums(self.path)
+
+
+class TestPromoteFiles:
+    """Unit tests for the _promote_files function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
+        """Set up the test case with a staging folder holding a package and dlt state files."""
+        self.log = logging.getLogger("test_publish")
+        self.staging_path = tmp_path / "staging" / "project" / "20250205_010101" / "data" / "outputs"
+        self.production_path = tmp_path / "production" / "project" / "20250205_010101" / "data" / "outputs"
+        (self.staging_path / "main" / "table_1").mkdir(parents=True)
+        (self.staging_path / "main" / "_dlt_loads").mkdir()
+        (self.staging_path / "main" / "_dlt_loads" / "init").write_text("")
+        (self.staging_path / "main" / "init").write_text("")
+        (self.staging_path / "_package_state.json").write_text("{}")
+        (self.staging_path / manifest.MANIFEST_FILE_NAME).write_text("{}")
+        self.files = [self.staging_path / "main" / "table_1" / f"{part}.csv" for part in range(3)]
+        for file in self.files:
+            file.write_text("id\n1\n")
+
+    def _published_paths(self) -> set[str]:
+        """Return the paths of the files in production."""
+        return {str(file.relative_to(self.production_path)) for file in self.production_path.rglob("*") if file.is_file()}
+
+    def test_promote_files_rename(self) -> None:
+        """Test case for renaming the staging folder when the package is published for the first time."""
+        strategy = publish._promote_files(self.staging_path, self.production_path, self.files, self.log)  # noqa: SLF001
+
+        assert strategy == publish.PROMOTE_STRATEGY_RENAME
+        assert not self.staging_path.exists()
+        assert self._published_paths() == {
+            "main/table_1/0.csv",
+            "main/table_1/1.csv",
+            "main/table_1/2.csv",
+            manifest.MANIFEST_FILE_NAME,
+        }
+
+    def test_promote_files_rename_keeps_unlisted_data_files(self) -> None:
+        """Test case for never pruning the data files which are not listed as package files."""
+        (self.staging_path / "main" / "patient_data").mkdir()
+        (self.staging_path / "main" / "patient_data" / "0.csv").write_text("id\n1\n")
+
+        publish._promote_files(self.staging_path, self.production_path, self.files, self.log)  # noqa: SLF001
+
+        assert "main/patient_data/0.csv" in self._published_paths()
+        assert not (self.production_path / "main" / "_dlt_loads").exists()
+        assert not (self.production_path / "main" / "init").exists()
+
+    def test_promote_files_move_to_existing_production(self) -> None:
+        """Test case for moving the files one by one when production holds previously published files."""
+        (self.production_path / "main" / "table_1").mkdir(parents=True)
+        (self.production_path / "main" / "table_1" / "published.csv").write_text("id\n0\n")
+
+        strategy = publish._promote_files(self.staging_path, self.production_path, self.files, self.log)  # noqa: SLF001
+
+        assert strategy == publish.PROMOTE_STRATEGY_MOVE
+        assert self._published_paths() == {
+            "main/table_1/published.csv",
+            "main/table_1/0.csv",
+            "main/table_1/1.csv",
+            "main/table_1/2.csv",
+        }
+
+    def test_promote_files_copy_across_filesystems(self) -> None:
+        """Test case for copying the files when staging and production are different filesystems."""
+        with patch.object(Path, "rename", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            strategy = publish._promote_files(self.staging_path, self.production_path, self.files, self.log)  # noqa: SLF001
+
+        assert strategy == publish.PROMOTE_STRATEGY_COPY
+        assert self._published_paths() == {"main/table_1/0.csv", "main/table_1/1.csv", "main/table_1/2.csv"}
+
+    def test_remove_unpublished_files(self) -> None:
+        """Test case for removing the previously published files of a replaced table once it is promoted."""
+        (self.production_path / "main" / "table_1" / "range_1").mkdir(parents=True)
+        (self.production_path / "main" / "table_1" / "range_1" / "published.csv").write_text("id\n0\n")
+        (self.production_path / "main" / "table_1" / "published.csv").write_text("id\n0\n")
+        # The first file was promoted by a previous attempt, which failed
+        self.files[0].rename(self.production_path / "main" / "table_1" / "0.csv")
+        package_paths = {"main/table_1/0.csv", "main/table_1/1.csv", "main/table_1/2.csv"}
+
+        publish._promote_files(self.staging_path, self.production_path, self.files[1:], self.log)  # noqa: SLF001
+        publish._remove_unpublished_files(  # noqa: SLF001
+            self.production_path,
+            self.production_path / "main" / "table_1",
+            package_paths,
+        )
+
+        assert self._published_paths() == package_paths
+        assert not (self.production_path / "main" / "table_1" / "range_1").exists()
+
+
+class TestPublishToFilestore:
+    """Unit tests for the _publish_to_filestore function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Set up the test case with a package replacing a previously published table."""
+        monkeypatch.setenv("TARGET_STORAGE_ACCOUNT_LSC_SDE_MNT_PATH", str(tmp_path))
+        monkeypatch.setattr(incremental.settings, "publish_state_dir", str(tmp_path / "state"))
+        self.log = logging.getLogger("test_publish")
+        self.payload = cr8_schema.DataContractPublishRequest(
+            project_name="project",
+            project_start_time="20250205_010101",
+            destination={"name": "LSC", "type": "filestore", "format": "csv"},
+        )
+        self.staging_path, self.production_path, *_ = utils.get_target_paths(self.payload)
+        (self.staging_path / "main" / "patient_data").mkdir(parents=True)
+        (self.staging_path / "main" / "patient_data" / "new.csv").write_text("id\n2\n")
+        files_entries = manifest.describe_files([self.staging_path / "main" / "patient_data" / "new.csv"], self.staging_path)
+        manifest.write_manifest(
+            self.staging_path,
+            {relative_path: {**entry, "table_name": "PatientData"} for relative_path, entry in files_entries.items()},
+        )
+        self.mark = {"cursor_column": "id", "last_value": {"type": "json", "value": 2}}
+        incremental.write_package_state(
+            self.staging_path,
+            {
+                "schema_name": "Main",
+                "table_folders": {"PatientData": "main/patient_data"},
+                "write_dispositions": {"PatientData": "replace"},
+                "high_water_marks": {"PatientData": self.mark},
+            },
+        )
+        (self.production_path / "main" / "patient_data").mkdir(parents=True)
+        (self.production_path / "main" / "patient_data" / "old.csv").write_text("id\n1\n")
+
+    def test_publish_replaced_table(self) -> None:
+        """Test case for replacing the published files of a table written under its normalized name."""
+        asyncio.run(publish._publish_to_filestore(self.payload, self.log))  # noqa: SLF001
+
+        assert sorted(path.name for path in (self.production_path / "main" / "patient_data").iterdir()) == ["new.csv"]
+        other_destination = cr8_schema.Destination(name="NW", type="filestore")
+        marks = incremental.HighWaterMarkStore("project", "20250205_010101", self.payload.destination, "Main").load()
+        assert marks == {"PatientData": self.mark}
+        assert incremental.HighWaterMarkStore("project", "20250205_010101", other_destination, "Main").load() == {}
+        assert not self.staging_path.parents[1].exists()
+
+    def test_publish_renamed_package_removes_staging_folders(self) -> None:
+        """Test case for removing the empty staging package folder after renaming the package to production."""
+        shutil.rmtree(self.production_path)
+
+        result = asyncio.run(publish._publish_to_filestore(self.payload, self.log))  # noqa: SLF001
+
+        assert result["promote_strategy"] == "rename"
+        assert not self.staging_path.parents[1].exists()
+        assert self.staging_path.parents[2].exists()
@@ -0,0 +1,92 @@
+"""Module containing unit tests for the copy of package files between filesystems."""
+
+import errno
+import logging
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app import transfer
+
+CHUNK_BYTES = 1024
+SOURCE_MTIME_NS = 1_700_000_000_000_000_000
+
+
+class TestCopyFile:
+    """Unit tests for the copy_file function."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Set up the test case with a source file of several chunks."""
+        monkeypatch.setattr(transfer.settings, "publish_copy_chunk_bytes", CHUNK_BYTES)
+        self.log = logging.getLogger("test_transfer")
+        self.data = os.urandom(4 * CHUNK_BYTES + 100)
+        self.source = tmp_path / "staging" / "database.duckdb"
+        self.source.parent.mkdir()
+        self.source.write_bytes(self.data)
+        os.utime(self.source, ns=(SOURCE_MTIME_NS, SOURCE_MTIME_NS))
+        self.destination = tmp_path / "production" / "database.duckdb"
+
+    def _partial_path(self) -> Path:
+        """Return the path of the partial copy of the source file."""
+        stat = self.source.stat()
+        return self.destination.with_name(f".{self.destination.name}.{stat.st_size}-{stat.st_mtime_ns}.part")
+
+    def test_copy_file(self) -> None:
+        """Test case for copying the file, keeping its modification time and removing the source."""
+        stats = transfer.copy_file(self.source, self.destination, self.log)
+
+        assert self.destination.read_bytes() == self.data
+        assert self.destination.stat().st_mtime_ns == SOURCE_MTIME_NS
+        assert not self.source.exists()
+        assert stats["bytes"] == len(self.data)
+        assert stats["resumed_bytes"] == 0
+
+    def test_copy_file_resume(self) -> None:
+        """Test case for resuming the copy from the last complete chunk of the partial file."""
+        partial_path = self._partial_path()
+        partial_path.parent.mkdir()
+        partial_path.write_bytes(self.data[: 2 * CHUNK_BYTES] + b"corrupted")
+
+        stats = transfer.copy_file(self.source, self.destination, self.log)
+
+        assert self.destination.read_bytes() == self.data
+        assert stats["resumed_bytes"] == 2 * CHUNK_BYTES
+        assert not partial_path.exists()
+
+    def test_copy_file_unsupported_copy_file_range(self) -> None:
+        """Test case for falling back to the next method when copy_file_range is not supported."""
+        with patch.object(os, "copy_file_range", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            stats = transfer.copy_file(self.source, self.destination, self.log)
+
+        assert self.destination.read_bytes() == self.data
+        assert stats["method"] == transfer.COPY_METHOD_SENDFILE
+
+    def test_copy_file_error(self) -> None:
+        """Test case for keeping the source and partial file when the copy fails."""
+        with (
+            patch.object(os, "copy_file_range", side_effect=OSError(errno.ENOSPC, "No space left on device")),
+            pytest.raises(OSError, match="No space left on device"),
+        ):
+            transfer.copy_file(self.source, self.destination, self.log)
+
+        assert self.source.exists()
+        assert self._partial_path().exists()
+        assert not self.destination.exists()
+
+
+class TestByteBudget:
+    """Unit tests for the ByteBudget class."""
+
+    def test_acquire_large_file(self) -> None:
+        """Test case for reserving the whole budget for a file larger than the budget."""
+        budget = transfer.ByteBudget(CHUNK_BYTES)
+
+        reserved = budget.acquire(10 * CHUNK_BYTES)
+
+        assert reserved == CHUNK_BYTES
+        assert budget.bytes_in_flight == CHUNK_BYTES
+        budget.release(reserved)
+        assert budget.bytes_in_flight == 0